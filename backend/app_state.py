@@ -0,0 +1,96 @@
+import json
+import datetime
+import logging
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+import models
+
+logger = logging.getLogger(__name__)
+
+# Defaults used until a value has been saved through /api/settings
+DEFAULT_SETTINGS = {
+    "score_sync_interval": 5, # minutes
+    "salary_sync_frequency": "weekly", # weekly or manual
+    "salary_cap": 72.0, # Million USD
+    "sync_mode": "fixed", # fixed or adaptive (follows NHL game windows)
+    "idle_sync_interval": 60, # minutes between adaptive syncs when no game is live
+    "settle_delay": 30 # minutes after the last game ends for the settle-up sync
+}
+
+def load_settings(db: Session):
+    """
+    Returns the league settings, stored values layered over DEFAULT_SETTINGS.
+    Unknown keys in the table are ignored so old rows can't break startup.
+    """
+    settings = dict(DEFAULT_SETTINGS)
+    for row in db.query(models.AppSetting).all():
+        if row.key not in settings:
+            continue
+        try:
+            settings[row.key] = json.loads(row.value)
+        except (TypeError, ValueError):
+            logger.warning(f"Ignoring unreadable setting {row.key}: {row.value!r}")
+    return settings
+
+def save_settings(db: Session, settings: dict):
+    for key, value in settings.items():
+        row = db.query(models.AppSetting).filter(models.AppSetting.key == key).first()
+        if not row:
+            row = models.AppSetting(key=key)
+            db.add(row)
+        row.value = json.dumps(value)
+    db.commit()
+
+def save_league_info(db: Session, info: dict):
+    """League facts from the last sync (scoring map, playoff teams) for workers that didn't run it"""
+    row = db.query(models.AppSetting).filter(models.AppSetting.key == "league").first()
+    if not row:
+        row = models.AppSetting(key="league")
+        db.add(row)
+    row.value = json.dumps(info)
+    db.commit()
+
+def load_league_info(db: Session):
+    row = db.query(models.AppSetting).filter(models.AppSetting.key == "league").first()
+    try:
+        return json.loads(row.value) if row else {}
+    except (TypeError, ValueError):
+        return {}
+
+def start_sync_run(db: Session):
+    run = models.SyncRun(started_at=datetime.datetime.utcnow())
+    db.add(run)
+    db.commit()
+    return run.id
+
+def finish_sync_run(db: Session, run_id, error=None, summary=None):
+    run = db.query(models.SyncRun).filter(models.SyncRun.id == run_id).first()
+    if not run:
+        return
+    run.finished_at = datetime.datetime.utcnow()
+    run.success = error is None
+    run.error = str(error) if error is not None else None
+    run.summary = json.dumps(summary) if summary is not None else None
+    db.commit()
+
+def last_successful_sync(db: Session, include_failed=False):
+    """Finish time (naive UTC) of the most recent successful (or any finished) sync, or None"""
+    query = db.query(models.SyncRun).filter(models.SyncRun.finished_at != None)
+    if not include_failed:
+        query = query.filter(models.SyncRun.success == True)
+    run = query.order_by(models.SyncRun.finished_at.desc()).first()
+    return run.finished_at if run else None
+
+def get_generation(db: Session, name="data"):
+    row = db.query(models.CacheGeneration).filter(models.CacheGeneration.name == name).first()
+    return row.value if row else 0
+
+def bump_generation(db: Session, name="data"):
+    """Atomically increments a generation counter, creating it on first use"""
+    table = models.CacheGeneration.__table__
+    dialect = db.get_bind().dialect.name
+    # One upsert, so two workers bumping a counter that doesn't exist yet can't both insert it
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    stmt = insert(table).values(name=name, value=1)
+    db.execute(stmt.on_conflict_do_update(index_elements=[table.c.name], set_={"value": table.c.value + 1}))
+    db.commit()
@@ -0,0 +1,153 @@
+"""
+Synthetic league fixtures and offline stand-ins for FantasyClient and the CBS scraper.
+
+A fixture is plain JSON (so it can be saved and replayed between commits):
+{
+    "scoring": {"G": 3.0, ...},
+    "teams": [{"team_id", "team_name", "standing", "wins", "losses", "ties", "stats", "roster": [player, ...]}],
+    "free_agents": [player, ...],
+    "ownership": {"<playerId>": percent},
+    "injuries": {"Full Name": "Expected back ..."}
+}
+where each player dict carries the attributes sync_data reads off espn_api players.
+"""
+import json
+import random
+from types import SimpleNamespace
+
+# Key sync_data reads season totals from
+STATS_KEY = "Total 2026"
+
+SCORING = {"G": 3.0, "A": 2.0, "PPP": 1.0, "SHP": 2.0, "SOG": 0.4, "HIT": 0.2, "BLK": 0.5, "+/-": 0.5}
+
+POSITIONS = ["C", "LW", "RW", "D", "G"]
+PRO_TEAMS = ["ANA", "BOS", "BUF", "CGY", "CAR", "CHI", "COL", "CBJ", "DAL", "DET", "EDM", "FLA", "LA", "MIN",
+             "MTL", "NSH", "NJ", "NYI", "NYR", "OTT", "PHI", "PIT", "SJ", "SEA", "STL", "TB", "TOR", "UTA",
+             "VAN", "VGK", "WSH", "WPG"]
+FIRST = ["Alex", "Connor", "Jack", "Matt", "Nick", "Ryan", "Sam", "Tyler", "Will", "Zach", "Leo", "Evan",
+         "Adam", "Brady", "Cole", "Dylan", "Elias", "Filip", "Kirill", "Mikko"]
+LAST = ["Smith", "Hughes", "Tkachuk", "Nylander", "Larkin", "Point", "Stone", "Kane", "Jones", "Werenski",
+        "Hintz", "Fox", "Aho", "Makar", "Rantanen", "Necas", "Boldy", "Cooley", "Raymond", "Zegras"]
+LINEUP = ["C", "LW", "RW", "D", "D", "G", "UTIL", "BE", "BE", "IR"]
+
+# Per-game rates used to grow season totals, by position
+RATES = {
+    "C": {"G": 0.35, "A": 0.5, "PPP": 0.25, "SHP": 0.02, "SOG": 2.8, "HIT": 1.0, "BLK": 0.5},
+    "LW": {"G": 0.33, "A": 0.4, "PPP": 0.2, "SHP": 0.02, "SOG": 2.7, "HIT": 1.4, "BLK": 0.4},
+    "RW": {"G": 0.33, "A": 0.4, "PPP": 0.2, "SHP": 0.02, "SOG": 2.7, "HIT": 1.3, "BLK": 0.4},
+    "D": {"G": 0.1, "A": 0.4, "PPP": 0.15, "SHP": 0.01, "SOG": 1.9, "HIT": 1.6, "BLK": 1.8},
+    "G": {},
+}
+
+def _player(rng, pid, games, lineup_slot):
+    position = rng.choice(POSITIONS)
+    skill = rng.uniform(0.4, 1.6)
+    stats = {k: round(v * skill * games * rng.uniform(0.8, 1.2)) for k, v in RATES[position].items()}
+    stats["+/-"] = rng.randint(-15, 25) if position != "G" else 0
+    return {
+        "playerId": pid,
+        "name": f"{rng.choice(FIRST)} {rng.choice(LAST)} {pid}",
+        "position": position,
+        "proTeam": rng.choice(PRO_TEAMS),
+        "injuryStatus": rng.choice(["ACTIVE"] * 9 + ["INJURY_RESERVE"]),
+        "percentOwned": round(rng.uniform(0, 100), 1),
+        "lineupSlot": lineup_slot,
+        "skill": skill,
+        "stats": {STATS_KEY: {"total": stats}},
+    }
+
+def generate_league(teams=12, roster_size=20, free_agents=300, season_days=120, seed=42):
+    rng = random.Random(seed)
+    games = max(1, int(season_days * 0.45)) # NHL teams play a bit under every other day
+    next_id = 4000000
+    fixture = {"scoring": dict(SCORING), "teams": [], "free_agents": [], "ownership": {}, "injuries": {},
+               "season_days": season_days}
+
+    for t in range(1, teams + 1):
+        roster = []
+        for i in range(roster_size):
+            roster.append(_player(rng, next_id, games, LINEUP[i % len(LINEUP)]))
+            next_id += 1
+        totals = {}
+        for p in roster:
+            for k, v in p["stats"][STATS_KEY]["total"].items():
+                totals[k] = totals.get(k, 0) + v
+        wins = rng.randint(0, games // 3)
+        fixture["teams"].append({
+            "team_id": t,
+            "team_name": f"Synthetic Team {t}",
+            "standing": t,
+            "wins": wins,
+            "losses": games // 3 - wins,
+            "ties": 0,
+            "stats": totals,
+            "roster": roster,
+        })
+
+    for _ in range(free_agents):
+        fixture["free_agents"].append(_player(rng, next_id, games, "FA"))
+        next_id += 1
+
+    everyone = [p for t in fixture["teams"] for p in t["roster"]] + fixture["free_agents"]
+    for p in everyone:
+        fixture["ownership"][str(p["playerId"])] = p["percentOwned"]
+    for p in rng.sample(everyone, k=min(len(everyone), max(1, len(everyone) // 15))):
+        fixture["injuries"][p["name"]] = "Expected to be out until at least " + rng.choice(["Nov 1", "Dec 12", "Jan 3"])
+    return fixture
+
+def save_fixture(fixture, path):
+    with open(path, "w") as f:
+        json.dump(fixture, f)
+
+def load_fixture(path):
+    with open(path) as f:
+        return json.load(f)
+
+def _as_player(d):
+    return SimpleNamespace(**{k: v for k, v in d.items() if k != "skill"})
+
+class StubFantasyClient:
+    """
+    Serves a fixture through the FantasyClient methods sync_data uses. Each call to
+    advance() plays one more game day so consecutive syncs have real updates to write.
+    """
+    def __init__(self, fixture, seed=7):
+        self.league_id = 0
+        self.year = int(STATS_KEY.split()[-1])
+        self.fixture = fixture
+        self.rng = random.Random(seed)
+        self.league = True
+
+    def connect(self):
+        return True
+
+    def advance(self):
+        for p in [p for t in self.fixture["teams"] for p in t["roster"]] + self.fixture["free_agents"]:
+            totals = p["stats"][STATS_KEY]["total"]
+            if self.rng.random() < 0.45:
+                for k, rate in RATES[p["position"]].items():
+                    totals[k] = totals.get(k, 0) + (1 if self.rng.random() < rate * p["skill"] else 0)
+
+    def fetch_scoring_settings(self):
+        return dict(self.fixture["scoring"])
+
+    def fetch_ownership(self):
+        return {int(k): v for k, v in self.fixture["ownership"].items()}
+
+    def get_standings(self):
+        teams = []
+        for t in self.fixture["teams"]:
+            team = SimpleNamespace(**{k: v for k, v in t.items() if k != "roster"})
+            team.roster = [_as_player(p) for p in t["roster"]]
+            teams.append(team)
+        return teams
+
+    def get_free_agents(self, size=50, offset=0, player_ids=None):
+        pool = self.fixture["free_agents"]
+        if player_ids:
+            wanted = set(player_ids)
+            return [_as_player(p) for p in pool if p["playerId"] in wanted][:size]
+        return [_as_player(p) for p in pool[offset:offset + size]]
+
+def stub_injuries(fixture):
+    return lambda: dict(fixture["injuries"])
@@ -0,0 +1,182 @@
+"""
+Contract ingest and effective-dated contract history.
+
+Every salary source (PuckPedia data, CSV uploads, manual edits) goes through
+ingest(): the rows are loaded into a temporary table and applied with a handful of
+set-based statements, however many players the file covers:
+
+    1. resolve names (or ids) to players with one join
+    2. flag the rows that differ from the player's open contract
+    3. close those contracts, open new ones from `day`
+    4. copy the values onto players (and the latest snapshots) with one joined UPDATE
+
+`contracts` keeps every version with effective_from (inclusive) and effective_to
+(exclusive, NULL while current), so the cap on a past day comes from salaries_on()
+instead of whatever was copied into that day's snapshots.
+"""
+import csv
+import datetime
+import io
+import logging
+from sqlalchemy import (Table, Column, MetaData, Integer, String, Float, Boolean, Index,
+                        select, insert, update, delete, exists, func, and_, or_, literal, text)
+import models
+
+logger = logging.getLogger(__name__)
+
+# Temporary tables, created per ingest on the ingesting connection
+_temp = MetaData()
+_stage = Table(
+    "contract_stage", _temp,
+    Column("name_key", String), Column("player_id", Integer),
+    Column("salary", String), Column("salary_value", Float), Column("contract_years", String),
+    Index("ix_contract_stage_name_key", "name_key"),
+    prefixes=["TEMPORARY"],
+)
+_resolved = Table(
+    "contract_resolved", _temp,
+    Column("player_id", Integer, primary_key=True), Column("name_key", String),
+    Column("salary", String), Column("salary_value", Float), Column("contract_years", String),
+    Column("changed", Boolean),
+    prefixes=["TEMPORARY"],
+)
+
+def parse_salary(raw):
+    """'$5,000,000' -> 5000000.0; anything unreadable is 0"""
+    try:
+        return float(str(raw).replace("$", "").replace(",", "").strip())
+    except (TypeError, ValueError):
+        return 0.0
+
+def name_key(name):
+    return (name or "").strip().lower()
+
+def parse_csv(content: str):
+    """
+    Rows from a contracts CSV (or TSV, as pasted from a spreadsheet) with the columns
+    "Full Name", "Cap Hit" and "Years Left".
+    """
+    try:
+        dialect = csv.Sniffer().sniff(content.split("\n", 1)[0], delimiters=",\t;")
+    except csv.Error:
+        dialect = csv.excel
+    rows = []
+    for row in csv.DictReader(io.StringIO(content), dialect=dialect):
+        row = {k.strip(): (v or "").strip() for k, v in row.items() if k}
+        if not row.get("Full Name"):
+            continue
+        rows.append({"name": row["Full Name"], "salary": row.get("Cap Hit") or None,
+                     "salary_value": parse_salary(row.get("Cap Hit")),
+                     "contract_years": row.get("Years Left") or "0"})
+    return rows
+
+def _contract_matches(table):
+    """The player's open contract already says what `table`'s row says"""
+    c = models.Contract.__table__
+    return exists().where(
+        c.c.player_id == table.c.player_id, c.c.effective_to == None,
+        c.c.salary.is_not_distinct_from(table.c.salary),
+        c.c.salary_value.is_not_distinct_from(table.c.salary_value),
+        c.c.contract_years.is_not_distinct_from(table.c.contract_years),
+    )
+
+def ingest(conn, rows, day=None, source="import"):
+    """
+    rows: dicts with "name" (matched case-insensitively, every player with that name)
+    or "player_id", plus salary, salary_value and contract_years. A player listed both
+    by id and by name takes the id row.
+    Runs on `conn` inside the caller's transaction. Returns counts of matched players,
+    changed contracts and unmatched names.
+    """
+    day = day or datetime.datetime.utcnow().strftime('%Y-%m-%d')
+    players = models.Player.__table__
+    contracts = models.Contract.__table__
+
+    # Last row wins when a file lists someone twice
+    staged = {}
+    for row in rows:
+        key = ("id", row["player_id"]) if row.get("player_id") is not None else ("name", name_key(row.get("name")))
+        if key != ("name", ""):
+            staged[key] = row
+    if not staged:
+        return {"matched": 0, "changed": 0, "unmatched": 0}
+
+    for table in (_resolved, _stage):
+        conn.execute(text(f"DROP TABLE IF EXISTS {table.name}"))
+    _stage.create(conn)
+    _resolved.create(conn)
+    try:
+        conn.execute(insert(_stage), [
+            {"name_key": value if kind == "name" else None, "player_id": value if kind == "id" else None,
+             "salary": row.get("salary"), "salary_value": row.get("salary_value"),
+             "contract_years": row.get("contract_years")}
+            for (kind, value), row in staged.items()
+        ])
+
+        # 1. Names to players with one joined insert, then ids: a player the name already
+        #    resolved takes the id row's values, so every player has one row
+        values = [_stage.c.name_key, _stage.c.salary, _stage.c.salary_value, _stage.c.contract_years]
+        resolved_columns = ["player_id", "name_key", "salary", "salary_value", "contract_years"]
+        by_name = select(players.c.id, *values).join(_stage, func.lower(players.c.fullName) == _stage.c.name_key)
+        conn.execute(insert(_resolved).from_select(resolved_columns, by_name))
+        conn.execute(update(_resolved).values(salary=_stage.c.salary, salary_value=_stage.c.salary_value,
+                                              contract_years=_stage.c.contract_years)
+                     .where(_resolved.c.player_id == _stage.c.player_id))
+        already = exists().where(_resolved.c.player_id == players.c.id)
+        by_id = select(players.c.id, *values).join(_stage, players.c.id == _stage.c.player_id).where(~already)
+        conn.execute(insert(_resolved).from_select(resolved_columns, by_id))
+        matched = conn.execute(select(func.count()).select_from(_resolved)).scalar()
+        # Counted from the resolved rows: probing players per name would scan them once per row
+        names_found = select(func.count(_resolved.c.name_key.distinct())).scalar_subquery()
+        unmatched = conn.execute(select(func.count() - names_found).select_from(_stage)
+                                 .where(_stage.c.name_key != None)).scalar()
+
+        # 2. Which of them are new contracts
+        conn.execute(update(_resolved).values(changed=~_contract_matches(_resolved)))
+        changed_ids = select(_resolved.c.player_id).where(_resolved.c.changed == True)
+        changed = conn.execute(select(func.count()).select_from(_resolved).where(_resolved.c.changed == True)).scalar()
+
+        # 3. History: a same-day correction replaces today's version, otherwise the open one ends today
+        conn.execute(delete(contracts).where(contracts.c.effective_to == None, contracts.c.effective_from >= day,
+                                             contracts.c.player_id.in_(changed_ids)))
+        conn.execute(update(contracts).values(effective_to=day).where(
+            contracts.c.effective_to == None, contracts.c.player_id.in_(changed_ids)))
+        conn.execute(insert(contracts).from_select(
+            ["player_id", "salary", "salary_value", "contract_years", "effective_from", "source", "created_at"],
+            select(_resolved.c.player_id, *[_resolved.c[c] for c in ("salary", "salary_value", "contract_years")],
+                   literal(day), literal(source), literal(datetime.datetime.utcnow()))
+            .where(_resolved.c.changed == True)))
+
+        # 4. Current values on players, and on the latest snapshots like before
+        differs = or_(players.c.salary.is_distinct_from(_resolved.c.salary),
+                      players.c.salary_value.is_distinct_from(_resolved.c.salary_value),
+                      players.c.contract_years.is_distinct_from(_resolved.c.contract_years))
+        conn.execute(update(players).values(salary=_resolved.c.salary, salary_value=_resolved.c.salary_value,
+                                            contract_years=_resolved.c.contract_years)
+                     .where(players.c.id == _resolved.c.player_id, differs))
+        snapshots = models.PlayerSnapshot.__table__
+        latest_day = conn.execute(select(func.max(snapshots.c.day))).scalar()
+        if latest_day:
+            conn.execute(update(snapshots).values(salary=_resolved.c.salary, salary_value=_resolved.c.salary_value,
+                                                  contract_years=_resolved.c.contract_years)
+                         .where(snapshots.c.player_id == _resolved.c.player_id, snapshots.c.day == latest_day))
+    finally:
+        for table in (_resolved, _stage):
+            conn.execute(text(f"DROP TABLE IF EXISTS {table.name}"))
+
+    logger.info(f"Contract ingest ({source}): {matched} players matched, {changed} contracts changed, "
+                f"{unmatched} names not found")
+    return {"matched": matched, "changed": changed, "unmatched": unmatched}
+
+def as_of(day):
+    """Where clause for the contracts in effect on `day` (YYYY-MM-DD)"""
+    c = models.Contract.__table__
+    return and_(c.c.effective_from <= day, or_(c.c.effective_to == None, c.c.effective_to > day))
+
+def salaries_on(conn, day, player_ids=None):
+    """{player_id: salary_value} from the contracts in effect on `day`"""
+    c = models.Contract.__table__
+    query = select(c.c.player_id, c.c.salary_value).where(as_of(day))
+    if player_ids is not None:
+        query = query.where(c.c.player_id.in_(list(player_ids)))
+    return {pid: value or 0.0 for pid, value in conn.execute(query)}
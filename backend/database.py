@@ -1,17 +1,53 @@
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./fantasy_pool.db")
 
+# Pool tuning for Postgres (ignored for SQLite). Recycle connections before
+# idle timeouts on the server/proxy side kill them under us.
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800)) # seconds
+POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 10)) # seconds to wait for a free connection
+
+def _async_url(url):
+    """Maps the sync DATABASE_URL onto its async driver (asyncpg / aiosqlite)"""
+    if url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+    if url.startswith("postgresql://") or url.startswith("postgresql+psycopg2://"):
+        return "postgresql+asyncpg://" + url.split("://", 1)[1]
+    if url.startswith("sqlite:///"):
+        return "sqlite+aiosqlite:///" + url.split(":///", 1)[1]
+    return url
+
 if DATABASE_URL.startswith("sqlite"):
     engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+    async_engine = create_async_engine(_async_url(DATABASE_URL))
 else:
-    engine = create_engine(DATABASE_URL)
+    pool_args = dict(
+        pool_size=POOL_SIZE,
+        max_overflow=MAX_OVERFLOW,
+        pool_recycle=POOL_RECYCLE,
+        pool_timeout=POOL_TIMEOUT,
+        pool_pre_ping=True,
+    )
+    engine = create_engine(DATABASE_URL, **pool_args)
+    async_engine = create_async_engine(_async_url(DATABASE_URL), **pool_args)
+# The sync's bulk upserts use ON CONFLICT, which only these two speak the same way
+SUPPORTED_DIALECTS = ("postgresql", "sqlite")
+if engine.dialect.name not in SUPPORTED_DIALECTS:
+    raise RuntimeError(f"Unsupported database '{engine.dialect.name}', use PostgreSQL or SQLite")
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Read endpoints use async sessions. Objects stay usable after commit since
+# lazy loads aren't possible outside the event loop anyway.
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -20,3 +56,7 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,8 +1,7 @@
-from espn_api.hockey import League
-import requests
 import json
 import os
 import logging
+import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -13,9 +12,16 @@ class FantasyClient:
         self.swid = swid or os.getenv("SWID")
         self.espn_s2 = espn_s2 or os.getenv("ESPN_S2")
         self.league = None
+        # Last good responses, reused when ESPN is slow or down so a sync degrades instead of failing
+        self._scoring_map = {}
+        self._ownership_map = {}
 
     def connect(self):
         try:
+            # espn_api is only needed once we actually talk to ESPN, keep it off the startup path.
+            # Its own requests go through the shared client too (timeouts, retries, breaker).
+            from espn_api.hockey import League
+            http_client.patch_espn_api()
             self.league = League(
                 league_id=self.league_id,
                 year=self.year,
@@ -28,9 +34,25 @@ class FantasyClient:
             logger.error(f"Failed to connect to ESPN League: {e}")
             return False
 
-    def get_free_agents(self, size=50):
+    def get_free_agents(self, size=50, offset=0, player_ids=None):
+        """
+        One page of free agents (and players on waivers), most owned first, or just the
+        given players. Same request as League.free_agents, which has no offset or id filter.
+        """
         if not self.league: self.connect()
-        return self.league.free_agents(size=size)
+        from espn_api.hockey.player import Player
+        # Key order as in League.free_agents so the first page matches archived payloads
+        players = {"filterStatus": {"value": ["FREEAGENT", "WAIVERS"]}, "filterSlotIds": {"value": []},
+                   "limit": size, "sortPercOwned": {"sortPriority": 1, "sortAsc": False},
+                   "sortDraftRanks": {"sortPriority": 100, "sortAsc": True, "value": "STANDARD"}}
+        if offset:
+            players["offset"] = offset
+        if player_ids:
+            players["filterIds"] = {"value": list(player_ids)}
+        params = {"view": "kona_player_info", "scoringPeriodId": self.league.current_week}
+        headers = {"x-fantasy-filter": json.dumps({"players": players})}
+        data = self.league.espn_request.league_get(params=params, headers=headers)
+        return [Player(p) for p in data.get("players", [])]
 
     def get_standings(self):
         if not self.league: self.connect()
@@ -52,7 +74,7 @@ class FantasyClient:
         try:
             url = f"https://lm-api-reads.fantasy.espn.com/apis/v3/games/fhl/seasons/{self.year}/segments/0/leagues/{self.league_id}?view=mSettings"
             cookies = {"swid": self.swid, "espn_s2": self.espn_s2}
-            resp = requests.get(url, cookies=cookies)
+            resp = http_client.get(url, cookies=cookies)
             resp.raise_for_status()
             data = resp.json()
             
@@ -76,10 +98,16 @@ class FantasyClient:
                         scoring_map[ID_MAP[stat_id]] = points
                         
             logger.info(f"Fetched scoring settings: {scoring_map}")
+            if scoring_map:
+                self._scoring_map = scoring_map
             return scoring_map
+        except http_client.MissingPayload:
+            raise
         except Exception as e:
             logger.error(f"Error fetching scoring settings: {e}")
-            return {}
+            if self._scoring_map:
+                logger.warning("Using last known scoring settings")
+            return dict(self._scoring_map)
 
     def fetch_ownership(self):
         """
@@ -95,7 +123,7 @@ class FantasyClient:
             headers = {"x-fantasy-filter": json.dumps(filter_obj)}
             
             cookies = {"swid": self.swid, "espn_s2": self.espn_s2}
-            resp = requests.get(url, cookies=cookies, headers=headers)
+            resp = http_client.get(url, cookies=cookies, headers=headers)
             resp.raise_for_status()
             data = resp.json()
             
@@ -111,7 +139,13 @@ class FantasyClient:
                     ownership_map[pid] = percent
             
             logger.info(f"Fetched ownership data for {len(ownership_map)} players")
+            if ownership_map:
+                self._ownership_map = ownership_map
             return ownership_map
+        except http_client.MissingPayload:
+            raise
         except Exception as e:
             logger.error(f"Error fetching ownership: {e}")
-            return {}
+            if self._ownership_map:
+                logger.warning("Using last known ownership data")
+            return dict(self._ownership_map)
@@ -0,0 +1,148 @@
+"""
+Free agent pool coverage on a rotation.
+
+A sync can't afford to pull the whole waiver pool every few minutes, so each one makes
+at most FA_SYNC_REQUESTS requests of FA_PAGE_SIZE players:
+
+    1. the first FA_HOT_PAGES pages by ownership, every sync
+    2. one request by id for the free agents that most need it: dropped since we last
+       saw them, ownership moved by FA_MOVER_DELTA points or more (from the ownership
+       map every sync fetches anyway), then anyone not refreshed for FA_MAX_AGE_MINUTES,
+       most owned first
+    3. the rest of the budget walks the tail from a cursor kept in app_settings, which
+       wraps back to the first page after the hot ones when the pool runs out
+
+players.last_updated is the per-player freshness: the sync writes it whenever it sees
+a player. Pages are ordered by ownership, which shifts between syncs, so a player can
+slip past the cursor; step 2 picks those up once they go stale.
+
+A request that fails is logged and skipped: the sync publishes what it got, and a
+failed page is retried next time since the cursor only moves past pages that loaded.
+
+Which tail offset a sync started from and which ids it asked for depend on the
+database at the time, so they go into the payload archive's manifest (`plan`);
+replay asks for exactly those instead of working them out again.
+"""
+import datetime
+import json
+import logging
+import os
+from sqlalchemy import select, exists
+import http_client
+import models
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = int(os.getenv("FA_PAGE_SIZE", 50))
+MAX_REQUESTS = int(os.getenv("FA_SYNC_REQUESTS", 4)) # per sync, hot pages included
+HOT_PAGES = int(os.getenv("FA_HOT_PAGES", 1))
+MAX_AGE_MINUTES = float(os.getenv("FA_MAX_AGE_MINUTES", 360))
+MOVER_DELTA = float(os.getenv("FA_MOVER_DELTA", 1.0)) # ownership percentage points
+STATE_KEY = "fa_rotation"
+
+def load_state(db):
+    """Rotation cursor: {"offset", "passes", "pool_size"}"""
+    state = {"offset": HOT_PAGES * PAGE_SIZE, "passes": 0, "pool_size": None}
+    row = db.query(models.AppSetting).filter(models.AppSetting.key == STATE_KEY).first()
+    try:
+        state.update(json.loads(row.value) if row else {})
+    except (TypeError, ValueError):
+        pass
+    # Page settings changed since it was saved: start the tail over
+    if state["offset"] < HOT_PAGES * PAGE_SIZE or state["offset"] % PAGE_SIZE:
+        state["offset"] = HOT_PAGES * PAGE_SIZE
+    return state
+
+def save_state(db, state):
+    """Staged on `db`, committed with the sync that advanced it"""
+    row = db.query(models.AppSetting).filter(models.AppSetting.key == STATE_KEY).first()
+    if not row:
+        row = models.AppSetting(key=STATE_KEY)
+        db.add(row)
+    row.value = json.dumps(state)
+
+def priority_ids(db, ownership_map, now, exclude=(), limit=PAGE_SIZE):
+    """Free agents to refresh by id, most urgent first (see module docstring, step 2)"""
+    P, T = models.Player, models.RosterTransaction
+    dropped = exists().where(T.player_id == P.id, T.to_team_id == None, T.created_at > P.last_updated)
+    rows = db.execute(select(P.id, P.ownership, P.last_updated, dropped.label("dropped"))
+                      .where(P.team_id == None)).all()
+
+    stale_before = now - datetime.timedelta(minutes=MAX_AGE_MINUTES)
+    ranked = []
+    for r in rows:
+        if r.id in exclude:
+            continue
+        owned = r.ownership or 0.0
+        if r.dropped:
+            tier = 0
+        elif r.id in ownership_map and abs((ownership_map[r.id] or 0.0) - owned) >= MOVER_DELTA:
+            tier = 1
+        elif r.last_updated is None or r.last_updated < stale_before:
+            tier = 2
+        else:
+            continue
+        ranked.append((tier, -owned, r.id))
+    ranked.sort()
+    return [pid for _, _, pid in ranked[:limit]]
+
+def fetch(client, db, ownership_map, now, plan=None):
+    """
+    Makes this sync's free agent requests. Returns (players, state); `state` is the
+    advanced rotation for save_state().
+    plan: {"offset", "ids"} to use instead of the cursor and priority_ids(); whatever
+    it doesn't have is worked out and filled in.
+    """
+    state = load_state(db)
+    plan = {} if plan is None else plan
+    state["offset"] = plan.setdefault("offset", state["offset"])
+    players, budget = [], MAX_REQUESTS
+
+    def request(**kwargs):
+        nonlocal budget
+        budget -= 1
+        try:
+            return client.get_free_agents(size=PAGE_SIZE, **kwargs)
+        except http_client.MissingPayload:
+            raise # replaying a sync the archive doesn't fully cover
+        except Exception as e:
+            logger.error(f"Free agent request {kwargs} failed, skipping it: {e}")
+            return None
+
+    pool_ended = False
+    for page in range(min(HOT_PAGES, budget)):
+        got = request(offset=page * PAGE_SIZE) or []
+        players += got
+        if got and len(got) < PAGE_SIZE:
+            pool_ended = True # the hot pages are the whole pool, there's no tail
+            break
+
+    if budget > 0:
+        if "ids" not in plan:
+            try:
+                plan["ids"] = priority_ids(db, ownership_map, now, exclude={p.playerId for p in players})
+            except Exception as e:
+                logger.error(f"Could not rank free agents to refresh: {e}")
+                plan["ids"] = []
+        ids = plan["ids"]
+        if ids:
+            players += request(player_ids=ids) or []
+
+    tail_pages = 0
+    while budget > 0 and not pool_ended:
+        got = request(offset=state["offset"])
+        if got is None:
+            break
+        players += got
+        tail_pages += 1
+        if len(got) < PAGE_SIZE:
+            # End of the pool: the next sync starts the tail over
+            state["pool_size"] = state["offset"] + len(got)
+            state["offset"] = HOT_PAGES * PAGE_SIZE
+            state["passes"] += 1
+            break
+        state["offset"] += PAGE_SIZE
+
+    logger.info(f"Fetched {len(players)} free agents ({tail_pages} tail pages, next offset {state['offset']}, "
+                f"pool size {state['pool_size']})")
+    return players, state
@@ -0,0 +1,244 @@
+"""
+Shared HTTP client for every outbound call (ESPN, CBS, NHL schedule).
+
+One pooled keep-alive client (HTTP/2 when the h2 package is installed) with bounded
+timeouts, jittered retries and a per-host circuit breaker, so a slow or dead source
+fails fast instead of stalling the scheduler thread. Per-host counters are exposed
+through stats() for /api/metrics/http.
+"""
+import logging
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit, urlencode
+
+logger = logging.getLogger(__name__)
+
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 5))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", 20))
+# Upper bound for one call including all retries
+TOTAL_BUDGET = float(os.getenv("HTTP_TOTAL_BUDGET", 45))
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", 2))
+BACKOFF_BASE = 0.5 # seconds
+BACKOFF_CAP = 4.0
+BREAKER_THRESHOLD = int(os.getenv("HTTP_BREAKER_THRESHOLD", 5)) # consecutive failures before opening
+BREAKER_COOLDOWN = float(os.getenv("HTTP_BREAKER_COOLDOWN", 60)) # seconds before a trial request
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class CircuitOpenError(Exception):
+    """Raised without touching the network while a host's breaker is open"""
+
+class MissingPayload(KeyError):
+    """
+    A replayed sync asked for a request that wasn't recorded. Sources that fall back to
+    cached or empty data when a request fails must re-raise this one: a replay that
+    quietly publishes different inputs is worse than one that stops.
+    """
+
+class _HostState:
+    def __init__(self):
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.requests = 0
+        self.failures = 0
+        self.retries = 0
+        self.short_circuited = 0
+        self.bytes = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def as_dict(self):
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "retries": self.retries,
+            "short_circuited": self.short_circuited,
+            "bytes": self.bytes,
+            "avg_latency_ms": round(self.latency_total / self.requests * 1000, 1) if self.requests else None,
+            "max_latency_ms": round(self.latency_max * 1000, 1),
+            "circuit": "open" if self.opened_at else "closed",
+        }
+
+def _http2_available():
+    try:
+        import h2 # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+_client = None
+_client_lock = threading.Lock()
+_hosts = {}
+_hosts_lock = threading.Lock()
+
+# Per-thread record/replay hooks, installed by payload_archive around a sync
+_local = threading.local()
+
+def request_key(url, params=None, headers=None):
+    """
+    Stable identity of a GET for record/replay: URL, sorted params and the ESPN filter
+    header (which changes the response). Cookies and other headers are left out.
+    """
+    items = []
+    for k, v in sorted((params or {}).items()):
+        for item in (v if isinstance(v, (list, tuple)) else [v]):
+            items.append((k, item))
+    key = url + ("?" + urlencode(items) if items else "")
+    fantasy_filter = (headers or {}).get("x-fantasy-filter")
+    return key + ("|" + fantasy_filter if fantasy_filter else "")
+
+def set_hooks(recorder=None, replayer=None):
+    """
+    recorder(key, status, body, error=None) sees every call's outcome: the final response,
+    or the exception (transport error, open circuit) it ended with, status and body None.
+    replayer(key) -> (status, body, error) serves them back, error being (class name, message).
+    """
+    _local.recorder = recorder
+    _local.replayer = replayer
+
+def _record(key, status=None, body=None, error=None):
+    recorder = getattr(_local, "recorder", None)
+    if recorder is not None:
+        recorder(key, status, body, error)
+
+def _replayed_error(name, message, url):
+    """The exception a recorded call ended with, rebuilt from its class name"""
+    import httpx
+    if name == CircuitOpenError.__name__:
+        return CircuitOpenError(message)
+    cls = getattr(httpx, name, None)
+    if not (isinstance(cls, type) and issubclass(cls, httpx.TransportError)):
+        cls = httpx.TransportError
+    return cls(message, request=httpx.Request("GET", url))
+
+def client():
+    # httpx is imported on first use so it stays off the app's startup path
+    import httpx
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = httpx.Client(
+                http2=_http2_available(),
+                timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60),
+                follow_redirects=True,
+            )
+        return _client
+
+def _host(url):
+    host = urlsplit(url).netloc
+    with _hosts_lock:
+        if host not in _hosts:
+            _hosts[host] = _HostState()
+        return _hosts[host]
+
+def _backoff(attempt):
+    # Full jitter: spread retries out so several callers don't retry in lockstep
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+def _check_breaker(state, url):
+    if state.opened_at is None:
+        return
+    if time.monotonic() - state.opened_at < BREAKER_COOLDOWN:
+        state.short_circuited += 1
+        raise CircuitOpenError(f"Circuit open for {urlsplit(url).netloc}, skipping request")
+    # Cooldown over: let this request through as the trial, reopen if it fails
+    state.opened_at = None
+    state.consecutive_failures = BREAKER_THRESHOLD - 1
+
+def _record_failure(state, url):
+    state.failures += 1
+    state.consecutive_failures += 1
+    if state.consecutive_failures >= BREAKER_THRESHOLD and state.opened_at is None:
+        state.opened_at = time.monotonic()
+        logger.warning(f"Opening circuit for {urlsplit(url).netloc} after {state.consecutive_failures} failures")
+
+def get(url, params=None, headers=None, cookies=None, timeout=None):
+    """
+    GET with retries on connection errors, timeouts, 429 and 5xx.
+    Returns the httpx.Response (callers use raise_for_status/json/text as with requests).
+    Raises CircuitOpenError or httpx.HTTPError once retries or the time budget run out.
+    """
+    import httpx
+    key = request_key(url, params, headers)
+    replayer = getattr(_local, "replayer", None)
+    if replayer is not None:
+        status, body, error = replayer(key)
+        if error is not None:
+            raise _replayed_error(*error, url)
+        return httpx.Response(status, content=body, request=httpx.Request("GET", url))
+
+    state = _host(url)
+    try:
+        _check_breaker(state, url)
+    except CircuitOpenError as e:
+        _record(key, error=e)
+        raise
+
+    headers = dict(headers or {})
+    if cookies:
+        cookie_header = "; ".join(f"{k}={v}" for k, v in cookies.items() if v is not None)
+        if cookie_header:
+            headers["Cookie"] = cookie_header
+
+    deadline = time.monotonic() + TOTAL_BUDGET
+    attempt = 0
+    while True:
+        started = time.monotonic()
+        state.requests += 1
+        error = None
+        try:
+            resp = client().get(url, params=params, headers=headers, timeout=timeout or httpx.USE_CLIENT_DEFAULT)
+        except httpx.TransportError as e:
+            resp, error = None, e
+
+        elapsed = time.monotonic() - started
+        state.latency_total += elapsed
+        state.latency_max = max(state.latency_max, elapsed)
+
+        if resp is not None and resp.status_code not in RETRY_STATUSES:
+            state.bytes += len(resp.content)
+            state.consecutive_failures = 0
+            _record(key, resp.status_code, resp.content)
+            return resp
+
+        _record_failure(state, url)
+        wait = _backoff(attempt)
+        if attempt >= MAX_RETRIES or state.opened_at is not None or time.monotonic() + wait >= deadline:
+            if error is not None:
+                _record(key, error=error)
+                raise error
+            _record(key, resp.status_code, resp.content)
+            return resp
+        attempt += 1
+        state.retries += 1
+        logger.info(f"Retrying {urlsplit(url).netloc} in {wait:.2f}s ({error or resp.status_code})")
+        time.sleep(wait)
+
+def stats():
+    with _hosts_lock:
+        return {host: state.as_dict() for host, state in _hosts.items()}
+
+class _RequestsShim:
+    """Just enough of the `requests` module API for espn_api, routed through get()"""
+    def get(self, url, params=None, headers=None, cookies=None, **kwargs):
+        return get(url, params=params, headers=headers, cookies=cookies)
+
+_patched = False
+
+def patch_espn_api():
+    """
+    espn_api calls requests.get with no timeout or session. Point it at the shared
+    client so league loads get the same pooling, timeouts and circuit breaker.
+    """
+    global _patched
+    if _patched:
+        return
+    try:
+        from espn_api.requests import espn_requests
+    except ImportError:
+        return
+    espn_requests.requests = _RequestsShim()
+    _patched = True
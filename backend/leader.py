@@ -0,0 +1,141 @@
+import fcntl
+import logging
+import os
+import tempfile
+import threading
+import zlib
+from sqlalchemy import text
+from database import engine, DATABASE_URL
+
+logger = logging.getLogger(__name__)
+
+def _lock_file_path(name):
+    """Lock files sit next to the SQLite database so every worker sharing it agrees on the path"""
+    base = os.getenv("LEADER_LOCK_DIR")
+    if not base:
+        db_path = DATABASE_URL.split("///", 1)[-1] if "///" in DATABASE_URL else ""
+        base = os.path.dirname(os.path.abspath(db_path)) if db_path and db_path != ":memory:" else tempfile.gettempdir()
+    return os.path.join(base, f"puckintel.{name}.lock")
+
+class ProcessLock:
+    """
+    Non-blocking lock shared by every worker process using the same database.
+    Postgres: a session level advisory lock held on a dedicated connection.
+    SQLite: an flock() on a lock file next to the database file.
+    The lock is released when release() is called or the process dies.
+    """
+    def __init__(self, name):
+        self.name = name
+        # Advisory locks take a bigint key; derive a stable one from the name
+        self.key = zlib.crc32(f"puckintel:{name}".encode())
+        self._conn = None
+        self._fd = None
+        self._guard = threading.Lock()
+
+    @property
+    def held(self):
+        return self._conn is not None or self._fd is not None
+
+    def try_acquire(self):
+        with self._guard:
+            if self.held:
+                return False
+            try:
+                if engine.dialect.name == "postgresql":
+                    return self._acquire_pg()
+                return self._acquire_file()
+            except Exception as e:
+                logger.error(f"Error acquiring {self.name} lock: {e}")
+                return False
+
+    def _acquire_pg(self):
+        conn = engine.connect()
+        got = conn.execute(text("SELECT pg_try_advisory_lock(:k)"), {"k": self.key}).scalar()
+        # Don't leave the connection idle in a transaction while we hold the lock
+        conn.commit()
+        if not got:
+            conn.close()
+            return False
+        self._conn = conn
+        return True
+
+    def _acquire_file(self):
+        fd = os.open(_lock_file_path(self.name), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def alive(self):
+        """
+        Whether a held lock is still ours. A Postgres advisory lock goes away with its
+        connection, server side, without anything here noticing; a file lock can't be lost.
+        """
+        with self._guard:
+            if self._conn is None:
+                return self._fd is not None
+            try:
+                # A bigint key shows up in pg_locks as classid (high half) / objid (low half)
+                held = self._conn.execute(text(
+                    "SELECT count(*) FROM pg_locks WHERE locktype = 'advisory' AND granted "
+                    "AND pid = pg_backend_pid() AND classid = 0 AND objid = :k AND objsubid = 1"
+                ), {"k": self.key}).scalar()
+                self._conn.commit()
+                return bool(held)
+            except Exception as e:
+                logger.error(f"Lost the connection holding the {self.name} lock: {e}")
+                return False
+
+    def release(self):
+        with self._guard:
+            try:
+                if self._conn is not None:
+                    self._conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": self.key})
+                    self._conn.commit()
+                if self._fd is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+                    os.close(self._fd)
+            except Exception as e:
+                logger.error(f"Error releasing {self.name} lock: {e}")
+            finally:
+                if self._conn is not None:
+                    try:
+                        self._conn.close()
+                    except Exception:
+                        pass
+                self._conn = None
+                self._fd = None
+
+def watch(lock, on_acquired, on_lost=None, interval=30):
+    """
+    Checks `lock` every `interval` seconds in a daemon thread. While another process
+    holds it we keep trying and call `on_acquired` once it is ours, so a follower takes
+    over when the leader goes away. While we hold it we make sure it is still ours and
+    call `on_lost` (then go back to trying) if it isn't, so two workers never both lead.
+    """
+    stop = threading.Event()
+
+    def _run():
+        while not stop.wait(interval):
+            if lock.held:
+                if lock.alive():
+                    continue
+                logger.warning(f"{lock.name} lock was lost, stepping down")
+                lock.release()
+                if on_lost:
+                    try:
+                        on_lost()
+                    except Exception as e:
+                        logger.error(f"Error stepping down from {lock.name}: {e}")
+            elif lock.try_acquire():
+                logger.info(f"Acquired {lock.name} lock, taking over")
+                try:
+                    on_acquired()
+                except Exception as e:
+                    logger.error(f"Error taking over {lock.name}: {e}")
+
+    threading.Thread(target=_run, name=f"{lock.name}-lock-watch", daemon=True).start()
+    return stop
@@ -1,23 +1,59 @@
+import time
+# Import-to-ready is reported by /api/ready
+_STARTED = time.perf_counter()
+
 from fastapi import FastAPI, Depends, HTTPException, File, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from fastapi import Request
+from fastapi import BackgroundTasks
+import orjson
 from sqlalchemy.orm import Session
-from sqlalchemy import text, func
-from apscheduler.schedulers.background import BackgroundScheduler
-import uvicorn
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text, func, select, or_
 import logging
 import os
 import datetime
+import threading
+from contextlib import contextmanager
+from typing import Optional, List
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from database import engine, get_db, Base
+from database import engine, get_db, get_async_db, SessionLocal
 import models
+import app_state
+import nhl_schedule
+import leader
+import migrations
+import http_client
+import staged_sync
+import payload_archive
+import schemas
+from schemas import columns, rows_to_dicts
+from response_cache import data_cache, roster_cache
+from sync_events import broadcaster
 from fantasy_client import FantasyClient
 from scrapers import fetch_cbs_injuries
 import sync_csv
-
-app = FastAPI(title="Fantasy NHL Pool Manager")
+import contracts
+import roster_diff
+import stat_registry
+import player_search
+import trade_analysis
+
+app = FastAPI(title="Fantasy NHL Pool Manager", default_response_class=ORJSONResponse)
+
+# Compression for anything over ~1KB. Brotli when brotli-asgi is installed
+# (falling back to gzip for clients that don't accept br), plain gzip otherwise.
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+try:
+    from brotli_asgi import BrotliMiddleware
+    app.add_middleware(BrotliMiddleware, minimum_size=COMPRESSION_MIN_SIZE, quality=4, gzip_fallback=True)
+except ImportError:
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
 
 # CORS
 app.add_middleware(
@@ -31,131 +67,30 @@ app.add_middleware(
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def ensure_schema_updates():
-    """Run manual schema updates for columns added after initial creation"""
-    from sqlalchemy import text
-    try:
-        with engine.connect() as conn:
-            conn.execute(text("ALTER TABLE players ADD COLUMN IF NOT EXISTS lineup_slot VARCHAR"))
-            conn.execute(text("ALTER TABLE player_snapshots ADD COLUMN IF NOT EXISTS lineup_slot VARCHAR"))
-            
-            # Salary Support
-            conn.execute(text("ALTER TABLE players ADD COLUMN IF NOT EXISTS salary VARCHAR"))
-            conn.execute(text("ALTER TABLE players ADD COLUMN IF NOT EXISTS salary_value FLOAT"))
-            conn.execute(text("ALTER TABLE players ADD COLUMN IF NOT EXISTS contract_years VARCHAR"))
-            
-            conn.execute(text("ALTER TABLE player_snapshots ADD COLUMN IF NOT EXISTS salary VARCHAR"))
-            conn.execute(text("ALTER TABLE player_snapshots ADD COLUMN IF NOT EXISTS salary_value FLOAT"))
-            conn.execute(text("ALTER TABLE player_snapshots ADD COLUMN IF NOT EXISTS contract_years VARCHAR"))
-            
-            conn.commit()
-            logger.info("Schema updates checked/applied")
-    except Exception as e:
-        logger.error(f"Error checking schema updates: {e}")
-
-# Create tables
-Base.metadata.create_all(bind=engine)
-ensure_schema_updates()
+# Cross-worker locks: one scheduler per deployment, one sync at a time
+scheduler_lock = leader.ProcessLock("scheduler")
+sync_lock = leader.ProcessLock("sync")
 
-# Scheduler
-scheduler = BackgroundScheduler()
+# Scheduler, only created in the worker that wins the scheduler lock (see _become_leader)
+scheduler = None
 fantasy_client = FantasyClient()
 
-def _upsert_player(db, p, scoring_map, injury_map={}, ownership_map={}, team_id=None):
-    try:
-        db_p = db.query(models.Player).filter(models.Player.id == p.playerId).first()
-        if not db_p:
-            db_p = models.Player(id=p.playerId)
-            db.add(db_p)
-            db.flush()
-        
-        db_p.fullName = p.name
-        db_p.position = p.position 
-        db_p.proTeam = p.proTeam
-        db_p.status = p.injuryStatus
-        db_p.injury_detail = injury_map.get(p.name)
-        # Use map if available, fallback to getattr
-        db_p.ownership = ownership_map.get(p.playerId, getattr(p, 'percentOwned', 0))
-        db_p.team_id = team_id
-        db_p.lineup_slot = getattr(p, 'lineupSlot', 'BE') # Default to bench if not found, though usually 'BE' is explicit
-        
-        # Extract stats
-        current_year = 2026 
-        stats_key = f'Total {current_year}'
-        
-        stats_dict = {}
-        if hasattr(p, 'stats') and stats_key in p.stats:
-             if 'total' in p.stats[stats_key]:
-                 stats_dict = p.stats[stats_key]['total']
-        
-        # Populate Granular Stats
-        db_p.goals = stats_dict.get('G', 0)
-        db_p.assists = stats_dict.get('A', 0)
-        db_p.ppp = stats_dict.get('PPP', 0)
-        db_p.shp = stats_dict.get('SHP', 0)
-        db_p.sog = stats_dict.get('SOG', 0)
-        db_p.hits = stats_dict.get('HIT', 0)
-        # BLK Fix: Check for both 'BLK' (mapped) and '32' (raw ID)
-        db_p.blocks = stats_dict.get('BLK', stats_dict.get('32', 0))
-        db_p.plus_minus = stats_dict.get('+/-', 0)
-
-        # Fantasy Points: Calculate dynamically based on league settings
-        calculated_points = 0.0
-        
-        # Map DB fields/keys to scoring_map keys
-        # scoring_map has keys like 'G', 'A', 'PPP' etc
-        
-        # Iterate over known scoring categories
-        # Note: double dipping (e.g. G counts as G and PPP?) usually depends on league settings.
-        # Typically in ESPN Points leagues: G=3, PPP=1. A Powerplay goal gets 3+1=4? 
-        # Usually stats are separate. PPP is "Power Play Points", so yes it adds on top.
-        
-        for key, points_per_stat in scoring_map.items():
-            val = stats_dict.get(key, 0)
-            calculated_points += (val * points_per_stat)
-            
-        # Fallback if map is empty (though it shouldn't be)
-        if not scoring_map:
-             calculated_points = stats_dict.get('16', db_p.goals + db_p.assists)
-
-        db_p.total_points = calculated_points
-        db_p.last_updated = datetime.datetime.utcnow()
-
-        # Daily Snapshot
-        today_str = datetime.datetime.utcnow().strftime('%Y-%m-%d')
-        snap = db.query(models.PlayerSnapshot).filter(
-            models.PlayerSnapshot.player_id == db_p.id,
-            models.PlayerSnapshot.day == today_str
-        ).first()
-
-        if not snap:
-            snap = models.PlayerSnapshot(player_id=db_p.id, day=today_str)
-            db.add(snap)
-        
-        snap.date = datetime.datetime.utcnow()
-        snap.lineup_slot = db_p.lineup_slot
-        snap.total_points = db_p.total_points
-        snap.goals = db_p.goals
-        snap.assists = db_p.assists
-        snap.ppp = db_p.ppp
-        snap.shp = db_p.shp
-        snap.sog = db_p.sog
-        snap.hits = db_p.hits
-        snap.blocks = db_p.blocks
-        snap.plus_minus = db_p.plus_minus
-        snap.salary = db_p.salary
-        snap.salary_value = db_p.salary_value
-        snap.contract_years = db_p.contract_years
-
-    except Exception as e:
-        logger.error(f"Error upserting player {p.name}: {e}")
-
-# Global Settings State
-LEAGUE_SETTINGS = {
-    "score_sync_interval": 5, # minutes
-    "salary_sync_frequency": "weekly", # weekly or manual
-    "salary_cap": 72.0 # Million USD
-}
+# Global Settings State (loaded from the database on startup)
+LEAGUE_SETTINGS = dict(app_state.DEFAULT_SETTINGS)
+
+def _scheduler_running():
+    return scheduler is not None and scheduler.running
+
+def _create_scheduler():
+    # apscheduler is only imported by the worker that runs jobs.
+    # Jobs live in the database so a restart keeps their next run time instead of
+    # starting from scratch. Missed runs are coalesced into a single catch-up run.
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+    return BackgroundScheduler(
+        jobstores={"default": SQLAlchemyJobStore(engine=engine)},
+        job_defaults={"coalesce": True, "max_instances": 1, "misfire_grace_time": 300},
+    )
 
 def sync_salaries():
     """Wrapper for salary sync using app engine"""
@@ -167,195 +102,526 @@ def sync_salaries():
     except Exception as e:
         logger.error(f"Salary sync failed: {e}")
 
+SKIPPED_SYNC_RETRY = datetime.timedelta(minutes=1)
+
 def sync_data():
+    # Only one sync at a time across all workers, whether scheduled or triggered via /api/sync
+    if not sync_lock.try_acquire():
+        logger.info("A sync is already running in another worker, skipping")
+        # The worker holding the lock may have no scheduler (a manual sync), so plan the next
+        # run from here; not straight away, or the job would keep bouncing off the lock
+        _replan_sync(not_before=datetime.datetime.now(datetime.timezone.utc) + SKIPPED_SYNC_RETRY)
+        return
+
     logger.info("Starting background sync...")
-    if not fantasy_client.connect():
-        logger.warning("Could not connect to ESPN API. Check credentials.")
+    # Run bookkeeping uses its own session so it survives a rollback of the sync itself
+    run_db = SessionLocal()
+    try:
+        run_id = app_state.start_sync_run(run_db)
+        error, summary = _sync_data()
+        if error is None:
+            # Before the run is finished: clients refetch as soon as they get its summary
+            try:
+                data_cache.invalidate(run_db)
+                # Trade searches hold until someone actually changes teams
+                if summary and summary.get("moves"):
+                    roster_cache.invalidate(run_db)
+                player_search.index.refresh(run_db)
+            except Exception as e:
+                run_db.rollback()
+                logger.error(f"Could not refresh caches after sync: {e}")
+        # The summary is what /api/events clients receive (sync_events polls for it)
+        app_state.finish_sync_run(run_db, run_id, error, summary)
+    finally:
+        run_db.close()
+        sync_lock.release()
+        # In adaptive mode each sync plans the next one, whatever happened to it
+        _replan_sync()
+
+def _replan_sync(not_before=None):
+    if LEAGUE_SETTINGS['sync_mode'] != 'adaptive' or not _scheduler_running():
         return
+    try:
+        schedule_sync_job(not_before=not_before)
+    except Exception as e:
+        logger.error(f"Failed to plan next adaptive sync: {e}")
+
+# Wall time in seconds per phase of the most recent sync (logged, and read by the benchmarks)
+LAST_SYNC_TIMINGS = {}
 
-    db = next(get_db())
+@contextmanager
+def _timed(phase):
+    start = time.perf_counter()
     try:
-        # Fetch Scoring Settings
-        scoring_map = fantasy_client.fetch_scoring_settings()
-        
-        # Sync Teams and Rosters
-        standings = fantasy_client.get_standings()
-        injury_map = fetch_cbs_injuries()
-        ownership_map = fantasy_client.fetch_ownership()
-
-        for team in standings:
-            # Upsert Team
-            db_team = db.query(models.LeagueTeam).filter(models.LeagueTeam.id == team.team_id).first()
-            if not db_team:
-                db_team = models.LeagueTeam(id=team.team_id)
-                db.add(db_team)
-            
-            db_team.name = team.team_name
-            db_team.rank = getattr(team, 'standing_playoff', team.standing)
-            
-            wins = getattr(team, 'wins', 0)
-            losses = getattr(team, 'losses', 0)
-            ties = getattr(team, 'ties', 0)
-            
-            if wins == 0 and hasattr(team, 'stats'):
-                 wins = team.stats.get('W', 0)
-                 losses = team.stats.get('L', 0)
-                 ties = team.stats.get('T', 0)
-
-            db_team.wins = wins
-            db_team.losses = losses
-            db_team.ties = ties
-            
-            # Points Logic: Calculate team points from their cumulative stats
-            team_fantasy_points = 0.0
-            if hasattr(team, 'stats'):
-                for stat_key, pts_per_stat in scoring_map.items():
-                    stat_val = team.stats.get(stat_key, 0)
-                    team_fantasy_points += (stat_val * pts_per_stat)
-            
-            if team_fantasy_points == 0:
-                team_fantasy_points = getattr(team, 'points', getattr(team, 'total_points', 0))
-            
-            db_team.points = team_fantasy_points
-
-            # Populate Team Granular Stats
-            if hasattr(team, 'stats'):
-                ts = team.stats
-                db_team.goals = ts.get('G', 0)
-                db_team.assists = ts.get('A', 0)
-                db_team.ppp = ts.get('PPP', 0)
-                db_team.shp = ts.get('SHP', 0)
-                db_team.sog = ts.get('SOG', 0)
-                db_team.hits = ts.get('HIT', 0)
-                db_team.blocks = ts.get('BLK', 0)
-                db_team.pim = ts.get('PIM', 0)
-
-            # Team Daily Snapshot
-            today_str = datetime.datetime.utcnow().strftime('%Y-%m-%d')
-            t_snap = db.query(models.TeamSnapshot).filter(
-                models.TeamSnapshot.team_id == db_team.id,
-                models.TeamSnapshot.day == today_str
-            ).first()
-
-            if not t_snap:
-                t_snap = models.TeamSnapshot(team_id=db_team.id, day=today_str)
-                db.add(t_snap)
-            
-            t_snap.date = datetime.datetime.utcnow()
-            t_snap.points = db_team.points
-
-            # Sync Team Roster
-            current_roster_ids = []
-            for player in team.roster:
-                _upsert_player(db, player, scoring_map, injury_map, ownership_map, team_id=team.team_id)
-                current_roster_ids.append(player.playerId)
-            
-            # Identify and Handle Dropped Players
-            # Find players in DB that are assigned to this team but NOT in the current roster
-            dropped_players = db.query(models.Player).filter(
-                models.Player.team_id == team.team_id,
-                models.Player.id.notin_(current_roster_ids)
-            ).all()
-            
-            for dropped in dropped_players:
-                logger.info(f"Player {dropped.fullName} ({dropped.id}) dropped from Team {team.team_id}")
-                dropped.team_id = None
-
-        # Sync Free Agents (Top 50)
-        fas = fantasy_client.get_free_agents(size=50)
-        for p in fas:
-            _upsert_player(db, p, scoring_map, injury_map, ownership_map, team_id=None)
-
-        db.commit()
-        logger.info("Sync completed successfully.")
+        yield
+    finally:
+        LAST_SYNC_TIMINGS[phase] = round(time.perf_counter() - start, 4)
+
+def _sync_data():
+    """Runs one full sync. Returns (error, change summary); error is None on success."""
+    LAST_SYNC_TIMINGS.clear()
+    # Raw ESPN/CBS payloads are archived when PAYLOAD_ARCHIVE_DIR is set (no-op otherwise)
+    with payload_archive.recording({"league_id": fantasy_client.league_id, "year": fantasy_client.year}) as rec:
+        with _timed("connect"):
+            connected = fantasy_client.connect()
+        if not connected:
+            logger.warning("Could not connect to ESPN API. Check credentials.")
+            if rec:
+                rec.discard()
+            return "Could not connect to ESPN API", None
+
+        db = next(get_db())
+        try:
+            # The free agent pages and ids this sync picks are recorded for replay
+            fa_plan = rec.meta.setdefault("free_agents", {}) if rec else None
+            staged = staged_sync.run_sync(fantasy_client, fetch_cbs_injuries, db, timed=_timed, fa_plan=fa_plan)
+            _refresh_projections(db, staged.scoring_map)
+            _save_league_info(db, staged.scoring_map)
+            if staged.failed_team_ids:
+                logger.warning(f"Sync completed, teams kept from previous sync: {sorted(staged.failed_team_ids)}")
+            logger.info(f"Sync completed successfully. Phase timings (s): {LAST_SYNC_TIMINGS}")
+            return None, staged.summary
+        except Exception as e:
+            logger.error(f"Error during sync: {e}")
+            db.rollback()
+            if rec:
+                rec.discard()
+            return e, None
+        finally:
+            db.close()
+
+def _refresh_projections(db, scoring_map):
+    # numpy is only loaded once there's something to project, keeping it off the startup path
+    import projections
+    try:
+        with _timed("projections"):
+            projections.refresh(db, scoring_map)
     except Exception as e:
-        logger.error(f"Error during sync: {e}")
+        # Stale projections are better than failing a sync that already published
+        logger.error(f"Error computing projections: {e}")
         db.rollback()
+
+def _save_league_info(db, scoring_map):
+    # Lets every worker price stats (simulation, trades) without asking ESPN
+    settings = getattr(fantasy_client.league, 'settings', None)
+    try:
+        app_state.save_league_info(db, {
+            "scoring_map": scoring_map,
+            "playoff_team_count": getattr(settings, 'playoff_team_count', None),
+        })
+    except Exception as e:
+        logger.error(f"Error saving league info: {e}")
+        db.rollback()
+
+def _last_success_utc(include_failed=False):
+    db = SessionLocal()
+    try:
+        last_success = app_state.last_successful_sync(db, include_failed=include_failed)
     finally:
         db.close()
+    return last_success.replace(tzinfo=datetime.timezone.utc) if last_success else None
+
+def _first_sync_time(interval_minutes):
+    """
+    When the sync job should first fire after startup. If the last successful sync is
+    more recent than the interval we wait out the remainder instead of syncing again,
+    so restarts and rolling deploys don't each hit ESPN immediately.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    last_success = _last_success_utc()
+    if not last_success:
+        return now
+    due = last_success + datetime.timedelta(minutes=interval_minutes)
+    if due <= now:
+        return now
+    logger.info(f"Last successful sync at {last_success}, skipping startup sync until {due}")
+    return due
+
+def _adaptive_sync_time():
+    """Next sync time driven by the NHL schedule, or None if no schedule is available"""
+    now = datetime.datetime.now(datetime.timezone.utc)
+    games = nhl_schedule.load_games(now)
+    if games is None:
+        return None
+    # Failed attempts count too, so an ESPN outage doesn't turn into a retry loop
+    return nhl_schedule.next_sync_time(
+        now, _last_success_utc(include_failed=True), games,
+        live_interval=LEAGUE_SETTINGS['score_sync_interval'],
+        idle_interval=LEAGUE_SETTINGS['idle_sync_interval'],
+        settle_delay=LEAGUE_SETTINGS['settle_delay'],
+    )
 
-@app.on_event("startup")
-def start_scheduler():
-    # Main Data Sync (Default 5 mins)
-    scheduler.add_job(sync_data, 'interval', minutes=LEAGUE_SETTINGS['score_sync_interval'], id='sync_job', replace_existing=True)
-    scheduler.add_job(sync_data) # Run once on startup
+ADAPTIVE_JOB_NAME = "adaptive_sync"
+
+def schedule_sync_job(startup=False, not_before=None):
+    """
+    (Re)creates 'sync_job' for the current sync mode.
+    fixed: an interval job every score_sync_interval minutes.
+    adaptive: a persistent job every idle_sync_interval minutes whose next run is moved to
+    the time picked from the NHL schedule after every sync. A one-shot 'date' job re-added
+    from inside its own run can be removed by the scheduler right after, ending the chain;
+    this one never runs out, so a missed re-plan costs at most one idle interval.
+    """
+    interval = LEAGUE_SETTINGS['score_sync_interval']
+    if LEAGUE_SETTINGS['sync_mode'] == 'adaptive':
+        run_at = _adaptive_sync_time()
+        if run_at:
+            if not_before and run_at < not_before:
+                run_at = not_before
+            idle = LEAGUE_SETTINGS['idle_sync_interval']
+            job = scheduler.get_job('sync_job')
+            if job and job.name == ADAPTIVE_JOB_NAME and getattr(job.trigger, 'interval', None) == datetime.timedelta(minutes=idle):
+                scheduler.modify_job('sync_job', next_run_time=run_at)
+            else:
+                scheduler.add_job(sync_data, 'interval', minutes=idle, id='sync_job', name=ADAPTIVE_JOB_NAME,
+                                  replace_existing=True, next_run_time=run_at)
+            logger.info(f"Next adaptive sync at {run_at}")
+            return
+        logger.warning("No NHL schedule available, falling back to fixed interval syncs")
+
+    next_run = _first_sync_time(interval) if startup else None
+    scheduler.add_job(sync_data, 'interval', minutes=interval, id='sync_job', replace_existing=True,
+                      next_run_time=next_run or datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(minutes=interval))
+
+_settings_generation = None
+
+def refresh_settings():
+    """Reloads settings saved by any worker and re-plans the sync job if they changed"""
+    global _settings_generation
+    db = SessionLocal()
+    try:
+        generation = app_state.get_generation(db, "settings")
+        if generation == _settings_generation:
+            return
+        LEAGUE_SETTINGS.update(app_state.load_settings(db))
+    finally:
+        db.close()
+
+    first_load = _settings_generation is None
+    _settings_generation = generation
+    if not first_load and _scheduler_running():
+        logger.info("Settings changed in another worker, rescheduling")
+        schedule_sync_job()
+
+def _become_leader():
+    global scheduler
+    STARTUP["role"] = "scheduler"
+    scheduler = _create_scheduler()
+
+    # Main Data Sync (Default 5 mins, or game-window driven in adaptive mode)
+    schedule_sync_job(startup=True)
     
     # Salary Sync (Weekly on Sunday at 4AM)
-    scheduler.add_job(sync_salaries, 'cron', day_of_week='sun', hour=4, id='salary_job')
+    scheduler.add_job(sync_salaries, 'cron', day_of_week='sun', hour=4, id='salary_job', replace_existing=True)
+
+    # Pick up settings changed through other workers
+    scheduler.add_job(refresh_settings, 'interval', seconds=30, id='settings_job', replace_existing=True)
     
     scheduler.start()
 
+def _step_down():
+    """The scheduler lock is gone (another worker may already hold it): stop running jobs"""
+    global scheduler
+    if _scheduler_running():
+        scheduler.shutdown(wait=False)
+    scheduler = None
+    STARTUP["role"] = "follower"
+
+# Readiness, filled in by _warm_up and reported by /api/ready
+STARTUP = {"state": "starting", "schema_version": None, "role": None, "ready_after_s": None, "error": None}
+
+def _warm_up():
+    """Migrates the schema, loads settings and joins the scheduler election"""
+    try:
+        STARTUP["schema_version"] = migrations.run_migrations(engine)
+        refresh_settings()
+        # Requests can be served from here on; starting the scheduler doesn't need to hold that up
+        STARTUP["ready_after_s"] = round(time.perf_counter() - _STARTED, 3)
+        STARTUP["state"] = "ready"
+        logger.info(f"Ready {STARTUP['ready_after_s']}s after import (schema v{STARTUP['schema_version']})")
+        # Search answers from the database until this is done
+        player_search.index.refresh_in_background()
+
+        # With several uvicorn workers only the one holding the scheduler lock runs jobs,
+        # the others keep retrying so one of them takes over if the leader goes away
+        if scheduler_lock.try_acquire():
+            _become_leader()
+        else:
+            logger.info("Scheduler is running in another worker, this one only serves requests")
+            STARTUP["role"] = "follower"
+        # Followers wait to take over; the leader checks it still holds the lock
+        leader.watch(scheduler_lock, _become_leader, on_lost=_step_down)
+    except Exception as e:
+        logger.error(f"Startup failed: {e}")
+        STARTUP["state"] = "failed"
+        STARTUP["error"] = str(e)
+
+@app.on_event("startup")
+def start_scheduler():
+    # Off the event loop so /api/health answers straight away; /api/ready flips once this is done
+    threading.Thread(target=_warm_up, name="warm-up", daemon=True).start()
+
+@app.on_event("shutdown")
+def stop_scheduler():
+    if _scheduler_running():
+        scheduler.shutdown(wait=False)
+    scheduler_lock.release()
+
 @app.get("/api/health")
 def health():
+    # Liveness only: the process is up and serving HTTP
     return {"status": "ok"}
 
-@app.get("/api/teams")
-def get_teams(db: Session = Depends(get_db)):
-    from sqlalchemy.orm import joinedload
-    return db.query(models.LeagueTeam).options(joinedload(models.LeagueTeam.players)).order_by(models.LeagueTeam.rank).all()
+@app.get("/api/ready")
+def ready():
+    """Readiness: 200 once the schema is migrated and the database answers, 503 before that"""
+    body = dict(STARTUP)
+    if body["state"] == "ready":
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        except Exception as e:
+            body.update(state="unavailable", error=f"database: {e}")
+    return ORJSONResponse(body, status_code=200 if body["state"] == "ready" else 503)
+
+def _json(body: bytes):
+    """Wraps pre-rendered JSON (as kept in data_cache) in a response"""
+    return Response(content=body, media_type="application/json")
+
+@app.get("/api/metrics/http")
+def get_http_metrics():
+    """Per-host counters for outbound calls (ESPN, CBS, NHL schedule)"""
+    return http_client.stats()
+
+@app.get("/api/events")
+async def sync_events_stream(request: Request):
+    """
+    Server-sent events. After every successful sync a 'sync' event carries the change
+    summary (changed players, team point deltas, new injuries, roster moves); a
+    'resync' event means the client fell behind and should reload everything.
+    """
+    try:
+        last_event_id = int(request.headers.get("last-event-id"))
+    except (TypeError, ValueError):
+        last_event_id = None
+    return StreamingResponse(
+        broadcaster.stream(last_event_id),
+        media_type="text/event-stream",
+        # identity: keeps the compression middleware from buffering the stream,
+        # X-Accel-Buffering: same for nginx in front of us
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "Content-Encoding": "identity"},
+    )
+
+@app.get("/api/teams", response_model=List[schemas.TeamOut])
+async def get_teams(db: AsyncSession = Depends(get_async_db)):
+    async def build():
+        teams = rows_to_dicts((await db.execute(
+            select(*columns(models.LeagueTeam, schemas.TeamOut, exclude=("players",))).order_by(models.LeagueTeam.rank)
+        )).all())
+        players = (await db.execute(
+            select(*columns(models.Player, schemas.PlayerOut)).where(models.Player.team_id != None)
+        )).all()
+        by_team = {t["id"]: t for t in teams}
+        for t in teams:
+            t["players"] = []
+        for p in players:
+            team = by_team.get(p.team_id)
+            if team is not None:
+                team["players"].append(dict(p._mapping))
+        return schemas.render(List[schemas.TeamOut], teams)
+    return _json(await data_cache.aget("teams", build))
+
+# Charted from their own columns; any other stat_registry key ("W", "PIM", ...) comes out of the stats vector
+HISTORY_COLUMNS = ("total_points",) + stat_registry.HOT_COLUMNS
 
 @app.get("/api/teams/{team_id}/players/history")
-def get_team_players_history(team_id: int, stat: str = "total_points", db: Session = Depends(get_db)):
+async def get_team_players_history(team_id: int, stat: str = "total_points", db: AsyncSession = Depends(get_async_db)):
     """Returns historical points for all players on a specific team"""
-    players = db.query(models.Player).filter(models.Player.team_id == team_id).all()
+    if stat not in HISTORY_COLUMNS and stat not in stat_registry.INDEX:
+        raise HTTPException(status_code=400, detail=f"Unknown stat '{stat}'")
+    return _json(await data_cache.aget(("team_players_history", team_id, stat), lambda: _team_players_history(team_id, stat, db)))
+
+async def _team_players_history(team_id, stat, db):
+    players = (await db.execute(
+        select(models.Player.id, models.Player.fullName).where(models.Player.team_id == team_id)
+    )).all()
     player_ids = [p.id for p in players]
     player_map = {p.id: p.fullName for p in players}
 
-    snaps = db.query(models.PlayerSnapshot).filter(models.PlayerSnapshot.player_id.in_(player_ids)).order_by(models.PlayerSnapshot.day.asc()).all()
+    column = stat if stat in HISTORY_COLUMNS else stat_registry.COLUMN_OF.get(stat)
+    snap_stat = getattr(models.PlayerSnapshot, column or "stats")
+    snaps = (await db.execute(
+        select(models.PlayerSnapshot.day, models.PlayerSnapshot.player_id, snap_stat)
+        .where(models.PlayerSnapshot.player_id.in_(player_ids)).order_by(models.PlayerSnapshot.day.asc())
+    )).all()
 
     history_dict = {}
-    for s in snaps:
-        if s.day not in history_dict:
-            history_dict[s.day] = {"day": s.day}
-        p_name = player_map.get(s.player_id, f"Player {s.player_id}")
-        # Dynamically get stat from snapshot object
-        val = getattr(s, stat, 0)
-        history_dict[s.day][p_name] = val
-
-    return sorted(list(history_dict.values()), key=lambda x: x['day'])
+    for day, player_id, val in snaps:
+        if column is None:
+            val = stat_registry.unpack(val).get(stat) # None for days from before the category was stored
+        if day not in history_dict:
+            history_dict[day] = {"day": day}
+        p_name = player_map.get(player_id, f"Player {player_id}")
+        history_dict[day][p_name] = val
 
+    return orjson.dumps(sorted(list(history_dict.values()), key=lambda x: x['day']))
 
-@app.get("/api/players/salaries")
-def get_players_salaries(db: Session = Depends(get_db)):
-    # Return lightweight list with salary info
-    players = db.query(models.Player).order_by(models.Player.salary_value.desc()).all()
-    result = []
-    for p in players:
-        result.append({
-            "id": p.id,
-            "fullName": p.fullName,
-            "proTeam": p.proTeam,
-            "position": p.position,
-            "salary": p.salary,
-            "salary_value": p.salary_value,
-            "contract_years": p.contract_years,
-            "total_points": p.total_points
-        })
-    return result
 
-@app.get("/api/players/free_agents")
-def get_free_agents(db: Session = Depends(get_db)):
-    return db.query(models.Player).filter(models.Player.team_id == None).order_by(models.Player.total_points.desc()).limit(50).all()
+@app.get("/api/players/salaries", response_model=List[schemas.SalaryOut])
+async def get_players_salaries(db: AsyncSession = Depends(get_async_db)):
+    return _json(await data_cache.aget("salaries", lambda: _players_salaries(db)))
 
-@app.get("/api/players/{player_id}")
-def get_player_details(player_id: int, db: Session = Depends(get_db)):
-    player = db.query(models.Player).filter(models.Player.id == player_id).first()
-    if not player:
+async def _players_salaries(db):
+    # Return lightweight list with salary info
+    players = (await db.execute(
+        select(*columns(models.Player, schemas.SalaryOut)).order_by(models.Player.salary_value.desc())
+    )).all()
+    return schemas.render(List[schemas.SalaryOut], rows_to_dicts(players))
+
+# Position filters take espn_api's names ("Defense", which the sync stores) or their
+# abbreviations ("D", which players added by hand have). They're part of cache keys, so
+# anything else is refused rather than cached under a key of its own.
+POSITIONS = ("Center", "Left Wing", "Right Wing", "Forward", "Defense", "Goalie")
+
+def _check_position(position):
+    """The position's name for cache keys, or None for no filter"""
+    if not position:
+        return None
+    name = trade_analysis.canonical(position)
+    if name not in POSITIONS:
+        raise HTTPException(status_code=400, detail=f"Unknown position '{position}'")
+    return name
+
+def _position_values(name):
+    """Stored position values a filter on `name` matches; Forward takes every forward"""
+    if name is None:
+        return None
+    names = trade_analysis.SLOT_POSITIONS[name]
+    return list(names) + [short for short, full in trade_analysis.ALIASES.items() if full in names]
+
+@app.get("/api/players/free_agents", response_model=List[schemas.PlayerOut])
+async def get_free_agents(position: Optional[str] = None, limit: int = 50, db: AsyncSession = Depends(get_async_db)):
+    # The sync covers the whole pool over several cycles (free_agent_sync); last_updated says how fresh each row is
+    position = _check_position(position)
+    limit = max(1, min(limit, 1000))
+    async def build():
+        query = select(*columns(models.Player, schemas.PlayerOut)).where(models.Player.team_id == None)
+        if position:
+            query = query.where(models.Player.position.in_(_position_values(position)))
+        rows = (await db.execute(query.order_by(models.Player.total_points.desc()).limit(limit))).all()
+        return schemas.render(List[schemas.PlayerOut], rows_to_dicts(rows))
+    return _json(await data_cache.aget(f"free_agents:{position}:{limit}", build))
+
+@app.get("/api/players/search", response_model=List[schemas.PlayerSearchOut])
+def search_players(q: str, limit: int = 10, position: Optional[str] = None, free_agents: bool = False,
+                   db: Session = Depends(get_db)):
+    """Autocomplete over names, NHL teams and positions, e.g. ?q=mcd or ?q=edm c"""
+    limit = max(1, min(limit, 50))
+    positions = _position_values(_check_position(position))
+    results = player_search.index.search(q, limit, positions, free_agents)
+    if results is None:
+        results = player_search.fallback(db, q, limit, positions, free_agents)
+    return _json(schemas.render(List[schemas.PlayerSearchOut], results))
+
+@app.get("/api/players/{player_id}", response_model=schemas.PlayerDetailOut)
+async def get_player_details(player_id: int, db: AsyncSession = Depends(get_async_db)):
+    row = (await db.execute(
+        select(*columns(models.Player, schemas.PlayerDetailOut)).where(models.Player.id == player_id)
+    )).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Player not found")
-    return player
-
-@app.get("/api/players/{player_id}/history")
-def get_player_history(player_id: int, db: Session = Depends(get_db)):
-    """Returns historical stats for a single player"""
-    snaps = db.query(models.PlayerSnapshot).filter(models.PlayerSnapshot.player_id == player_id).order_by(models.PlayerSnapshot.day.asc()).all()
-    return snaps
+    player = dict(row._mapping)
+    player["stats"] = stat_registry.unpack(player["stats"])
+    return _json(schemas.render(schemas.PlayerDetailOut, player))
+
+def _projection_columns():
+    return columns(models.PlayerProjection, schemas.ProjectionOut, exclude=("fullName", "position", "team_id", "total_points")) + [
+        models.Player.fullName, models.Player.position, models.Player.team_id, models.Player.total_points]
+
+@app.get("/api/projections", response_model=List[schemas.ProjectionOut])
+async def get_projections(position: str = None, team_id: int = None, free_agents: bool = False, limit: int = 100,
+                          db: AsyncSession = Depends(get_async_db)):
+    """Rest-of-season projections, best first. Filter by position, fantasy team or free agents only."""
+    position = _check_position(position)
+    limit = max(1, min(limit, 1000))
+
+    async def build():
+        query = select(*_projection_columns()).join(models.Player, models.Player.id == models.PlayerProjection.player_id)
+        if position:
+            query = query.where(models.Player.position.in_(_position_values(position)))
+        if team_id is not None:
+            query = query.where(models.Player.team_id == team_id)
+        if free_agents:
+            query = query.where(models.Player.team_id == None)
+        rows = (await db.execute(query.order_by(models.PlayerProjection.projected_points.desc()).limit(limit))).all()
+        return schemas.render(List[schemas.ProjectionOut], rows_to_dicts(rows))
+    return _json(await data_cache.aget(f"projections:{position}:{team_id}:{free_agents}:{limit}", build))
+
+@app.get("/api/players/{player_id}/projection", response_model=schemas.ProjectionOut)
+async def get_player_projection(player_id: int, db: AsyncSession = Depends(get_async_db)):
+    row = (await db.execute(
+        select(*_projection_columns()).join(models.Player, models.Player.id == models.PlayerProjection.player_id)
+        .where(models.PlayerProjection.player_id == player_id)
+    )).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="No projection for this player yet")
+    return _json(schemas.render(schemas.ProjectionOut, dict(row._mapping)))
+
+@app.get("/api/players/{player_id}/history", response_model=List[schemas.PlayerSnapshotOut])
+async def get_player_history(player_id: int, stats: bool = False, db: AsyncSession = Depends(get_async_db)):
+    """Returns historical stats for a single player; stats=true adds the non-column categories"""
+    fields = columns(models.PlayerSnapshot, schemas.PlayerSnapshotOut, exclude=() if stats else ("stats",))
+    snaps = rows_to_dicts((await db.execute(
+        select(*fields).where(models.PlayerSnapshot.player_id == player_id).order_by(models.PlayerSnapshot.day.asc())
+    )).all())
+    if stats:
+        for snap in snaps:
+            snap["stats"] = stat_registry.unpack(snap["stats"])
+    return _json(schemas.render(List[schemas.PlayerSnapshotOut], snaps))
+
+@app.get("/api/players/{player_id}/contracts", response_model=List[schemas.ContractOut])
+async def get_player_contracts(player_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Every contract version recorded for a player, newest first"""
+    rows = (await db.execute(
+        select(*columns(models.Contract, schemas.ContractOut)).where(models.Contract.player_id == player_id)
+        .order_by(models.Contract.effective_from.desc())
+    )).all()
+    return _json(schemas.render(List[schemas.ContractOut], rows_to_dicts(rows)))
+
+@app.get("/api/teams/payroll")
+def get_teams_payroll(day: str = None, db: Session = Depends(get_db)):
+    """
+    Each team's payroll on `day` (YYYY-MM-DD, default today): the roster as of that day
+    priced with the contracts in effect then, not the salaries copied into snapshots.
+    """
+    refresh_settings() # the cap may have been changed through another worker
+    day = day or datetime.datetime.utcnow().strftime('%Y-%m-%d')
+    try:
+        datetime.date.fromisoformat(day)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="day must be YYYY-MM-DD")
+    owners = roster_diff.owners_on(db, day)
+    salaries = contracts.salaries_on(db.connection(), day, owners)
+    cap = LEAGUE_SETTINGS['salary_cap'] * 1_000_000
+    payroll = {}
+    for player_id, team_id in owners.items():
+        payroll[team_id] = payroll.get(team_id, 0.0) + salaries.get(player_id, 0.0)
+    teams = db.query(models.LeagueTeam.id, models.LeagueTeam.name).order_by(models.LeagueTeam.id).all()
+    return [{"team_id": t.id, "name": t.name, "day": day, "payroll": payroll.get(t.id, 0.0),
+             "cap_space": cap - payroll.get(t.id, 0.0),
+             "players": sum(1 for team_id in owners.values() if team_id == t.id)} for t in teams]
 
 @app.get("/api/teams/history")
-def get_teams_history(db: Session = Depends(get_db)):
+async def get_teams_history(db: AsyncSession = Depends(get_async_db)):
     """Returns team points over time formatted for Recharts"""
+    return _json(await data_cache.aget("teams_history", lambda: _teams_history(db)))
+
+async def _teams_history(db):
     # Fetch all team snapshots
-    snaps = db.query(models.TeamSnapshot).order_by(models.TeamSnapshot.day.asc()).all()
-    teams = db.query(models.LeagueTeam).all()
+    snaps = (await db.execute(
+        select(models.TeamSnapshot.day, models.TeamSnapshot.team_id, models.TeamSnapshot.points).order_by(models.TeamSnapshot.day.asc())
+    )).all()
+    teams = (await db.execute(select(models.LeagueTeam.id, models.LeagueTeam.name))).all()
     team_map = {t.id: t.name for t in teams}
     
     # Reformat to: [{ day: '2025-10-01', 'Team A': 100, 'Team B': 90 }, ...]
@@ -366,10 +632,27 @@ def get_teams_history(db: Session = Depends(get_db)):
         team_name = team_map.get(s.team_id, f"Team {s.team_id}")
         history_dict[s.day][team_name] = s.points
         
-    return sorted(list(history_dict.values()), key=lambda x: x['day'])
+    return orjson.dumps(sorted(list(history_dict.values()), key=lambda x: x['day']))
+
+@app.get("/api/transactions", response_model=List[schemas.TransactionOut])
+async def get_transactions(team_id: int = None, player_id: int = None, limit: int = 100, db: AsyncSession = Depends(get_async_db)):
+    """Roster adds/drops/trades, newest first, optionally for one team or one player"""
+    tx = models.RosterTransaction
+    query = select(
+        tx.id, tx.player_id, models.Player.fullName, tx.kind, tx.from_team_id, tx.to_team_id, tx.created_at
+    ).outerjoin(models.Player, models.Player.id == tx.player_id)
+    if team_id is not None:
+        query = query.where(or_(tx.from_team_id == team_id, tx.to_team_id == team_id))
+    if player_id is not None:
+        query = query.where(tx.player_id == player_id)
+    limit = max(1, min(limit, 1000))
+    rows = (await db.execute(query.order_by(tx.created_at.desc(), tx.id.desc()).limit(limit))).all()
+    return _json(schemas.render(List[schemas.TransactionOut], rows_to_dicts(rows)))
 
 @app.get("/api/settings")
 def get_settings():
+    # Settings may have been changed through another worker
+    refresh_settings()
     return LEAGUE_SETTINGS
 
 from pydantic import BaseModel
@@ -377,17 +660,34 @@ class SettingsUpdate(BaseModel):
     score_sync_interval: int
     salary_sync_frequency: str
     salary_cap: float
+    # Optional so older clients that only send the fields above keep working
+    sync_mode: Optional[str] = None # fixed or adaptive
+    idle_sync_interval: Optional[int] = None
+    settle_delay: Optional[int] = None
 
 @app.post("/api/settings")
-def update_settings(settings: SettingsUpdate):
+def update_settings(settings: SettingsUpdate, db: Session = Depends(get_db)):
+    global _settings_generation
+    if settings.sync_mode is not None and settings.sync_mode not in ("fixed", "adaptive"):
+        raise HTTPException(status_code=400, detail="sync_mode must be 'fixed' or 'adaptive'")
+
     LEAGUE_SETTINGS['score_sync_interval'] = settings.score_sync_interval
     LEAGUE_SETTINGS['salary_sync_frequency'] = settings.salary_sync_frequency
     LEAGUE_SETTINGS['salary_cap'] = settings.salary_cap
+    for key in ("sync_mode", "idle_sync_interval", "settle_delay"):
+        value = getattr(settings, key)
+        if value is not None:
+            LEAGUE_SETTINGS[key] = value
+    app_state.save_settings(db, LEAGUE_SETTINGS)
+    # Let the other workers (and the scheduler leader) know
+    app_state.bump_generation(db, "settings")
+    _settings_generation = app_state.get_generation(db, "settings")
     
-    # Reschedule jobs
+    # Reschedule jobs (the leader's refresh_settings job does this if it isn't us)
     try:
-        scheduler.reschedule_job('sync_job', trigger='interval', minutes=settings.score_sync_interval)
-        logger.info(f"Rescheduled sync job to {settings.score_sync_interval} minutes")
+        if _scheduler_running():
+            schedule_sync_job()
+        logger.info(f"Rescheduled sync job ({LEAGUE_SETTINGS['sync_mode']}, {settings.score_sync_interval} minutes live)")
     except Exception as e:
         logger.error(f"Failed to reschedule job: {e}")
         
@@ -403,6 +703,8 @@ async def upload_salaries(file: UploadFile = File(...), db: Session = Depends(ge
         content_str = content.decode('latin-1') # Fallback
         
     count = sync_csv.process_csv_content(content_str, db)
+    data_cache.invalidate(db)
+    roster_cache.invalidate(db)
     return {"message": f"Successfully updated salaries for {count} players"}
 
 class SalaryUpdate(BaseModel):
@@ -414,18 +716,15 @@ def update_player_salary(player_id: int, update: SalaryUpdate, db: Session = Dep
     player = db.query(models.Player).filter(models.Player.id == player_id).first()
     if not player:
         raise HTTPException(status_code=404, detail="Player not found")
-    
-    player.salary = update.salary
-    player.contract_years = update.contract_years
-    
-    # Clean salary value
-    try:
-        clean = update.salary.replace("$", "").replace(",", "").strip()
-        player.salary_value = float(clean)
-    except:
-        player.salary_value = 0.0
-        
+
+    # Same path as file imports, so the change lands in the contract history too
+    contracts.ingest(db.connection(), [{"player_id": player_id, "salary": update.salary,
+                                        "salary_value": contracts.parse_salary(update.salary),
+                                        "contract_years": update.contract_years}], source="manual")
     db.commit()
+    data_cache.invalidate(db)
+    roster_cache.invalidate(db)
+    db.refresh(player)
     return {"message": "Salary updated", "player": player}
 
 class PlayerCreate(BaseModel):
@@ -447,12 +746,7 @@ def create_player(p: PlayerCreate, db: Session = Depends(get_db)):
     max_id = db.query(func.max(models.Player.id)).scalar()
     new_id = (max_id or 10000) + 1
     
-    salary_val = 0.0
-    try:
-        clean = p.salary.replace("$", "").replace(",", "").strip()
-        salary_val = float(clean)
-    except:
-        pass
+    salary_val = contracts.parse_salary(p.salary)
         
     new_player = models.Player(
         id=new_id,
@@ -467,13 +761,18 @@ def create_player(p: PlayerCreate, db: Session = Depends(get_db)):
     )
     
     db.add(new_player)
+    db.flush()
+    contracts.ingest(db.connection(), [{"player_id": new_id, "salary": p.salary, "salary_value": salary_val,
+                                        "contract_years": p.contract_years}], source="manual")
     db.commit()
+    data_cache.invalidate(db)
     db.refresh(new_player)
     return new_player
 
 @app.post("/api/sync/salaries")
-def trigger_salary_sync():
-    scheduler.add_job(sync_salaries)
+def trigger_salary_sync(background_tasks: BackgroundTasks):
+    # Run in this worker, the scheduler may live in another one
+    background_tasks.add_task(sync_salaries)
     return {"message": "Salary sync triggered"}
 
 @app.get("/api/settings/scoring")
@@ -485,6 +784,51 @@ def trigger_sync():
     sync_data()
     return {"message": "Sync completed"}
 
+_simulation_lock = threading.Lock()
+
+@app.get("/api/simulation")
+def get_simulation(sims: int = 20000, seed: int = 0, playoff_teams: int = None, db: Session = Depends(get_db)):
+    """
+    Monte Carlo playoff odds and next-week matchup win probabilities (see simulator.py).
+    Results are cached until the next sync; the same seed always gives the same answer.
+    """
+    import simulator
+    league = app_state.load_league_info(db)
+    playoff_teams = playoff_teams or league.get("playoff_team_count") or int(os.getenv("PLAYOFF_TEAMS", 4))
+    sims = max(1, min(sims, simulator.MAX_SIMS))
+
+    def build():
+        return orjson.dumps(simulator.run(db, league.get("scoring_map") or {}, sims=sims, seed=seed, playoff_teams=playoff_teams))
+
+    # One simulation at a time per worker; a request for one already running waits for it and hits the cache
+    with _simulation_lock:
+        return _json(data_cache.get(f"simulation:{sims}:{seed}:{playoff_teams}", build))
+
+@app.get("/api/analysis/trades")
+def get_trades(team_id: int = None, min_gain: float = 0.0, two_for_one: bool = True, enforce_cap: bool = True,
+               limit: int = 50, budget: float = 10.0, db: Session = Depends(get_db)):
+    """
+    1-for-1 and 2-for-1 trades that improve both teams' projected lineups (see trade_analysis.py),
+    for one team or between all teams. Cached until the next roster move or salary change;
+    a search cut short by the time budget isn't cached.
+    """
+    refresh_settings() # the cap may have been changed through another worker
+    if team_id is not None and not db.query(models.LeagueTeam.id).filter(models.LeagueTeam.id == team_id).first():
+        raise HTTPException(status_code=404, detail="Team not found")
+    limit = max(1, min(limit, 500))
+    budget = max(0.5, min(budget, 60.0))
+    salary_cap = LEAGUE_SETTINGS['salary_cap']
+    complete = []
+
+    def build():
+        result = trade_analysis.run(db, team_id=team_id, salary_cap=salary_cap, min_gain=min_gain, two_for_one=two_for_one,
+                                    enforce_cap=enforce_cap, limit=limit, budget=budget)
+        complete.append(result["complete"])
+        return orjson.dumps(result)
+
+    key = f"trades:{team_id}:{min_gain}:{two_for_one}:{enforce_cap}:{limit}:{salary_cap}"
+    return _json(roster_cache.get(key, build, keep=lambda _: all(complete)))
+
 @app.get("/api/analysis/trade_suggestions")
 def get_trade_suggestions(team_id: int = None, db: Session = Depends(get_db)):
     # Basic logic: Find my worst players and best free agents
@@ -501,4 +845,5 @@ def get_trade_suggestions(team_id: int = None, db: Session = Depends(get_db)):
     }
 
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,146 @@
+"""
+Versioned schema migrations.
+
+schema_version records every migration applied. Startup reads the current version
+with a single query and only does work when the code is ahead of the database, so a
+normal restart no longer pays for create_all plus a batch of ALTER TABLEs.
+
+To change the schema append a migration to MIGRATIONS, e.g.
+    (2, "projections table", _create_tables(models.Projection)),
+Never edit or reorder one that has shipped; existing databases have already recorded it.
+"""
+import datetime
+import logging
+import time
+from sqlalchemy import inspect, text, select, func, literal, or_, LargeBinary
+from database import Base
+import models
+import leader
+
+logger = logging.getLogger(__name__)
+
+def _add_column(conn, table, column, type_):
+    """ADD COLUMN unless it's already there (SQLite has no ADD COLUMN IF NOT EXISTS)"""
+    existing = {c["name"] for c in inspect(conn).get_columns(table)}
+    if column not in existing:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {type_}"))
+
+def _create_tables(*models_):
+    """Creates the given tables (and their indexes) if missing"""
+    def migrate(conn):
+        Base.metadata.create_all(conn, tables=[m.__table__ for m in models_])
+    return migrate
+
+def _baseline(conn):
+    # Everything that existed before versioning. create_all skips existing tables,
+    # the columns below were added to tables created by older releases.
+    Base.metadata.create_all(conn)
+    for table in ("players", "player_snapshots"):
+        _add_column(conn, table, "lineup_slot", "VARCHAR")
+        _add_column(conn, table, "salary", "VARCHAR")
+        _add_column(conn, table, "salary_value", "FLOAT")
+        _add_column(conn, table, "contract_years", "VARCHAR")
+
+def _sync_run_summary(conn):
+    _add_column(conn, "sync_runs", "summary", "TEXT")
+
+def _projections(conn):
+    _create_tables(models.PlayerProjection)(conn)
+    # Projections and player history read snapshots by player in day order. Not unique
+    # here, as shipped: older databases can hold duplicate days until migration 7 removes
+    # them, so this can't be built from the model (which has the unique one).
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_player_snapshots_player_day ON player_snapshots (player_id, day)"))
+
+def _stat_vectors(conn):
+    blob = LargeBinary().compile(dialect=conn.dialect) # BLOB on SQLite, BYTEA on Postgres
+    for table in ("players", "player_snapshots"):
+        _add_column(conn, table, "stats", blob)
+
+def _contracts(conn):
+    _create_tables(models.Contract)(conn)
+    # Current salaries become the first version, in effect since the oldest snapshot
+    if conn.execute(select(func.count()).select_from(models.Contract.__table__)).scalar():
+        return
+    first_day = conn.execute(select(func.min(models.PlayerSnapshot.day))).scalar() \
+        or datetime.datetime.utcnow().strftime('%Y-%m-%d') # same clock as contracts.ingest and snapshot days
+    players = models.Player.__table__
+    conn.execute(models.Contract.__table__.insert().from_select(
+        ["player_id", "salary", "salary_value", "contract_years", "effective_from", "source"],
+        select(players.c.id, players.c.salary, players.c.salary_value, players.c.contract_years,
+               literal(first_day), literal("backfill"))
+        .where(or_(players.c.salary != None, players.c.salary_value > 0))))
+
+def _name_search(conn):
+    # Postgres only, and optional: CREATE EXTENSION needs a privileged (or trusted) role.
+    # The trigram index serves the player search fallback's ILIKE '%...%'; without it
+    # that query scans players, which is fine once the in-memory index is up.
+    if conn.dialect.name != "postgresql":
+        return
+    try:
+        with conn.begin_nested():
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            conn.execute(text('CREATE INDEX IF NOT EXISTS ix_players_fullname_trgm ON players USING gin ("fullName" gin_trgm_ops)'))
+    except Exception as e:
+        logger.warning(f"Skipping pg_trgm index on players.fullName: {e}")
+
+def _unique_snapshot_days(conn):
+    # Older syncs could leave several rows for a player and day; keep the newest
+    snapshots = models.PlayerSnapshot.__table__
+    newest = select(func.max(snapshots.c.id)).group_by(snapshots.c.player_id, snapshots.c.day).scalar_subquery()
+    conn.execute(snapshots.delete().where(snapshots.c.id.not_in(newest)))
+    conn.execute(text("DROP INDEX IF EXISTS ix_player_snapshots_player_day"))
+    for index in snapshots.indexes:
+        if index.name == "ix_player_snapshots_player_day":
+            index.create(conn)
+
+# (version, description, migrate(conn))
+MIGRATIONS = [
+    (1, "baseline schema", _baseline),
+    (2, "sync_runs.summary", _sync_run_summary),
+    (3, "player_projections, snapshot (player_id, day) index", _projections),
+    (4, "players/player_snapshots.stats vectors", _stat_vectors),
+    (5, "contracts history, backfilled from current salaries", _contracts),
+    (6, "pg_trgm index on players.fullName (Postgres)", _name_search),
+    (7, "unique player_snapshots (player_id, day)", _unique_snapshot_days),
+]
+
+HEAD = MIGRATIONS[-1][0]
+
+def current_version(conn):
+    if not inspect(conn).has_table(models.SchemaVersion.__tablename__):
+        return 0
+    return conn.execute(select(func.max(models.SchemaVersion.version))).scalar() or 0
+
+def run_migrations(engine, wait=60):
+    """
+    Brings the schema up to HEAD and returns the resulting version. When several
+    workers start together one applies the migrations and the others wait for it.
+    """
+    with engine.connect() as conn:
+        version = current_version(conn)
+    if version >= HEAD:
+        return version
+
+    lock = leader.ProcessLock("migrations")
+    deadline = time.monotonic() + wait
+    while not lock.try_acquire():
+        if time.monotonic() > deadline:
+            raise RuntimeError("Timed out waiting for another worker to migrate the schema")
+        time.sleep(0.2)
+    try:
+        with engine.begin() as conn:
+            models.SchemaVersion.__table__.create(conn, checkfirst=True)
+            version = current_version(conn)
+        # Each migration commits on its own, so a failure keeps the ones before it
+        for number, description, migrate in MIGRATIONS:
+            if number <= version:
+                continue
+            started = time.perf_counter()
+            with engine.begin() as conn:
+                migrate(conn)
+                conn.execute(models.SchemaVersion.__table__.insert().values(version=number, description=description))
+            logger.info(f"Applied migration {number} ({description}) in {time.perf_counter() - started:.2f}s")
+            version = number
+    finally:
+        lock.release()
+    return version
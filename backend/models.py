@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime, Index, LargeBinary
+from sqlalchemy.orm import relationship, deferred
 from database import Base
 import datetime
 
@@ -31,6 +31,9 @@ class Player(Base):
     hits = Column(Float, default=0.0)
     blocks = Column(Float, default=0.0)
     plus_minus = Column(Float, default=0.0)
+    # Every other category (goalie stats, PIM, ...) packed by stat_registry. Deferred:
+    # bytes aren't JSON, and only the analytics read it, with explicit selects.
+    stats = deferred(Column(LargeBinary))
     
     last_updated = Column(DateTime, default=datetime.datetime.utcnow)
 
@@ -76,9 +79,16 @@ class PlayerSnapshot(Base):
     hits = Column(Float, default=0.0)
     blocks = Column(Float, default=0.0)
     plus_minus = Column(Float, default=0.0)
+    stats = deferred(Column(LargeBinary)) # see Player.stats
     salary = Column(String)
     salary_value = Column(Float)
     contract_years = Column(String)
+
+    __table_args__ = (
+        # One row per player per day, upserted by every sync of that day
+        Index("ix_player_snapshots_player_day", "player_id", "day", unique=True),
+    )
+
 class TeamSnapshot(Base):
     """Stores team totals over time"""
     __tablename__ = "team_snapshots"
@@ -87,3 +97,84 @@ class TeamSnapshot(Base):
     date = Column(DateTime, default=datetime.datetime.utcnow)
     day = Column(String) # YYYY-MM-DD
     points = Column(Float)
+
+class AppSetting(Base):
+    """Key/value store for settings that must survive restarts"""
+    __tablename__ = "app_settings"
+    key = Column(String, primary_key=True)
+    value = Column(String) # JSON encoded
+
+class SyncRun(Base):
+    """One row per sync attempt, so a restart knows when data was last refreshed"""
+    __tablename__ = "sync_runs"
+    id = Column(Integer, primary_key=True, index=True)
+    started_at = Column(DateTime, default=datetime.datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+    success = Column(Boolean, default=False, index=True)
+    error = Column(String, nullable=True)
+    summary = Column(String, nullable=True) # JSON change summary pushed to /api/events clients
+
+class CacheGeneration(Base):
+    """Counters bumped whenever shared data changes, so every worker knows to drop its caches"""
+    __tablename__ = "cache_generations"
+    name = Column(String, primary_key=True)
+    value = Column(Integer, default=0)
+
+class RosterTransaction(Base):
+    """Append-only log of ownership changes detected between syncs (add, drop, trade)"""
+    __tablename__ = "roster_transactions"
+    id = Column(Integer, primary_key=True, index=True)
+    player_id = Column(Integer, ForeignKey("players.id"))
+    kind = Column(String) # add, drop, trade
+    from_team_id = Column(Integer, ForeignKey("league_teams.id"), nullable=True) # None for adds
+    to_team_id = Column(Integer, ForeignKey("league_teams.id"), nullable=True) # None for drops
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_roster_tx_player_created", "player_id", "created_at"),
+        Index("ix_roster_tx_from_created", "from_team_id", "created_at"),
+        Index("ix_roster_tx_to_created", "to_team_id", "created_at"),
+    )
+
+class PlayerProjection(Base):
+    """Per-game rate estimates and rest-of-season projection, rebuilt after every sync (see projections.py)"""
+    __tablename__ = "player_projections"
+    player_id = Column(Integer, ForeignKey("players.id"), primary_key=True)
+    games = Column(Integer) # games seen in the history window
+    # Per-game rates
+    goals = Column(Float)
+    assists = Column(Float)
+    ppp = Column(Float)
+    shp = Column(Float)
+    sog = Column(Float)
+    hits = Column(Float)
+    blocks = Column(Float)
+    plus_minus = Column(Float)
+    points_per_game = Column(Float)
+    remaining_games = Column(Float)
+    projected_points = Column(Float, index=True) # rest of season
+    computed_at = Column(DateTime)
+
+class Contract(Base):
+    """Effective-dated salary history, a new row whenever a player's contract changes (see contracts.py)"""
+    __tablename__ = "contracts"
+    id = Column(Integer, primary_key=True, index=True)
+    player_id = Column(Integer, ForeignKey("players.id"), nullable=False)
+    salary = Column(String)
+    salary_value = Column(Float)
+    contract_years = Column(String)
+    effective_from = Column(String, nullable=False) # YYYY-MM-DD, inclusive
+    effective_to = Column(String, nullable=True) # YYYY-MM-DD, exclusive; None for the current contract
+    source = Column(String) # puckpedia, csv, manual, backfill
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_contracts_player_from", "player_id", "effective_from"),
+    )
+
+class SchemaVersion(Base):
+    """One row per applied migration (see migrations.py); the highest version is the current schema"""
+    __tablename__ = "schema_version"
+    version = Column(Integer, primary_key=True)
+    description = Column(String)
+    applied_at = Column(DateTime, default=datetime.datetime.utcnow)
@@ -0,0 +1,128 @@
+import datetime
+import json
+import logging
+import os
+import time
+import http_client
+
+logger = logging.getLogger(__name__)
+
+SCOREBOARD_URL = "https://site.api.espn.com/apis/site/v2/sports/hockey/nhl/scoreboard"
+
+# A game plus intermissions and the occasional overtime/shootout
+GAME_WINDOW = datetime.timedelta(hours=3, minutes=30)
+
+# Scoreboards are re-fetched at most this often (seconds)
+CACHE_TTL = 900
+
+_cache = {} # { "YYYYMMDD": (fetched_at, [games]) }
+
+def _parse_time(value):
+    if not value:
+        return None
+    # ESPN uses "2025-10-19T23:00Z", python < 3.11 doesn't accept the bare Z
+    value = value.replace("Z", "+00:00")
+    dt = datetime.datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=datetime.timezone.utc)
+    return dt
+
+def _parse_games(data):
+    """
+    Accepts either an ESPN scoreboard payload ({"events": [...]}) or a plain list of
+    {"id", "start", "state"} dicts, as written by hand into NHL_SCHEDULE_FILE.
+    Returns a list of {"id", "start", "end", "state"} with aware UTC datetimes.
+    """
+    if isinstance(data, dict):
+        raw = []
+        for event in data.get("events", []):
+            status = event.get("status", {}).get("type", {})
+            raw.append({
+                "id": event.get("id"),
+                "start": event.get("date"),
+                "state": status.get("state"), # pre, in, post
+            })
+    else:
+        raw = data or []
+
+    games = []
+    for g in raw:
+        try:
+            start = _parse_time(g.get("start"))
+        except ValueError:
+            logger.warning(f"Skipping schedule entry with bad start time: {g}")
+            continue
+        if not start:
+            continue
+        end = _parse_time(g.get("end")) if g.get("end") else start + GAME_WINDOW
+        games.append({"id": g.get("id"), "start": start, "end": end, "state": g.get("state") or "pre"})
+    return games
+
+def _load_file(path):
+    try:
+        with open(path) as f:
+            return _parse_games(json.load(f))
+    except Exception as e:
+        logger.error(f"Could not load schedule file {path}: {e}")
+        return None
+
+def _fetch_day(day):
+    key = day.strftime("%Y%m%d")
+    cached = _cache.get(key)
+    if cached and time.time() - cached[0] < CACHE_TTL:
+        return cached[1]
+
+    resp = http_client.get(SCOREBOARD_URL, params={"dates": key})
+    resp.raise_for_status()
+    games = _parse_games(resp.json())
+    _cache[key] = (time.time(), games)
+    return games
+
+def load_games(now):
+    """
+    Games around `now` (yesterday through tomorrow), from NHL_SCHEDULE_FILE if set,
+    otherwise from the ESPN scoreboard. Returns None when no source is available.
+    """
+    path = os.getenv("NHL_SCHEDULE_FILE")
+    if path:
+        return _load_file(path)
+
+    games = {}
+    try:
+        for offset in (-1, 0, 1):
+            for g in _fetch_day(now + datetime.timedelta(days=offset)):
+                games[g["id"] or g["start"].isoformat()] = g
+    except Exception as e:
+        logger.error(f"Could not fetch NHL schedule: {e}")
+        return None
+    return sorted(games.values(), key=lambda g: g["start"])
+
+def next_sync_time(now, last_sync, games, live_interval, idle_interval, settle_delay):
+    """
+    Picks when the next sync should run:
+      - every `live_interval` minutes while any game is in progress
+      - a single settle-up pass `settle_delay` minutes after the last game of a slate ends
+      - at the next puck drop, or every `idle_interval` minutes, whichever is sooner
+    `now` and `last_sync` are aware UTC datetimes (last_sync may be None).
+    """
+    live = [g for g in games if g["state"] == "in" or (g["state"] != "post" and g["start"] <= now < g["end"])]
+    if live:
+        if not last_sync:
+            return now
+        return max(now, last_sync + datetime.timedelta(minutes=live_interval))
+
+    candidates = []
+
+    ended = [g["end"] for g in games if g["start"] <= now]
+    if ended:
+        settle_at = max(ended) + datetime.timedelta(minutes=settle_delay)
+        if not last_sync or last_sync < settle_at:
+            candidates.append(max(now, settle_at))
+
+    upcoming = [g["start"] for g in games if g["start"] > now]
+    if upcoming:
+        candidates.append(min(upcoming))
+
+    idle_due = (last_sync or now) + datetime.timedelta(minutes=idle_interval)
+    candidates.append(max(now, idle_due))
+    return min(candidates)
@@ -0,0 +1,213 @@
+"""
+Content-addressed archive of the raw payloads behind every sync, plus replay.
+
+Layout under PAYLOAD_ARCHIVE_DIR:
+    blobs/ab/abcdef...gz        gzip'd response body, named by sha256 of the raw bytes
+    syncs/20251019T230501.json  manifest: when, league, and request key -> outcome for one sync
+
+An outcome is the blob digest of a 200 response, {"status": 404, "blob": digest} for
+any other status, or {"error": "ConnectTimeout", "message": ...} for a call that never
+got a response. Identical payloads (pro schedules, unchanged rosters) are stored once.
+Replaying feeds the archived outcomes back through http_client, so the normal sync code
+rebuilds the database exactly as if it were talking to ESPN/CBS - including any fixes
+made since, and the same fallbacks wherever the recorded sync had to use them.
+
+    python -m payload_archive list
+    python -m payload_archive replay [--since 2025-10-01] [--until 2025-12-31]
+"""
+import argparse
+import contextlib
+import datetime
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+import http_client
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DIR = os.getenv("PAYLOAD_ARCHIVE_DIR")
+
+# Raised by the replay hook; defined next to it so the sources can re-raise it
+MissingPayload = http_client.MissingPayload
+
+class Archive:
+    def __init__(self, root):
+        self.root = root
+        self.blob_dir = os.path.join(root, "blobs")
+        self.sync_dir = os.path.join(root, "syncs")
+
+    def _blob_path(self, digest):
+        return os.path.join(self.blob_dir, digest[:2], digest + ".gz")
+
+    def put(self, body: bytes):
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so a crash never leaves a truncated blob behind
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with gzip.open(tmp, "wb", compresslevel=6) as f:
+                f.write(body)
+            os.replace(tmp, path)
+        return digest
+
+    def get(self, digest):
+        with gzip.open(self._blob_path(digest), "rb") as f:
+            return f.read()
+
+    def write_manifest(self, recorded_at, meta, requests):
+        os.makedirs(self.sync_dir, exist_ok=True)
+        name = recorded_at.strftime("%Y%m%dT%H%M%S%f") + ".json"
+        with open(os.path.join(self.sync_dir, name), "w") as f:
+            json.dump({"recorded_at": recorded_at.isoformat(), "meta": meta, "requests": requests}, f)
+        return name
+
+    def manifests(self, since=None, until=None):
+        """Manifests in recording order, optionally limited to [since, until] days (YYYY-MM-DD)"""
+        if not os.path.isdir(self.sync_dir):
+            return []
+        result = []
+        for name in sorted(os.listdir(self.sync_dir)):
+            if not name.endswith(".json"):
+                continue
+            with open(os.path.join(self.sync_dir, name)) as f:
+                manifest = json.load(f)
+            day = manifest["recorded_at"][:10]
+            if (since and day < since) or (until and day > until):
+                continue
+            manifest["name"] = name
+            result.append(manifest)
+        return result
+
+def default_archive():
+    return Archive(ARCHIVE_DIR) if ARCHIVE_DIR else None
+
+class Recording:
+    def __init__(self, archive, meta):
+        self.archive = archive
+        self.meta = meta
+        self.recorded_at = datetime.datetime.utcnow()
+        self.requests = {}
+        self.keep = True
+
+    def record(self, key, status, body, error=None):
+        if error is not None:
+            self.requests[key] = {"error": type(error).__name__, "message": str(error)}
+        elif status == 200:
+            self.requests[key] = self.archive.put(body)
+        else:
+            self.requests[key] = {"status": status, "blob": self.archive.put(body)}
+
+    def discard(self):
+        """Don't write a manifest for this sync (e.g. it failed half way)"""
+        self.keep = False
+
+@contextlib.contextmanager
+def recording(meta=None, archive=None):
+    """
+    Archives every response and failed call made by this thread while active. Yields the
+    Recording, or None when no archive is configured so callers don't need to check.
+    """
+    archive = archive or default_archive()
+    if archive is None:
+        yield None
+        return
+
+    rec = Recording(archive, meta or {})
+    http_client.set_hooks(recorder=rec.record)
+    try:
+        yield rec
+    finally:
+        http_client.set_hooks()
+        if rec.keep and rec.requests:
+            try:
+                name = archive.write_manifest(rec.recorded_at, rec.meta, rec.requests)
+                logger.info(f"Archived {len(rec.requests)} payloads for this sync ({name})")
+            except Exception as e:
+                logger.error(f"Could not write payload manifest: {e}")
+
+@contextlib.contextmanager
+def replaying(archive, manifest):
+    """Serves this thread's HTTP calls from `manifest` instead of the network"""
+    requests = manifest["requests"]
+
+    def replay(key):
+        if key not in requests:
+            raise MissingPayload(key)
+        outcome = requests[key]
+        if isinstance(outcome, str):
+            return 200, archive.get(outcome), None
+        if "error" in outcome:
+            return None, None, (outcome["error"], outcome.get("message", ""))
+        return outcome["status"], archive.get(outcome["blob"]), None
+
+    http_client.set_hooks(replayer=replay)
+    try:
+        yield
+    finally:
+        http_client.set_hooks()
+
+def replay(archive, since=None, until=None):
+    """
+    Rebuilds the database from archived syncs, oldest first, through the normal
+    staged sync. Returns (replayed, failed) counts.
+    """
+    from database import SessionLocal
+    from fantasy_client import FantasyClient
+    from scrapers import fetch_cbs_injuries
+    import staged_sync
+
+    manifests = archive.manifests(since, until)
+    replayed, failed = 0, 0
+    started = time.perf_counter()
+    for manifest in manifests:
+        meta = manifest.get("meta", {})
+        now = datetime.datetime.fromisoformat(manifest["recorded_at"])
+        db = SessionLocal()
+        try:
+            with replaying(archive, manifest):
+                client = FantasyClient(league_id=meta.get("league_id"), year=meta.get("year"))
+                if not client.connect():
+                    raise RuntimeError("could not load league from archive")
+                # Same free agent pages and ids as the recorded sync; older manifests don't have them
+                staged_sync.run_sync(client, fetch_cbs_injuries, db, now=now, fa_plan=meta.get("free_agents"))
+            replayed += 1
+        except Exception as e:
+            db.rollback()
+            failed += 1
+            logger.error(f"Replay of {manifest['name']} failed: {e}")
+        finally:
+            db.close()
+
+    logger.info(f"Replayed {replayed} syncs ({failed} failed) in {time.perf_counter() - started:.1f}s")
+    return replayed, failed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Payload archive tools")
+    parser.add_argument("command", choices=["list", "replay"])
+    parser.add_argument("--archive", default=ARCHIVE_DIR, help="Archive directory (default PAYLOAD_ARCHIVE_DIR)")
+    parser.add_argument("--since", help="First day to include (YYYY-MM-DD)")
+    parser.add_argument("--until", help="Last day to include (YYYY-MM-DD)")
+    args = parser.parse_args(argv)
+
+    if not args.archive:
+        parser.error("no archive directory, pass --archive or set PAYLOAD_ARCHIVE_DIR")
+    logging.basicConfig(level=logging.INFO)
+    archive = Archive(args.archive)
+
+    if args.command == "list":
+        for m in archive.manifests(args.since, args.until):
+            print(f"{m['recorded_at']}  {len(m['requests']):3d} payloads  {m['name']}")
+        return 0
+
+    from database import engine
+    import migrations
+    migrations.run_migrations(engine)
+    replayed, failed = replay(archive, args.since, args.until)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,231 @@
+"""
+Player search and autocomplete from an in-memory index.
+
+Names, NHL team abbreviations and positions are normalized (accents folded, lower
+case, punctuation dropped) into tokens kept in one sorted list, so every word of a
+query is a prefix lookup (bisect) and words are ANDed: "mcd", "connor mc", "edm c".
+Queries that match nothing fall back to trigram similarity on names, the same measure
+as pg_trgm's similarity(), so typos ("mcdavd") still find the player.
+
+Every worker keeps its own index. It's built in the background after startup and
+then kept up to date incrementally: only players touched since the last refresh
+(last_updated, or in a roster transaction) are re-indexed. The worker that ran a
+sync refreshes right after it; the others notice the data generation move. Until
+the first build is done, search() answers from the database instead (fallback()),
+which a pg_trgm index covers on Postgres.
+"""
+import bisect
+import datetime
+import heapq
+import logging
+import threading
+import time
+import unicodedata
+from sqlalchemy import select, or_
+from database import SessionLocal
+import app_state
+import models
+
+logger = logging.getLogger(__name__)
+
+CHECK_INTERVAL = 5.0 # seconds between data generation checks, as in response_cache
+SIMILARITY = 0.3 # pg_trgm's default similarity threshold
+FIELDS = ("id", "fullName", "position", "proTeam", "team_id", "total_points", "ownership")
+
+def normalize(text):
+    """'Tim Stützle' -> 'tim stutzle', "Ryan O'Reilly" -> 'ryan oreilly', 'J.T. Miller' -> 'jt miller'"""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    text = text.replace("'", "").replace("’", "").replace(".", "")
+    return " ".join("".join(c if c.isalnum() else " " for c in text).split())
+
+def trigrams(text):
+    """pg_trgm style: each word padded with two spaces in front and one behind"""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+class PlayerIndex:
+    def __init__(self, check_interval=CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._entries = {} # id -> response dict
+        self._tokens = [] # sorted (token, kind, id); kind 0 for name words, 1 for team/position
+        self._trigrams = {} # trigram -> set of ids
+        self._keys = {} # id -> (tokens, trigrams) it was indexed under
+        self._lock = threading.Lock()
+        self._refreshing = threading.Lock()
+        self._watermark = None # newest last_updated seen
+        self._generation = None
+        self._checked_at = 0.0
+        self.ready = False
+
+    # Maintenance
+
+    def _index_keys(self, entry):
+        name = normalize(entry["fullName"])
+        tokens = [(word, 0, entry["id"]) for word in name.split()]
+        for extra in (entry["proTeam"], entry["position"]):
+            if extra:
+                tokens.append((normalize(extra), 1, entry["id"]))
+        return tuple(tokens), trigrams(name)
+
+    def _remove(self, player_id):
+        tokens, grams = self._keys.pop(player_id, ((), ()))
+        for token in tokens:
+            i = bisect.bisect_left(self._tokens, token)
+            if i < len(self._tokens) and self._tokens[i] == token:
+                del self._tokens[i]
+        for gram in grams:
+            ids = self._trigrams.get(gram)
+            if ids is not None:
+                ids.discard(player_id)
+                if not ids:
+                    del self._trigrams[gram]
+        self._entries.pop(player_id, None)
+
+    def _upsert(self, entry):
+        player_id = entry["id"]
+        keys = self._index_keys(entry)
+        if self._keys.get(player_id) != keys:
+            self._remove(player_id)
+            for token in keys[0]:
+                bisect.insort(self._tokens, token)
+            for gram in keys[1]:
+                self._trigrams.setdefault(gram, set()).add(player_id)
+            self._keys[player_id] = keys
+        # Points, ownership and team change every sync without touching the tokens
+        self._entries[player_id] = entry
+
+    def refresh(self, db=None):
+        """Re-indexes players changed since the last refresh (everyone the first time). Returns how many."""
+        if not self._refreshing.acquire(blocking=False):
+            return 0 # another thread is already on it
+        own_session = db is None
+        db = db or SessionLocal()
+        started = time.perf_counter()
+        try:
+            generation = app_state.get_generation(db, "data")
+            columns = [getattr(models.Player, f) for f in FIELDS] + [models.Player.last_updated]
+            query = select(*columns)
+            if self._watermark is not None:
+                # Drops don't touch last_updated, the transaction log has them
+                moved = select(models.RosterTransaction.player_id).where(
+                    models.RosterTransaction.created_at >= self._watermark)
+                query = query.where(or_(models.Player.last_updated >= self._watermark, models.Player.id.in_(moved)))
+            rows = db.execute(query).all()
+
+            with self._lock:
+                for row in rows:
+                    self._upsert({f: getattr(row, f) for f in FIELDS})
+            updated = [r.last_updated for r in rows if r.last_updated]
+            if updated:
+                self._watermark = max(updated + ([self._watermark] if self._watermark else []))
+            elif self._watermark is None:
+                self._watermark = datetime.datetime.utcnow()
+            self._generation = generation
+            self._checked_at = time.monotonic()
+            if not self.ready:
+                logger.info(f"Player search index built: {len(self._entries)} players, {len(self._tokens)} tokens "
+                            f"in {time.perf_counter() - started:.3f}s")
+            self.ready = True
+            return len(rows)
+        except Exception as e:
+            logger.error(f"Could not refresh player search index: {e}")
+            return 0
+        finally:
+            if own_session:
+                db.close()
+            self._refreshing.release()
+
+    def refresh_in_background(self):
+        threading.Thread(target=self.refresh, name="player-search-index", daemon=True).start()
+
+    def _maybe_refresh(self):
+        """Starts a background refresh when the data generation has moved; never blocks a search"""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval or self._refreshing.locked():
+            return
+        self._checked_at = now
+        db = SessionLocal()
+        try:
+            generation = app_state.get_generation(db, "data")
+        except Exception as e:
+            logger.error(f"Could not read data generation for player search: {e}")
+            return
+        finally:
+            db.close()
+        if generation != self._generation:
+            self.refresh_in_background()
+
+    # Queries
+
+    def _prefix_matches(self, word):
+        """{id: 2 for an exact token, 1 for a prefix}, best per player"""
+        matches = {}
+        i = bisect.bisect_left(self._tokens, (word,))
+        while i < len(self._tokens) and self._tokens[i][0].startswith(word):
+            token, _, player_id = self._tokens[i]
+            score = 2 if token == word else 1
+            if matches.get(player_id, 0) < score:
+                matches[player_id] = score
+            i += 1
+        return matches
+
+    def _similar(self, text):
+        grams = trigrams(text)
+        if not grams:
+            return {}
+        shared = {}
+        for gram in grams:
+            for player_id in self._trigrams.get(gram, ()):
+                shared[player_id] = shared.get(player_id, 0) + 1
+        scores = {}
+        for player_id, n in shared.items():
+            similarity = n / (len(grams) + len(self._keys[player_id][1]) - n)
+            if similarity >= SIMILARITY:
+                scores[player_id] = similarity
+        return scores
+
+    def search(self, q, limit=10, positions=None, free_agents=False):
+        """Best matches for `q`, or None when the index isn't built yet. positions: stored values to keep."""
+        if not self.ready:
+            return None
+        self._maybe_refresh()
+        text = normalize(q)
+        if not text:
+            return []
+        with self._lock:
+            scores = None
+            for word in text.split():
+                matches = self._prefix_matches(word)
+                if scores is None:
+                    scores = matches
+                else:
+                    scores = {pid: s + matches[pid] for pid, s in scores.items() if pid in matches}
+                if not scores:
+                    break
+            if not scores and len(text) >= 3:
+                scores = self._similar(text)
+
+            def wanted(player_id):
+                entry = self._entries[player_id]
+                return (not positions or entry["position"] in positions) and (not free_agents or entry["team_id"] is None)
+
+            best = heapq.nlargest(limit, (pid for pid in scores if wanted(pid)),
+                                  key=lambda pid: (scores[pid], self._entries[pid]["total_points"] or 0))
+            return [self._entries[pid] for pid in best]
+
+def fallback(db, q, limit=10, positions=None, free_agents=False):
+    """Name search straight from the database, for before the index is built"""
+    pattern = "%" + "%".join(q.split()) + "%"
+    query = select(*[getattr(models.Player, f) for f in FIELDS]).where(models.Player.fullName.ilike(pattern))
+    if positions:
+        query = query.where(models.Player.position.in_(positions))
+    if free_agents:
+        query = query.where(models.Player.team_id == None)
+    rows = db.execute(query.order_by(models.Player.total_points.desc()).limit(limit)).all()
+    return [dict(r._mapping) for r in rows]
+
+index = PlayerIndex()
@@ -0,0 +1,208 @@
+"""
+Rest-of-season projections from snapshot history.
+
+Player snapshots hold season-to-date totals, so the difference between two
+consecutive snapshots is what the player did in between. Every category in
+stat_registry takes part, goalie stats included. The GP delta says how many games
+that was: snapshots are daily, but a missed sync or a back-to-back between them puts
+several games in one difference, which is split evenly across them. Where GP didn't
+move, any other category moving (besides +/-) still counts as one game. A category
+either snapshot doesn't have (stat_registry reads it as NaN) is unknown for that
+interval and left out of its rate, rather than counted as the jump from zero. Per-game
+rates are exponentially weighted toward recent games, then regressed toward the
+average rate of the player's position in proportion to how few games we've seen:
+
+    rate = (games * weighted_rate + PRIOR_GAMES * position_rate) / (games + PRIOR_GAMES)
+
+with games counted per category, over the intervals where it's known.
+
+The whole league is computed in one pass of numpy array operations and written to
+player_projections after every sync.
+"""
+import datetime
+import logging
+import os
+import time
+import numpy as np
+from sqlalchemy import select, delete, insert
+from sqlalchemy.orm import Session
+import models
+import stat_registry
+
+logger = logging.getLogger(__name__)
+
+HALF_LIFE = float(os.getenv("PROJECTION_HALF_LIFE", 10)) # games until a game's weight halves
+PRIOR_GAMES = float(os.getenv("PROJECTION_PRIOR_GAMES", 10)) # strength of the pull toward the position average
+HISTORY_DAYS = int(os.getenv("PROJECTION_HISTORY_DAYS", 120)) # older games barely count anyway
+SEASON_GAMES = 82
+
+# Per-game rates stored in player_projections (every category counts toward points)
+RATE_STATS = stat_registry.HOT_COLUMNS
+# Categories whose movement means the player played that day (+/- can stay at zero)
+GAME_STATS = np.array([key != "+/-" for key in stat_registry.KEYS])
+GP = stat_registry.INDEX["GP"]
+
+def _season_bounds(today):
+    """Regular season dates, from NHL_SEASON_START/NHL_SEASON_END or the usual early Oct - mid Apr"""
+    start_year = today.year if today.month >= 7 else today.year - 1
+    start = os.getenv("NHL_SEASON_START") or f"{start_year}-10-07"
+    end = os.getenv("NHL_SEASON_END") or f"{start_year + 1}-04-16"
+    return datetime.date.fromisoformat(start), datetime.date.fromisoformat(end)
+
+def games_per_day(today):
+    """Chance a given team plays on a given day of the season"""
+    start, end = _season_bounds(today)
+    return min(SEASON_GAMES / max((end - start).days, 1), 1.0)
+
+def remaining_games(today):
+    """Games left for a typical team, prorated on the calendar"""
+    start, end = _season_bounds(today)
+    season_days = max((end - start).days, 1)
+    left = min(max((end - today).days, 0), season_days)
+    return round(SEASON_GAMES * left / season_days, 1)
+
+def points_weights(scoring_map):
+    """Fantasy points per unit of each stat_registry.KEYS category"""
+    if not scoring_map:
+        # Same fallback as the sync: goals + assists
+        return np.array([1.0 if key in ("G", "A") else 0.0 for key in stat_registry.KEYS])
+    return np.array([scoring_map.get(key, 0) for key in stat_registry.KEYS], dtype=float)
+
+def load_snapshots(conn, now):
+    """
+    Snapshots within HISTORY_DAYS ordered by player then day, as (player_ids, totals)
+    arrays; totals has one column per stat_registry.KEYS category.
+    """
+    cutoff = (now - datetime.timedelta(days=HISTORY_DAYS)).strftime('%Y-%m-%d')
+    rows = conn.execute(
+        select(models.PlayerSnapshot.player_id, *stat_registry.columns(models.PlayerSnapshot))
+        .where(models.PlayerSnapshot.day >= cutoff)
+        .order_by(models.PlayerSnapshot.player_id, models.PlayerSnapshot.day)
+    ).all()
+    return np.array([row[0] for row in rows], dtype=np.int64), stat_registry.matrix(rows, skip=1)
+
+def game_log(snapshots, player_ids):
+    """
+    One row per snapshot interval with games in it: (owner, deltas, games) where owner
+    indexes player_ids, games is how many games the interval covers and deltas holds
+    each category per game over them, NaN where either snapshot lacks the category.
+    Rows are contiguous per player, in day order. Rows of players missing from
+    player_ids are dropped.
+    """
+    player_ids = np.asarray(player_ids, dtype=np.int64)
+    pid, totals = snapshots
+
+    # Per-day production is the difference between consecutive snapshots of the same player;
+    # NaN on either side stays NaN, and unknown GP falls back to counting movement
+    same_player = pid[1:] == pid[:-1]
+    deltas = (totals[1:] - totals[:-1])[same_player]
+    delta_pid = pid[1:][same_player]
+    gp = np.rint(deltas[:, GP])
+    games = np.where(gp >= 1, gp, (np.abs(deltas[:, GAME_STATS]) > 0).any(axis=1))
+    played = games > 0
+    games, game_pid = games[played], delta_pid[played]
+    deltas = deltas[played] / games[:, None]
+
+    if not len(player_ids):
+        return np.zeros(0, dtype=np.int64), np.zeros((0, len(stat_registry.KEYS))), np.zeros(0)
+    # Map each game onto the player's position in player_ids
+    order = np.argsort(player_ids)
+    owner = order[np.clip(np.searchsorted(player_ids, game_pid, sorter=order), 0, len(player_ids) - 1)]
+    known = player_ids[owner] == game_pid
+    return owner[known], deltas[known], games[known]
+
+def fill_unknown(owner, deltas, games, n_players):
+    """
+    game_log() deltas with unknown (NaN) categories replaced by that player's per-game
+    average over the rows where the category is known, or 0 if it never is.
+    """
+    known = ~np.isnan(deltas)
+    if known.all():
+        return deltas
+    values = np.where(known, deltas, 0.0)
+    totals = np.stack([np.bincount(owner, weights=games * values[:, j], minlength=n_players)
+                       for j in range(deltas.shape[1])], axis=1)
+    seen = np.stack([np.bincount(owner, weights=games * known[:, j], minlength=n_players)
+                     for j in range(deltas.shape[1])], axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        average = np.where(seen > 0, totals / seen, 0.0)
+    return np.where(known, deltas, average[owner])
+
+def compute(snapshots, player_ids, positions, scoring_map, remaining):
+    """
+    snapshots: load_snapshots() arrays, ordered by player then day.
+    player_ids/positions: everyone to project, in matching order.
+    Returns a dict of arrays aligned with player_ids: games, one per-game rate per
+    RATE_STATS stat, points_per_game and projected_points.
+    """
+    n_players, n_stats = len(player_ids), len(stat_registry.KEYS)
+    if not n_players:
+        return {key: np.zeros(0) for key in ("games", "points_per_game", "projected_points") + RATE_STATS}
+    owner, deltas, row_games = game_log(snapshots, player_ids)
+
+    games = np.bincount(owner, weights=row_games, minlength=n_players)
+
+    # Rows are contiguous per player in day order; count how many of the player's games come after each one
+    through = np.cumsum(row_games)
+    group_start = np.maximum.accumulate(np.where(np.r_[True, owner[1:] != owner[:-1]], through - row_games, 0))
+    games_after = games[owner] - (through - group_start)
+    # A row stands for row_games games at its per-game rate; unknown categories weigh nothing
+    weights = 0.5 ** (games_after / HALF_LIFE) * row_games
+    known = ~np.isnan(deltas)
+    values = np.where(known, deltas, 0.0)
+
+    def per_player(row_weights, groups=owner, n=n_players):
+        """(n, n_stats) sums of row_weights by group"""
+        return np.stack([np.bincount(groups, weights=row_weights[:, j], minlength=n) for j in range(n_stats)], axis=1)
+
+    observed = per_player(row_games[:, None] * known) # games per category where it's known
+    weight_sum = per_player(weights[:, None] * known)
+    weighted = per_player(weights[:, None] * values)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        recent_rate = np.where(weight_sum > 0, weighted / weight_sum, 0.0)
+
+    # Position averages over every game played at that position
+    position_names, position_idx = np.unique(np.asarray(positions, dtype=object).astype(str), return_inverse=True)
+    position_idx = position_idx.reshape(-1)
+    position_games = per_player(row_games[:, None] * known, position_idx[owner], len(position_names))
+    position_totals = per_player(row_games[:, None] * values, position_idx[owner], len(position_names))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        position_rate = np.where(position_games > 0, position_totals / position_games, 0.0)
+
+    rates = (observed * recent_rate + PRIOR_GAMES * position_rate[position_idx]) / (observed + PRIOR_GAMES)
+    points_per_game = rates @ points_weights(scoring_map)
+
+    result = {"games": games, "points_per_game": points_per_game, "projected_points": points_per_game * remaining}
+    for stat, key in stat_registry.HOT:
+        result[stat] = rates[:, stat_registry.INDEX[key]]
+    return result
+
+def refresh(db: Session, scoring_map, now=None):
+    """Recomputes projections for every player and replaces player_projections. Returns the row count."""
+    now = now or datetime.datetime.utcnow()
+    started = time.perf_counter()
+
+    # Core statements on the session's connection: no ORM row processing for tens of thousands of rows
+    conn = db.connection()
+    players = conn.execute(select(models.Player.id, models.Player.position)).all()
+    snapshots = load_snapshots(conn, now)
+    loaded = time.perf_counter()
+
+    remaining = remaining_games(now.date())
+    result = compute(snapshots, [p.id for p in players], [p.position or "" for p in players], scoring_map, remaining)
+
+    rows = []
+    for i, p in enumerate(players):
+        row = {"player_id": p.id, "games": int(result["games"][i]), "remaining_games": remaining, "computed_at": now,
+               "points_per_game": round(float(result["points_per_game"][i]), 4),
+               "projected_points": round(float(result["projected_points"][i]), 2)}
+        row.update({s: round(float(result[s][i]), 4) for s in RATE_STATS})
+        rows.append(row)
+
+    conn.execute(delete(models.PlayerProjection.__table__))
+    if rows:
+        conn.execute(insert(models.PlayerProjection.__table__), rows)
+    db.commit()
+    logger.info(f"Projected {len(rows)} players from {len(snapshots[0])} snapshots "
+                f"(load {loaded - started:.3f}s, compute+store {time.perf_counter() - loaded:.3f}s)")
+    return len(rows)
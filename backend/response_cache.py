@@ -0,0 +1,112 @@
+import threading
+import time
+import logging
+from sqlalchemy import select
+from database import SessionLocal, AsyncSessionLocal
+import app_state
+import models
+
+logger = logging.getLogger(__name__)
+
+CHECK_INTERVAL = 5.0 # seconds between generation checks
+
+class GenerationCache:
+    """
+    Per-process cache of serialized responses. Entries are dropped whenever the shared
+    generation counter in the database moves, which any worker can bump after a write.
+    The counter is only read every `check_interval` seconds to keep reads cheap.
+    """
+    def __init__(self, name="data", check_interval=CHECK_INTERVAL):
+        self.name = name
+        self.check_interval = check_interval
+        self._values = {}
+        self._generation = None
+        self._checked_at = 0.0
+        # Bumped on every clear so a build that raced an invalidation isn't stored
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def _due(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return False
+        self._checked_at = now
+        return True
+
+    def _refresh(self):
+        if not self._due():
+            return
+        db = SessionLocal()
+        try:
+            generation = app_state.get_generation(db, self.name)
+        except Exception as e:
+            logger.error(f"Could not read {self.name} generation: {e}")
+            return
+        finally:
+            db.close()
+        self._apply_generation(generation)
+
+    async def _arefresh(self):
+        if not self._due():
+            return
+        try:
+            async with AsyncSessionLocal() as db:
+                generation = (await db.execute(
+                    select(models.CacheGeneration.value).where(models.CacheGeneration.name == self.name)
+                )).scalar() or 0
+        except Exception as e:
+            logger.error(f"Could not read {self.name} generation: {e}")
+            return
+        self._apply_generation(generation)
+
+    def _apply_generation(self, generation):
+        with self._lock:
+            if generation != self._generation:
+                self._values.clear()
+                self._epoch += 1
+                self._generation = generation
+
+    def get(self, key, build, keep=None):
+        """`keep(value)` returning False skips storing a value, e.g. a partial result"""
+        self._refresh()
+        with self._lock:
+            if key in self._values:
+                return self._values[key]
+            epoch = self._epoch
+        value = build()
+        with self._lock:
+            if epoch == self._epoch and (keep is None or keep(value)):
+                self._values[key] = value
+        return value
+
+    async def aget(self, key, build):
+        """Same as get() for async endpoints; `build` is a coroutine function"""
+        await self._arefresh()
+        with self._lock:
+            if key in self._values:
+                return self._values[key]
+            epoch = self._epoch
+        value = await build()
+        with self._lock:
+            if epoch == self._epoch:
+                self._values[key] = value
+        return value
+
+    def invalidate(self, db=None):
+        """Drops local entries and bumps the shared counter so other workers follow"""
+        with self._lock:
+            self._values.clear()
+            self._epoch += 1
+        own_session = db is None
+        db = db or SessionLocal()
+        try:
+            app_state.bump_generation(db, self.name)
+        finally:
+            if own_session:
+                db.close()
+        # Force the next read to pick up the new generation
+        self._checked_at = 0.0
+
+data_cache = GenerationCache("data")
+# Results that only depend on who is on which roster (and salaries), e.g. trade search
+roster_cache = GenerationCache("roster")
@@ -0,0 +1,64 @@
+import datetime
+import logging
+from sqlalchemy.orm import Session
+import models
+
+logger = logging.getLogger(__name__)
+
+def load_owners(db: Session):
+    """Current { player_id: team_id } for every rostered player, in one query"""
+    return dict(db.query(models.Player.id, models.Player.team_id).filter(models.Player.team_id != None).all())
+
+def owners_on(db: Session, day):
+    """
+    { player_id: team_id } as of the end of `day` (YYYY-MM-DD): today's owners with
+    every later transaction undone, newest first.
+    """
+    owners = load_owners(db)
+    end = datetime.datetime.fromisoformat(day) + datetime.timedelta(days=1)
+    later = db.query(models.RosterTransaction.player_id, models.RosterTransaction.from_team_id).filter(
+        models.RosterTransaction.created_at >= end
+    ).order_by(models.RosterTransaction.created_at.desc(), models.RosterTransaction.id.desc()).all()
+    for player_id, from_team in later:
+        if from_team is None:
+            owners.pop(player_id, None)
+        else:
+            owners[player_id] = from_team
+    return owners
+
+def diff_rosters(previous, current):
+    """
+    Compares two { player_id: team_id } maps covering the whole league.
+    Returns a list of (player_id, kind, from_team_id, to_team_id) with kind add/drop/trade.
+    """
+    changes = []
+    for player_id, to_team in current.items():
+        from_team = previous.get(player_id)
+        if from_team is None:
+            changes.append((player_id, "add", None, to_team))
+        elif from_team != to_team:
+            changes.append((player_id, "trade", from_team, to_team))
+    for player_id, from_team in previous.items():
+        if player_id not in current:
+            changes.append((player_id, "drop", from_team, None))
+    return changes
+
+def apply_drops(db: Session, changes):
+    """Releases every dropped player with a single UPDATE. Returns the dropped ids."""
+    dropped = [player_id for player_id, kind, _, _ in changes if kind == "drop"]
+    if dropped:
+        db.query(models.Player).filter(models.Player.id.in_(dropped)).update(
+            {models.Player.team_id: None}, synchronize_session=False
+        )
+    return dropped
+
+def record_transactions(db: Session, changes, when=None):
+    when = when or datetime.datetime.utcnow()
+    if not changes:
+        return
+    db.bulk_insert_mappings(models.RosterTransaction, [
+        {"player_id": player_id, "kind": kind, "from_team_id": from_team, "to_team_id": to_team, "created_at": when}
+        for player_id, kind, from_team, to_team in changes
+    ])
+    for player_id, kind, from_team, to_team in changes:
+        logger.info(f"Roster {kind}: player {player_id} {from_team} -> {to_team}")
@@ -0,0 +1,160 @@
+"""
+Response schemas for the read endpoints.
+
+Endpoints select exactly these columns (see columns()) and build plain dicts from the
+row tuples, so no ORM objects are created and no relationship can lazy-load while
+the response is being serialized.
+
+The endpoints return pre-rendered bytes, which FastAPI passes through without looking
+at response_model, so render() does that validation itself: once per cached body, not
+once per request.
+"""
+from typing import Dict, List, Optional
+import datetime
+from pydantic import BaseModel, TypeAdapter
+
+class PlayerOut(BaseModel):
+    id: int
+    fullName: Optional[str] = None
+    position: Optional[str] = None
+    proTeam: Optional[str] = None
+    ownership: Optional[float] = None
+    avg_points: Optional[float] = None
+    total_points: Optional[float] = None
+    team_id: Optional[int] = None
+    status: Optional[str] = None
+    injury_detail: Optional[str] = None
+    salary: Optional[str] = None
+    salary_value: Optional[float] = None
+    contract_years: Optional[str] = None
+    lineup_slot: Optional[str] = None
+    goals: Optional[float] = None
+    assists: Optional[float] = None
+    ppp: Optional[float] = None
+    shp: Optional[float] = None
+    sog: Optional[float] = None
+    hits: Optional[float] = None
+    blocks: Optional[float] = None
+    plus_minus: Optional[float] = None
+    last_updated: Optional[datetime.datetime] = None
+
+class PlayerDetailOut(PlayerOut):
+    # Categories without a column of their own (goalie stats, PIM, ...), see stat_registry
+    stats: Dict[str, float] = {}
+
+class TeamOut(BaseModel):
+    id: int
+    name: Optional[str] = None
+    owner: Optional[str] = None
+    rank: Optional[int] = None
+    wins: Optional[int] = None
+    losses: Optional[int] = None
+    ties: Optional[int] = None
+    points: Optional[float] = None
+    goals: Optional[float] = None
+    assists: Optional[float] = None
+    ppp: Optional[float] = None
+    shp: Optional[float] = None
+    sog: Optional[float] = None
+    hits: Optional[float] = None
+    blocks: Optional[float] = None
+    pim: Optional[float] = None
+    players: List[PlayerOut] = []
+
+class PlayerSnapshotOut(BaseModel):
+    id: int
+    player_id: Optional[int] = None
+    date: Optional[datetime.datetime] = None
+    day: Optional[str] = None
+    lineup_slot: Optional[str] = None
+    total_points: Optional[float] = None
+    goals: Optional[float] = None
+    assists: Optional[float] = None
+    ppp: Optional[float] = None
+    shp: Optional[float] = None
+    sog: Optional[float] = None
+    hits: Optional[float] = None
+    blocks: Optional[float] = None
+    plus_minus: Optional[float] = None
+    salary: Optional[str] = None
+    salary_value: Optional[float] = None
+    contract_years: Optional[str] = None
+    stats: Optional[Dict[str, float]] = None # only with ?stats=true
+
+class SalaryOut(BaseModel):
+    id: int
+    fullName: Optional[str] = None
+    proTeam: Optional[str] = None
+    position: Optional[str] = None
+    salary: Optional[str] = None
+    salary_value: Optional[float] = None
+    contract_years: Optional[str] = None
+    total_points: Optional[float] = None
+
+class PlayerSearchOut(BaseModel):
+    id: int
+    fullName: Optional[str] = None
+    position: Optional[str] = None
+    proTeam: Optional[str] = None
+    team_id: Optional[int] = None
+    total_points: Optional[float] = None
+    ownership: Optional[float] = None
+
+class ContractOut(BaseModel):
+    id: int
+    player_id: int
+    salary: Optional[str] = None
+    salary_value: Optional[float] = None
+    contract_years: Optional[str] = None
+    effective_from: str
+    effective_to: Optional[str] = None
+    source: Optional[str] = None
+
+class TransactionOut(BaseModel):
+    id: int
+    player_id: Optional[int] = None
+    fullName: Optional[str] = None
+    kind: str
+    from_team_id: Optional[int] = None
+    to_team_id: Optional[int] = None
+    created_at: Optional[datetime.datetime] = None
+
+class ProjectionOut(BaseModel):
+    player_id: int
+    games: Optional[int] = None
+    goals: Optional[float] = None # per game, as are the stats below
+    assists: Optional[float] = None
+    ppp: Optional[float] = None
+    shp: Optional[float] = None
+    sog: Optional[float] = None
+    hits: Optional[float] = None
+    blocks: Optional[float] = None
+    plus_minus: Optional[float] = None
+    points_per_game: Optional[float] = None
+    remaining_games: Optional[float] = None
+    projected_points: Optional[float] = None
+    computed_at: Optional[datetime.datetime] = None
+    # From players
+    fullName: Optional[str] = None
+    position: Optional[str] = None
+    team_id: Optional[int] = None
+    total_points: Optional[float] = None
+
+def columns(model, schema, exclude=()):
+    """ORM columns of `model` named like the fields of `schema`, in field order"""
+    return [getattr(model, name) for name in schema.model_fields if name not in exclude]
+
+def rows_to_dicts(rows):
+    return [dict(r._mapping) for r in rows]
+
+_adapters = {}
+
+def render(schema, data):
+    """
+    JSON bytes for `data` (dicts) checked against `schema` (a model or List[model]) the
+    way response_model would: a wrong type raises, fields the schema doesn't declare are dropped.
+    """
+    adapter = _adapters.get(schema)
+    if adapter is None:
+        adapter = _adapters[schema] = TypeAdapter(schema)
+    return adapter.dump_json(adapter.validate_python(data))
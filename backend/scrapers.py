@@ -1,7 +1,7 @@
-import requests
 import re
 import json
 import logging
+import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -17,7 +17,7 @@ def fetch_cbs_injuries():
     
     try:
         logger.info(f"Fetching injuries from {url}")
-        resp = requests.get(url, headers=headers, timeout=15)
+        resp = http_client.get(url, headers=headers)
         if resp.status_code != 200:
             logger.error(f"Failed to fetch CBS injuries: {resp.status_code}")
             return {}
@@ -48,6 +48,8 @@ def fetch_cbs_injuries():
         logger.info(f"Successfully scraped {len(injury_map)} injuries from CBS")
         return injury_map
         
+    except http_client.MissingPayload:
+        raise
     except Exception as e:
         logger.error(f"Scraper error: {e}")
         return {}
@@ -0,0 +1,215 @@
+"""
+Monte Carlo playoff odds and weekly matchup win probabilities.
+
+Each starter's fantasy points per game are drawn from their own game log (snapshot
+deltas priced with the league scoring map, see projections.game_log). Players with
+fewer than MIN_GAMES games draw from every game played at their position instead.
+Only players in an active lineup slot score for their team.
+
+Season: every starter plays the team's remaining games; teams finish on their current
+points plus the simulated rest and the top `playoff_teams` get in.
+Week: every starter plays each of the next 7 days with the league's games-per-day
+rate, and every pair of teams is compared as if they met that week.
+
+Simulations run in fixed-size shards seeded from SeedSequence(seed).spawn(), so the
+result depends only on the seed and simulation count, not on how many worker processes
+the shards are spread over.
+"""
+import datetime
+import logging
+import time
+import numpy as np
+import worker_pool
+
+logger = logging.getLogger(__name__)
+
+SHARD_SIZE = 2000 # simulations per task
+MAX_SIMS = 100000
+MIN_GAMES = 5 # below this a player samples from all games at their position
+WEEK_DAYS = 7
+BENCH_SLOTS = ("BE", "Bench", "BN", "IR")
+
+class _Sampler:
+    """
+    Draws one game per player per simulation, (sims, players) at a time. float32 and
+    reused buffers: this loop is nearly all of the simulation's run time.
+    """
+    def __init__(self, rng, values, offsets, counts, shape):
+        self.rng = rng
+        self.values = values.astype(np.float32)
+        self.offsets = offsets.astype(np.int32)
+        self.counts = counts.astype(np.float32)
+        self._u = np.empty(shape, dtype=np.float32)
+        self._idx = np.empty(shape, dtype=np.int32)
+
+    def draw(self):
+        self.rng.random(out=self._u, dtype=np.float32)
+        np.multiply(self._u, self.counts, out=self._u)
+        self._idx[...] = self._u
+        self._idx += self.offsets
+        return np.take(self.values, self._idx)
+
+    def uniform(self):
+        return self.rng.random(self._u.shape, dtype=np.float32)
+
+def simulate_shard(task):
+    """
+    Runs one shard. Pure numpy on the arrays in `task`, so it can run in a worker process.
+    Returns sums/counts that add up across shards, plus the raw finishing and weekly points.
+    """
+    sims = task["sims"]
+    team_of = task["team_of"] # (players, teams) one-hot
+    n_players = team_of.shape[0]
+    sampler = _Sampler(np.random.default_rng(task["seed"]), task["values"], task["offsets"], task["counts"],
+                       (sims, n_players))
+
+    season = np.zeros((sims, n_players), dtype=np.float32)
+    for _ in range(task["season_games"]):
+        season += sampler.draw()
+    finals = task["current_points"] + season.astype(float) @ team_of
+
+    week = np.zeros((sims, n_players), dtype=np.float32)
+    for _ in range(WEEK_DAYS):
+        plays = sampler.uniform() < task["games_per_day"]
+        week += plays * sampler.draw()
+    week_points = week.astype(float) @ team_of
+
+    # rank 0 is first place
+    ranks = np.argsort(np.argsort(-finals, axis=1), axis=1)
+    wins = (week_points[:, :, None] > week_points[:, None, :]).sum(axis=0) \
+        + 0.5 * (week_points[:, :, None] == week_points[:, None, :]).sum(axis=0)
+    return {
+        "playoffs": (ranks < task["playoff_teams"]).sum(axis=0),
+        "first": (ranks == 0).sum(axis=0),
+        "rank_sum": ranks.sum(axis=0),
+        "wins": wins,
+        "finals": finals,
+        "week_points": week_points,
+    }
+
+def _load(db, scoring_map, now):
+    """Teams, starters and the flat array of per-game points every draw indexes into"""
+    from sqlalchemy import select
+    import models
+    import projections
+
+    conn = db.connection()
+    teams = conn.execute(select(models.LeagueTeam.id, models.LeagueTeam.name, models.LeagueTeam.points)
+                         .order_by(models.LeagueTeam.id)).all()
+    players = conn.execute(select(models.Player.id, models.Player.position, models.Player.team_id,
+                                  models.Player.lineup_slot)).all()
+    owner, deltas, row_games = projections.game_log(projections.load_snapshots(conn, now), [p.id for p in players])
+    deltas = projections.fill_unknown(owner, deltas, row_games, len(players))
+    # One draw per game: an interval covering several games repeats its per-game points
+    row_games = row_games.astype(np.int64)
+    owner = np.repeat(owner, row_games)
+    points = np.repeat(deltas @ projections.points_weights(scoring_map), row_games)
+
+    # Group games by player: player i's games are values[start[i]:start[i] + games[i]]
+    order = np.argsort(owner, kind="stable")
+    values = [points[order]]
+    games = np.bincount(owner, minlength=len(players))
+    start = np.cumsum(games) - games
+
+    # Pools of every game played at each position, appended after the players' own games
+    positions = np.array([p.position or "" for p in players], dtype=object)
+    offset = len(values[0])
+    pools = {}
+    for position in set(positions):
+        pool = points[positions[owner] == position] if len(owner) else np.zeros(0)
+        if len(pool):
+            pools[position] = (offset, len(pool))
+            values.append(pool)
+            offset += len(pool)
+    values.append(np.zeros(1)) # for players with nothing to sample from at all
+    empty = (offset, 1)
+
+    team_index = {t.id: i for i, t in enumerate(teams)}
+    starters, offsets, counts = [], [], []
+    for i, p in enumerate(players):
+        if p.team_id not in team_index or (p.lineup_slot or "BE") in BENCH_SLOTS:
+            continue
+        if games[i] >= MIN_GAMES:
+            segment = (start[i], games[i])
+        else:
+            segment = pools.get(p.position or "", empty)
+        starters.append(p)
+        offsets.append(segment[0])
+        counts.append(segment[1])
+
+    team_of = np.zeros((len(starters), len(teams)))
+    for row, p in enumerate(starters):
+        team_of[row, team_index[p.team_id]] = 1.0
+    return teams, np.concatenate(values), np.array(offsets, dtype=np.int64), np.array(counts, dtype=float), team_of
+
+def run(db, scoring_map, sims=20000, seed=0, playoff_teams=4, now=None):
+    """Simulates the rest of the season and next week. Returns per-team odds and the matchup matrix."""
+    import projections
+
+    now = now or datetime.datetime.utcnow()
+    sims = max(1, min(int(sims), MAX_SIMS))
+    started = time.perf_counter()
+    teams, values, offsets, counts, team_of = _load(db, scoring_map, now)
+    if not teams:
+        return {"sims": 0, "seed": seed, "teams": [], "matchups": {"team_ids": [], "win_probability": []}}
+    playoff_teams = max(1, min(int(playoff_teams), len(teams)))
+
+    shard_sizes = [SHARD_SIZE] * (sims // SHARD_SIZE) + ([sims % SHARD_SIZE] if sims % SHARD_SIZE else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(shard_sizes))
+    common = {
+        "values": values, "offsets": offsets, "counts": counts, "team_of": team_of,
+        "current_points": np.array([t.points or 0.0 for t in teams]),
+        "season_games": int(round(projections.remaining_games(now.date()))),
+        "games_per_day": projections.games_per_day(now.date()),
+        "playoff_teams": playoff_teams,
+    }
+    tasks = [dict(common, seed=s, sims=n) for s, n in zip(seeds, shard_sizes)]
+    loaded = time.perf_counter()
+
+    if worker_pool.WORKERS > 1 and len(tasks) > 1:
+        results = list(worker_pool.executor().map(simulate_shard, tasks))
+    else:
+        results = [simulate_shard(t) for t in tasks]
+
+    finals = np.concatenate([r["finals"] for r in results])
+    week_points = np.concatenate([r["week_points"] for r in results])
+    playoffs = sum(r["playoffs"] for r in results)
+    first = sum(r["first"] for r in results)
+    rank_sum = sum(r["rank_sum"] for r in results)
+    wins = sum(r["wins"] for r in results)
+
+    p10, p90 = np.percentile(finals, [10, 90], axis=0)
+    w10, w90 = np.percentile(week_points, [10, 90], axis=0)
+    team_rows = []
+    for i, t in enumerate(teams):
+        team_rows.append({
+            "team_id": t.id, "name": t.name, "points": t.points,
+            "projected_points": round(float(finals[:, i].mean()), 1),
+            "projected_points_p10": round(float(p10[i]), 1),
+            "projected_points_p90": round(float(p90[i]), 1),
+            "mean_rank": round(float(rank_sum[i]) / sims + 1, 2),
+            "playoff_odds": round(float(playoffs[i]) / sims, 4),
+            "first_place_odds": round(float(first[i]) / sims, 4),
+            "week_points": round(float(week_points[:, i].mean()), 1),
+            "week_points_p10": round(float(w10[i]), 1),
+            "week_points_p90": round(float(w90[i]), 1),
+        })
+    team_rows.sort(key=lambda r: (-r["playoff_odds"], r["mean_rank"]))
+
+    win_probability = np.round(wins / sims, 4).tolist()
+    for i in range(len(teams)):
+        win_probability[i][i] = None
+
+    elapsed = time.perf_counter() - started
+    logger.info(f"Simulated {sims} seasons over {len(tasks)} shards in {elapsed:.2f}s (load {loaded - started:.2f}s)")
+    return {
+        "sims": sims,
+        "seed": seed,
+        "playoff_teams": playoff_teams,
+        "season_games": common["season_games"],
+        "starters": len(offsets),
+        "elapsed_s": round(elapsed, 3),
+        "teams": team_rows,
+        # win_probability[i][j]: team_ids[i] outscores team_ids[j] over a week
+        "matchups": {"team_ids": [t.id for t in teams], "win_probability": win_probability},
+    }
@@ -0,0 +1,278 @@
+import contextlib
+import datetime
+import logging
+from sqlalchemy import delete, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+import free_agent_sync
+import models
+import roster_diff
+import stat_registry
+import sync_events
+
+logger = logging.getLogger(__name__)
+
+# Player columns the sync owns. Salary/contract columns are managed by the salary
+# tools and are never overwritten here.
+PLAYER_SYNC_COLUMNS = (
+    "fullName", "position", "proTeam", "status", "injury_detail", "ownership", "team_id", "lineup_slot",
+    "goals", "assists", "ppp", "shp", "sog", "hits", "blocks", "plus_minus", "stats", "total_points", "last_updated",
+)
+TEAM_SYNC_COLUMNS = (
+    "name", "rank", "wins", "losses", "ties", "points",
+    "goals", "assists", "ppp", "shp", "sog", "hits", "blocks", "pim",
+)
+SNAPSHOT_STATS = ("total_points", "goals", "assists", "ppp", "shp", "sog", "hits", "blocks", "plus_minus", "stats")
+SNAPSHOT_UPDATE_COLUMNS = ("date", "lineup_slot", "salary", "salary_value", "contract_years") + SNAPSHOT_STATS
+
+def season_totals(p, year):
+    """
+    Season-to-date totals for the league's season from an espn_api player. Stats are
+    keyed 'Total <season>'; a player with nothing for this season has no totals yet,
+    whatever other seasons ESPN sent along.
+    """
+    stats = getattr(p, 'stats', None) or {}
+    return (stats.get(f"Total {year}") or {}).get('total') or {}
+
+def player_row(p, scoring_map, injury_map, ownership_map, team_id, now, year):
+    """Flattens an espn_api player into a `players` row"""
+    stats_dict = season_totals(p, year)
+
+    row = {
+        "id": p.playerId,
+        "fullName": p.name,
+        "position": p.position,
+        "proTeam": p.proTeam,
+        "status": p.injuryStatus,
+        "injury_detail": injury_map.get(p.name),
+        # Use map if available, fallback to getattr
+        "ownership": ownership_map.get(p.playerId, getattr(p, 'percentOwned', 0)),
+        "team_id": team_id,
+        "lineup_slot": getattr(p, 'lineupSlot', 'BE'), # Default to bench if not found, though usually 'BE' is explicit
+        # Granular Stats
+        "goals": stats_dict.get('G', 0),
+        "assists": stats_dict.get('A', 0),
+        "ppp": stats_dict.get('PPP', 0),
+        "shp": stats_dict.get('SHP', 0),
+        "sog": stats_dict.get('SOG', 0),
+        "hits": stats_dict.get('HIT', 0),
+        # BLK Fix: Check for both 'BLK' (mapped) and '32' (raw ID)
+        "blocks": stats_dict.get('BLK', stats_dict.get('32', 0)),
+        "plus_minus": stats_dict.get('+/-', 0),
+        # Goalie and the other non-column categories
+        "stats": stat_registry.pack(stats_dict),
+        "last_updated": now,
+    }
+
+    # Fantasy Points: Calculate dynamically based on league settings.
+    # PPP is "Power Play Points" so it stacks on top of G/A, same as ESPN points leagues.
+    calculated_points = 0.0
+    for key, points_per_stat in scoring_map.items():
+        calculated_points += stats_dict.get(key, 0) * points_per_stat
+
+    # Fallback if map is empty (though it shouldn't be)
+    if not scoring_map:
+         calculated_points = stats_dict.get('16', row["goals"] + row["assists"])
+
+    row["total_points"] = calculated_points
+    return row
+
+def team_row(team, scoring_map):
+    """Flattens an espn_api team into a `league_teams` row"""
+    row = {"id": team.team_id, "name": team.team_name, "rank": getattr(team, 'standing_playoff', team.standing)}
+
+    wins = getattr(team, 'wins', 0)
+    losses = getattr(team, 'losses', 0)
+    ties = getattr(team, 'ties', 0)
+
+    if wins == 0 and hasattr(team, 'stats'):
+         wins = team.stats.get('W', 0)
+         losses = team.stats.get('L', 0)
+         ties = team.stats.get('T', 0)
+
+    row.update(wins=wins, losses=losses, ties=ties)
+
+    # Points Logic: Calculate team points from their cumulative stats
+    team_fantasy_points = 0.0
+    if hasattr(team, 'stats'):
+        for stat_key, pts_per_stat in scoring_map.items():
+            team_fantasy_points += team.stats.get(stat_key, 0) * pts_per_stat
+
+    if team_fantasy_points == 0:
+        team_fantasy_points = getattr(team, 'points', getattr(team, 'total_points', 0))
+
+    row["points"] = team_fantasy_points
+
+    # Populate Team Granular Stats
+    if hasattr(team, 'stats'):
+        ts = team.stats
+        row.update(
+            goals=ts.get('G', 0), assists=ts.get('A', 0), ppp=ts.get('PPP', 0), shp=ts.get('SHP', 0),
+            sog=ts.get('SOG', 0), hits=ts.get('HIT', 0), blocks=ts.get('BLK', 0), pim=ts.get('PIM', 0),
+        )
+    return row
+
+def _upsert(db: Session, model, rows, update_columns, conflict_columns=("id",)):
+    """INSERT ... ON CONFLICT (conflict_columns) DO UPDATE for the given rows in one statement"""
+    if not rows:
+        return
+    # database.py only accepts Postgres and SQLite, which share the ON CONFLICT syntax
+    insert_ = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    stmt = insert_(model.__table__)
+    # Every row must carry the same keys for a multi-row insert
+    keys = set().union(*(r.keys() for r in rows))
+    rows = [{k: r.get(k) for k in keys} for r in rows]
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(conflict_columns),
+        set_={c: stmt.excluded[c] for c in update_columns if c in keys},
+    )
+    db.execute(stmt, rows)
+
+class StagedSync:
+    """
+    Collects the full new league state in memory, then publishes it in one short
+    transaction made of bulk statements. Building never touches the live tables, so
+    readers keep seeing the previous sync until the single commit swaps everything in.
+
+    A team that fails to build is left exactly as it was (rows, roster and snapshot),
+    instead of failing the whole sync.
+    """
+    def __init__(self, scoring_map, injury_map, ownership_map, year, now=None):
+        self.scoring_map = scoring_map
+        self.year = year # league season, picks the 'Total <year>' stats
+        self.injury_map = injury_map
+        self.ownership_map = ownership_map
+        self.now = now or datetime.datetime.utcnow()
+        self.day = self.now.strftime('%Y-%m-%d')
+        self.teams = []
+        self.players = {} # id -> row, rostered players win over free agent rows
+        self.owners = {} # id -> team_id for everyone on a roster
+        self.failed_team_ids = set()
+        self.summary = None # sync_events change summary, set by publish
+        self.fa_rotation = None # free_agent_sync cursor, saved with the rest
+
+    def add_team(self, team):
+        try:
+            t_row = team_row(team, self.scoring_map)
+            rows = [player_row(p, self.scoring_map, self.injury_map, self.ownership_map, team.team_id, self.now, self.year)
+                    for p in team.roster]
+        except Exception as e:
+            logger.error(f"Error building team {getattr(team, 'team_id', '?')}, keeping its previous state: {e}")
+            self.failed_team_ids.add(getattr(team, 'team_id', None))
+            return False
+
+        self.teams.append(t_row)
+        for row in rows:
+            self.players[row["id"]] = row
+            self.owners[row["id"]] = team.team_id
+        return True
+
+    def add_free_agents(self, players):
+        for p in players:
+            if p.playerId in self.owners:
+                continue
+            try:
+                self.players[p.playerId] = player_row(p, self.scoring_map, self.injury_map, self.ownership_map, None, self.now, self.year)
+            except Exception as e:
+                logger.error(f"Error building player {getattr(p, 'name', p)}: {e}")
+
+    def publish(self, db: Session):
+        """
+        Applies the staged state and commits. Returns the roster changes applied.
+        Everything runs as a handful of bulk statements so row locks are held only briefly.
+        """
+        player_ids = list(self.players)
+        team_ids = [t["id"] for t in self.teams]
+
+        # Current rows: salaries (maintained outside the sync) are copied into snapshots,
+        # the rest is compared against the new rows for the change summary
+        previous_players, previous_teams = {}, {}
+        if player_ids:
+            columns = [models.Player.id, models.Player.salary, models.Player.salary_value, models.Player.contract_years]
+            columns += [getattr(models.Player, f) for f in sync_events.PLAYER_FIELDS]
+            previous_players = {r.id: r for r in db.query(*columns).filter(models.Player.id.in_(player_ids)).all()}
+        if team_ids:
+            columns = [models.LeagueTeam.id] + [getattr(models.LeagueTeam, f) for f in sync_events.TEAM_FIELDS]
+            previous_teams = {r.id: r for r in db.query(*columns).filter(models.LeagueTeam.id.in_(team_ids)).all()}
+
+        previous_owners = roster_diff.load_owners(db)
+        # Players of a team that failed to build stay where they are
+        previous_owners = {pid: tid for pid, tid in previous_owners.items() if tid not in self.failed_team_ids}
+
+        _upsert(db, models.LeagueTeam, self.teams, TEAM_SYNC_COLUMNS)
+        _upsert(db, models.Player, list(self.players.values()), PLAYER_SYNC_COLUMNS)
+
+        changes = roster_diff.diff_rosters(previous_owners, self.owners)
+        roster_diff.apply_drops(db, changes)
+        # On the very first sync everyone would look like an add, that's not history
+        if previous_owners:
+            roster_diff.record_transactions(db, changes, self.now)
+
+        # Daily snapshots: replace today's rows for everything in this sync
+        if team_ids:
+            db.execute(delete(models.TeamSnapshot).where(
+                models.TeamSnapshot.day == self.day, models.TeamSnapshot.team_id.in_(team_ids)))
+            db.execute(insert(models.TeamSnapshot), [
+                {"team_id": t["id"], "day": self.day, "date": self.now, "points": t["points"]} for t in self.teams
+            ])
+        if player_ids:
+            snaps = []
+            for row in self.players.values():
+                salary = previous_players.get(row["id"])
+                snap = {"player_id": row["id"], "day": self.day, "date": self.now, "lineup_slot": row["lineup_slot"],
+                        "salary": salary.salary if salary else None,
+                        "salary_value": salary.salary_value if salary else None,
+                        "contract_years": salary.contract_years if salary else None}
+                snap.update({k: row[k] for k in SNAPSHOT_STATS})
+                snaps.append(snap)
+            # Today's row is updated in place by every sync of the day, keeping its id
+            _upsert(db, models.PlayerSnapshot, snaps, SNAPSHOT_UPDATE_COLUMNS, conflict_columns=("player_id", "day"))
+
+        if self.fa_rotation is not None:
+            free_agent_sync.save_state(db, self.fa_rotation)
+        db.commit()
+        self.summary = sync_events.summarize(self.day, previous_players, self.players.values(),
+                                             previous_teams, self.teams, changes)
+        return changes
+
+@contextlib.contextmanager
+def _untimed(phase):
+    yield
+
+def run_sync(client, fetch_injuries, db: Session, now=None, timed=_untimed, fa_plan=None):
+    """
+    Fetches everything from `client` (a connected FantasyClient) and `fetch_injuries`,
+    stages it and publishes it. Used by the live sync and by payload replay.
+    `timed(phase)` is a context manager used to time each phase.
+    `fa_plan` is passed on to free_agent_sync.fetch().
+    Returns the StagedSync that was published.
+    """
+    # Fetch everything first; nothing below touches the database until publish
+    with timed("fetch_scoring"):
+        scoring_map = client.fetch_scoring_settings()
+    with timed("fetch_standings"):
+        standings = client.get_standings()
+    with timed("fetch_injuries"):
+        injury_map = fetch_injuries()
+    with timed("fetch_ownership"):
+        ownership_map = client.fetch_ownership()
+    with timed("fetch_free_agents"):
+        # A few pages per sync, the whole pool over several (free_agent_sync)
+        fas, fa_rotation = free_agent_sync.fetch(client, db, ownership_map, now or datetime.datetime.utcnow(),
+                                                 plan=fa_plan)
+
+    # Stage the new league state in memory, one team at a time
+    with timed("build"):
+        staged = StagedSync(scoring_map, injury_map, ownership_map, client.year, now=now)
+        for team in standings:
+            staged.add_team(team)
+        staged.add_free_agents(fas)
+        staged.fa_rotation = fa_rotation
+
+    if standings and not staged.teams:
+        raise RuntimeError("Every team failed to build, nothing to publish")
+
+    # Swap it in with one short transaction
+    with timed("publish"):
+        staged.publish(db)
+    return staged
@@ -0,0 +1,85 @@
+"""
+Stat categories stored for players and snapshots.
+
+The hot skater categories keep their own columns (HOT): they are what the dashboard,
+history charts and sorting read, so those queries are plain column reads. Every other
+category ESPN reports (goalie stats, PIM, GWG, ...) is packed into the `stats` column
+as a little-endian float32 array in EXTRA order.
+
+To add a category append its ESPN key to EXTRA. Never reorder or remove entries:
+stored vectors are positional. Vectors written before a category existed are
+shorter, and rows from before vectors existed have none: those categories read back
+as unknown (NaN from matrix(), left out by unpack()), never as 0, so differencing a
+row against an older one can't turn a whole season total into one day's production.
+
+matrix() turns hot columns plus vectors into one (rows, len(KEYS)) array in KEYS
+order without touching rows one category at a time, which is the read path for
+projections and simulations.
+"""
+import struct
+
+# (column, ESPN stat key)
+HOT = (
+    ("goals", "G"), ("assists", "A"), ("ppp", "PPP"), ("shp", "SHP"),
+    ("sog", "SOG"), ("hits", "HIT"), ("blocks", "BLK"), ("plus_minus", "+/-"),
+)
+# Append only. Ratios (GAA, SV%) are derived, not stored: they can't be summed or differenced.
+EXTRA = (
+    "GP", "W", "L", "OTL", "SO", "SV", "SA", "GA",
+    "PIM", "GWG", "PPG", "PPA", "SHG", "SHA", "FOW", "FOL", "HAT", "DEF",
+)
+KEYS = tuple(key for _, key in HOT) + EXTRA
+INDEX = {key: i for i, key in enumerate(KEYS)}
+HOT_COLUMNS = tuple(column for column, _ in HOT)
+COLUMN_OF = {key: column for column, key in HOT}
+
+# struct for single rows so the sync doesn't need numpy; matrix() uses the same layout
+_FORMAT = f"<{len(EXTRA)}f"
+WIDTH = struct.calcsize(_FORMAT)
+DTYPE = "<f4"
+NAN = float("nan")
+
+def pack(stats):
+    """EXTRA categories of an ESPN stats dict ({'W': 12, ...}) as a stats column value"""
+    return struct.pack(_FORMAT, *[float(stats.get(key) or 0) for key in EXTRA])
+
+def _vector(blob):
+    if not blob:
+        return [NAN] * len(EXTRA)
+    # Stored by an older registry (shorter) or a newer one (longer): pad or cut to EXTRA
+    count = min(len(blob) // 4, len(EXTRA))
+    return list(struct.unpack_from(f"<{count}f", blob)) + [NAN] * (len(EXTRA) - count)
+
+def unpack(blob):
+    """Stats column value back to {key: value} for EXTRA, leaving out anything it predates"""
+    return {key: value for key, value in zip(EXTRA, _vector(blob)) if value == value}
+
+def columns(model):
+    """Columns to select for matrix(): the hot columns, then the vector"""
+    return [getattr(model, c) for c in HOT_COLUMNS] + [model.stats]
+
+def matrix(rows, skip=0):
+    """
+    rows: tuples whose values from index `skip` on are columns(model).
+    Returns float64 (len(rows), len(KEYS)) in KEYS order; missing values are NaN.
+    """
+    import numpy as np
+    n_hot = len(HOT)
+    out = np.full((len(rows), len(KEYS)), np.nan)
+    if not len(rows):
+        return out
+    hot = [r[skip:skip + n_hot] for r in rows]
+    out[:, :n_hot] = np.array(hot, dtype=float) # None -> NaN
+
+    blobs = [r[skip + n_hot] for r in rows]
+    full = [i for i, b in enumerate(blobs) if b is not None and len(b) == WIDTH]
+    if len(full) == len(rows):
+        # Usual case, every vector written by the current registry: one buffer, one reshape
+        out[:, n_hot:] = np.frombuffer(b"".join(blobs), dtype=DTYPE).reshape(len(rows), len(EXTRA))
+        return out
+    if full:
+        out[full, n_hot:] = np.frombuffer(b"".join(blobs[i] for i in full), dtype=DTYPE).reshape(len(full), len(EXTRA))
+    for i, blob in enumerate(blobs):
+        if blob and len(blob) != WIDTH:
+            out[i, n_hot:] = _vector(blob)
+    return out
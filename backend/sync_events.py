@@ -0,0 +1,180 @@
+"""
+Change summaries of each sync, pushed to dashboards over server-sent events.
+
+StagedSync.publish builds a summary (changed players, team point deltas, new
+injuries, roster moves) which sync_data stores on its sync_runs row. Every worker
+runs one poller, only while it has clients connected, that picks up new rows and fans
+them out to its /api/events streams. Syncs can finish in any worker and clients
+connect to any worker, so the database is the channel between them.
+
+Clients refetch when an event arrives, from any worker, and each worker only
+re-checks the cache generation every response_cache.CHECK_INTERVAL. sync_data bumps
+the generation before it finishes the run, so a run is only sent once it has been
+finished for that long: by then no worker can still answer from its old cache.
+"""
+import asyncio
+import datetime
+import logging
+import os
+from sqlalchemy import select
+from database import AsyncSessionLocal
+import models
+import response_cache
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = float(os.getenv("EVENTS_POLL_INTERVAL", 2)) # seconds between sync_runs checks
+KEEPALIVE = 15 # seconds; keeps proxies from closing an idle stream
+BACKLOG = 20 # missed syncs a reconnecting client can catch up on before it's told to reload
+QUEUE_SIZE = 10 # pending events per client before it's considered too slow and told to reload
+SETTLE = datetime.timedelta(seconds=response_cache.CHECK_INTERVAL) # finished this long before it's sent
+
+# Columns compared to decide whether a player or team changed. Ownership moves a
+# little on every sync for almost everyone, so it is left out.
+PLAYER_FIELDS = ("total_points", "goals", "assists", "ppp", "shp", "sog", "hits", "blocks", "plus_minus",
+                 "status", "injury_detail", "lineup_slot", "team_id")
+TEAM_FIELDS = ("points", "rank", "wins", "losses", "ties")
+HEALTHY = (None, "", "ACTIVE", "NORMAL")
+
+def summarize(day, previous_players, players, previous_teams, teams, changes):
+    """
+    previous_players/previous_teams: id -> row (mapping or Row) as stored before the sync.
+    players/teams: the new rows. changes: roster_diff tuples.
+    Only fields that changed are included for each player; teams carry their new points and delta.
+    """
+    changed_players = []
+    injuries = []
+    for row in players:
+        before = previous_players.get(row["id"])
+        if before is None:
+            diff = {f: row.get(f) for f in PLAYER_FIELDS}
+        else:
+            diff = {f: row.get(f) for f in PLAYER_FIELDS if getattr(before, f, None) != row.get(f)}
+        if not diff:
+            continue
+        diff["id"] = row["id"]
+        changed_players.append(diff)
+
+        status = row.get("status")
+        if status not in HEALTHY and "status" in diff:
+            injuries.append({"player_id": row["id"], "name": row.get("fullName"), "status": status,
+                             "detail": row.get("injury_detail"), "team_id": row.get("team_id")})
+
+    changed_teams = []
+    for row in teams:
+        before = previous_teams.get(row["id"])
+        diff = {f: row.get(f) for f in TEAM_FIELDS if before is None or getattr(before, f, None) != row.get(f)}
+        if not diff:
+            continue
+        previous_points = getattr(before, "points", None) or 0
+        diff.update(id=row["id"], name=row.get("name"), points=row.get("points"),
+                    delta=round((row.get("points") or 0) - previous_points, 2))
+        changed_teams.append(diff)
+
+    return {
+        "day": day,
+        "players": changed_players,
+        "teams": changed_teams,
+        "injuries": injuries,
+        "moves": [{"player_id": pid, "kind": kind, "from_team_id": from_team, "to_team_id": to_team}
+                  for pid, kind, from_team, to_team in changes],
+    }
+
+def _frame(event, data, event_id=None):
+    """One SSE message. `data` is already JSON without newlines."""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {data}\n\n".encode()
+
+RESYNC = _frame("resync", "{}")
+
+def _settled():
+    return models.SyncRun.finished_at <= datetime.datetime.utcnow() - SETTLE
+
+async def _runs_after(run_id, limit):
+    """Successful runs after run_id that have settled (see SETTLE), oldest first"""
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(
+            select(models.SyncRun.id, models.SyncRun.summary)
+            .where(models.SyncRun.id > run_id, models.SyncRun.success == True, models.SyncRun.summary != None,
+                   _settled())
+            .order_by(models.SyncRun.id.asc()).limit(limit)
+        )).all()
+
+async def _latest_run_id():
+    # A run still settling is newer than this, so it still reaches a client connecting now
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(
+            select(models.SyncRun.id).where(_settled()).order_by(models.SyncRun.id.desc()).limit(1)
+        )).scalar() or 0
+
+class SyncBroadcaster:
+    def __init__(self, poll_interval=POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        self._subscribers = set()
+        self._last_id = None
+        self._task = None
+
+    def _publish(self, event_id, frame):
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait((event_id, frame))
+            except asyncio.QueueFull:
+                # Too far behind to be worth catching up, have it reload instead
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait((None, RESYNC))
+
+    async def _poll(self):
+        try:
+            while self._subscribers:
+                await asyncio.sleep(self.poll_interval)
+                try:
+                    runs = await _runs_after(self._last_id, BACKLOG)
+                except Exception as e:
+                    logger.error(f"Could not poll sync runs for events: {e}")
+                    continue
+                for run in runs:
+                    self._last_id = run.id
+                    self._publish(run.id, _frame("sync", run.summary, run.id))
+        finally:
+            self._task = None
+
+    async def stream(self, last_event_id=None):
+        """Async generator of SSE frames for one client, until it disconnects"""
+        if self._task is None:
+            # No poller running, so _last_id is stale (or unset) from when the last client
+            # left: start from the newest run, catching up is what Last-Event-ID is for
+            latest = await _latest_run_id()
+            if self._task is None:
+                self._last_id = latest
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        # Subscribe before catching up so nothing published in between is lost
+        self._subscribers.add(queue)
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._poll())
+        try:
+            yield b"retry: 5000\n\n"
+            sent = last_event_id or 0
+            if last_event_id is not None:
+                missed = await _runs_after(last_event_id, BACKLOG + 1)
+                if len(missed) > BACKLOG:
+                    yield RESYNC
+                else:
+                    for run in missed:
+                        sent = run.id
+                        yield _frame("sync", run.summary, run.id)
+
+            while True:
+                try:
+                    event_id, frame = await asyncio.wait_for(queue.get(), KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                if event_id is not None and event_id <= sent:
+                    continue
+                sent = event_id or sent
+                yield frame
+        finally:
+            self._subscribers.discard(queue)
+
+broadcaster = SyncBroadcaster()
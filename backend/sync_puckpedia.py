@@ -1,5 +1,7 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine
 import os
+import sys
+import contracts
 
 # Data gathered via search
 SALARY_DATA = {
@@ -185,7 +187,15 @@ SALARY_DATA = {
     "Matthew Schaefer": ("$975,000", "2028"),
 }
 
-def sync(existing_engine=None):
+def _rows(path=None):
+    """Contract rows from a CSV/TSV export ("Full Name", "Cap Hit", "Years Left"), or SALARY_DATA"""
+    if path:
+        with open(path, encoding="utf-8-sig") as f:
+            return contracts.parse_csv(f.read())
+    return [{"name": name, "salary": salary_str, "salary_value": contracts.parse_salary(salary_str) if salary_str != "N/A" else 0.0,
+             "contract_years": expires} for name, (salary_str, expires) in SALARY_DATA.items()]
+
+def sync(existing_engine=None, path=None):
     # Use provided engine or create new one
     if existing_engine:
         engine = existing_engine
@@ -196,51 +206,18 @@ def sync(existing_engine=None):
         if url.startswith("postgres://"):
             url = url.replace("postgres://", "postgresql://", 1)
         engine = create_engine(url)
-    
-    count = 0
-    # If existing_engine is passed, we might be inside a transaction or not.
-    # To be safe and simple, we'll just connect. 
-    # If it's the main app's engine, we can use it directly.
-    
+
     try:
-        with engine.connect() as conn:
-            # If using an engine that requires explicit transactions (like some Postgres configs), we might need .begin()
-            # But engine.begin() is usually safer.
-            pass
-            
+        rows = _rows(path)
+        # One transaction: staged in a temp table and applied with a few joined statements
         with engine.begin() as conn:
-            for name, (salary_str, expires) in SALARY_DATA.items():
-                salary_val = 0.0
-                try:
-                    if salary_str and salary_str != "N/A":
-                        salary_val = float(salary_str.replace("$", "").replace(",", ""))
-                except:
-                    pass
-
-                # Update players table
-                res = conn.execute(
-                    text('UPDATE players SET salary = :s, salary_value = :sv, contract_years = :c WHERE "fullName" = :n'),
-                    {"s": salary_str, "sv": salary_val, "c": expires, "n": name}
-                )
-                
-                if res.rowcount > 0:
-                    count += 1
-                    # Update latest snapshot
-                    conn.execute(
-                        text("""
-                            UPDATE player_snapshots 
-                            SET salary = :s, salary_value = :sv, contract_years = :c 
-                            WHERE player_id = (SELECT id FROM players WHERE "fullName" = :n) 
-                            AND day = (SELECT MAX(day) FROM player_snapshots)
-                        """),
-                        {"s": salary_str, "sv": salary_val, "c": expires, "n": name}
-                    )
-
-        print(f"Successfully updated salary data for {count} players.")
+            result = contracts.ingest(conn, rows, source="puckpedia")
+        print(f"Successfully updated salary data for {result['matched']} players "
+              f"({result['changed']} contract changes, {result['unmatched']} names not found).")
+        return result
     except Exception as e:
         print(f"Error syncing salaries: {e}")
-        # If we didn't pass an engine, we created it, so maybe dispos? 
-        # But create_engine doesn't need explicit close usually.
 
 if __name__ == "__main__":
-    sync()
+    # python sync_puckpedia.py [contracts.csv]
+    sync(path=sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,61 @@
+import models
+import contracts
+
+def _players(db):
+    db.add_all([models.Player(id=1, fullName="Connor McDavid"), models.Player(id=2, fullName="Leon Draisaitl")])
+    db.commit()
+
+def _open(db, player_id):
+    return db.query(models.Contract).filter(models.Contract.player_id == player_id,
+                                            models.Contract.effective_to == None).one()
+
+def _versions(db, player_id):
+    return db.query(models.Contract).filter(models.Contract.player_id == player_id) \
+        .order_by(models.Contract.effective_from).all()
+
+def row(name=None, value=1_000_000, years="2", player_id=None):
+    return {"name": name, "player_id": player_id, "salary": f"${value:,}", "salary_value": float(value),
+            "contract_years": years}
+
+def test_ingest_opens_closes_and_copies_to_players(db):
+    _players(db)
+    conn = db.connection()
+    assert contracts.ingest(conn, [row("connor mcdavid", 12_500_000), row("Nobody")], day="2026-10-01") == \
+        {"matched": 1, "changed": 1, "unmatched": 1}
+    assert contracts.ingest(conn, [row("Connor McDavid", 16_000_000)], day="2026-10-05")["changed"] == 1
+    db.commit()
+    versions = _versions(db, 1)
+    assert [(v.salary_value, v.effective_from, v.effective_to) for v in versions] == [
+        (12_500_000, "2026-10-01", "2026-10-05"), (16_000_000, "2026-10-05", None)]
+    assert db.get(models.Player, 1).salary_value == 16_000_000
+    assert contracts.salaries_on(db.connection(), "2026-10-03") == {1: 12_500_000}
+
+def test_same_day_correction_replaces_the_version(db):
+    _players(db)
+    conn = db.connection()
+    contracts.ingest(conn, [row("Leon Draisaitl", 14_000_000)], day="2026-10-01")
+    contracts.ingest(conn, [row("Leon Draisaitl", 8_500_000)], day="2026-10-02")
+    contracts.ingest(conn, [row("Leon Draisaitl", 14_000_000)], day="2026-10-02") # the typo fixed
+    db.commit()
+    assert [(v.salary_value, v.effective_from, v.effective_to) for v in _versions(db, 2)] == [
+        (14_000_000, "2026-10-01", "2026-10-02"), (14_000_000, "2026-10-02", None)]
+
+def test_reimporting_the_same_file_changes_nothing(db):
+    _players(db)
+    conn = db.connection()
+    rows = [row("Connor McDavid", 12_500_000), row("Leon Draisaitl", 8_500_000)]
+    contracts.ingest(conn, rows, day="2026-10-01")
+    assert contracts.ingest(conn, rows, day="2026-10-09") == {"matched": 2, "changed": 0, "unmatched": 0}
+    db.commit()
+    assert db.query(models.Contract).count() == 2
+    assert _open(db, 1).effective_from == "2026-10-01"
+
+def test_a_player_listed_by_id_and_name_gets_one_contract(db):
+    _players(db)
+    conn = db.connection()
+    result = contracts.ingest(conn, [row("Connor McDavid", 12_500_000), row(player_id=1, value=13_000_000),
+                                     row(player_id=2, value=8_500_000)], day="2026-10-01")
+    db.commit()
+    assert result == {"matched": 2, "changed": 2, "unmatched": 0}
+    assert _open(db, 1).salary_value == 13_000_000 # the id row wins
+    assert _open(db, 2).salary_value == 8_500_000
@@ -0,0 +1,128 @@
+import datetime
+from types import SimpleNamespace
+import pytest
+import free_agent_sync
+import http_client
+import models
+
+NOW = datetime.datetime(2026, 10, 19, 12)
+
+class PoolClient:
+    """get_free_agents over a pool of `size` free agents ordered by ownership"""
+    def __init__(self, size, fail_offsets=()):
+        self.pool = [SimpleNamespace(playerId=1000 + i) for i in range(size)]
+        self.fail_offsets = set(fail_offsets)
+        self.calls = []
+
+    def get_free_agents(self, size=50, offset=0, player_ids=None):
+        self.calls.append((offset, tuple(player_ids or ())))
+        if player_ids:
+            return [p for p in self.pool if p.playerId in player_ids]
+        if offset in self.fail_offsets:
+            raise RuntimeError("timeout")
+        return self.pool[offset:offset + size]
+
+@pytest.fixture(autouse=True)
+def small_pages(monkeypatch):
+    monkeypatch.setattr(free_agent_sync, "PAGE_SIZE", 10)
+    monkeypatch.setattr(free_agent_sync, "MAX_REQUESTS", 3)
+    monkeypatch.setattr(free_agent_sync, "HOT_PAGES", 1)
+
+def _cycle(db, client, plan=None):
+    players, state = free_agent_sync.fetch(client, db, {}, NOW, plan=plan)
+    free_agent_sync.save_state(db, state)
+    db.commit()
+    return {p.playerId for p in players}, state
+
+def test_tail_cursor_covers_the_pool_and_wraps(db):
+    client = PoolClient(45)
+    seen = set()
+    offsets = []
+    for _ in range(3):
+        got, state = _cycle(db, client)
+        seen |= got
+        offsets.append(state["offset"])
+    # Hot page every time, two tail pages per sync: 10-29, then 30-44 which ends the pool
+    assert offsets == [30, 10, 30]
+    assert seen == {p.playerId for p in client.pool}
+    assert state["passes"] == 1 and state["pool_size"] == 45
+    assert free_agent_sync.load_state(db)["offset"] == 30
+
+def test_a_failed_page_is_retried_next_sync(db):
+    client = PoolClient(100, fail_offsets={20})
+    _, state = _cycle(db, client)
+    assert state["offset"] == 20 # stopped at the page that failed
+    client.fail_offsets.clear()
+    got, state = _cycle(db, client)
+    assert {1020, 1039} <= got and state["offset"] == 40
+
+def test_load_state_restarts_when_page_settings_change(db):
+    free_agent_sync.save_state(db, {"offset": 25, "passes": 2, "pool_size": 90})
+    db.commit()
+    assert free_agent_sync.load_state(db)["offset"] == 10
+    assert free_agent_sync.load_state(db)["passes"] == 2
+
+def test_plan_is_recorded_and_replayed(db):
+    # A stale free agent outside the hot page gets the by-id request
+    db.add(models.Player(id=1033, fullName="Stale", ownership=3.0, last_updated=NOW - datetime.timedelta(days=2)))
+    db.commit()
+    live = PoolClient(100)
+    plan = {}
+    _cycle(db, live, plan)
+    assert plan == {"offset": 10, "ids": [1033]}
+
+    # Replay: the database has moved on, but the requests are the recorded ones
+    db.get(models.Player, 1033).last_updated = NOW
+    free_agent_sync.save_state(db, {"offset": 70, "passes": 0, "pool_size": None})
+    db.commit()
+    replayed = PoolClient(100)
+    _cycle(db, replayed, dict(plan))
+    assert replayed.calls == live.calls
+
+def test_missing_payloads_fail_the_replay(db):
+    class Replaying(PoolClient):
+        def get_free_agents(self, size=50, offset=0, player_ids=None):
+            raise http_client.MissingPayload("kona_player_info")
+
+    with pytest.raises(http_client.MissingPayload):
+        free_agent_sync.fetch(Replaying(10), db, {}, NOW)
+
+@pytest.fixture
+def synced_pool():
+    """Free agents in the shared test database, positions as the sync and hand entry store them"""
+    from fastapi.testclient import TestClient
+    import database
+    import main
+    database.Base.metadata.create_all(database.engine)
+    db = database.SessionLocal()
+    try:
+        db.query(models.PlayerProjection).delete()
+        db.query(models.Player).delete()
+        for pid, position in ((1, "Defense"), (2, "Center"), (3, "Left Wing"), (4, "D"), (5, "F"), (6, "Goalie")):
+            db.add(models.Player(id=pid, fullName=f"P{pid}", position=position, total_points=10.0 - pid))
+            db.add(models.PlayerProjection(player_id=pid, games=1, projected_points=10.0 - pid))
+        db.commit()
+    finally:
+        db.close()
+    main.data_cache.invalidate()
+    yield TestClient(main.app)
+    main.data_cache.invalidate()
+
+@pytest.mark.parametrize("position,expected", [
+    ("Defense", [1, 4]), ("D", [1, 4]), ("Center", [2]), ("C", [2]), ("Forward", [2, 3, 5]), ("F", [2, 3, 5]),
+    ("Goalie", [6]), (None, [1, 2, 3, 4, 5, 6]),
+])
+def test_position_filters_match_synced_names_and_abbreviations(synced_pool, position, expected):
+    params = {"position": position} if position else {}
+    free_agents = synced_pool.get("/api/players/free_agents", params=params)
+    assert [p["id"] for p in free_agents.json()] == expected
+    projections = synced_pool.get("/api/projections", params=params)
+    assert [p["player_id"] for p in projections.json()] == expected
+    search = synced_pool.get("/api/players/search", params={"q": "p", **params})
+    assert [p["id"] for p in search.json()] == expected
+
+@pytest.mark.parametrize("position", ["XX", "c", "C; drop"])
+def test_free_agents_endpoint_refuses_unknown_positions(position):
+    from fastapi.testclient import TestClient
+    import main
+    assert TestClient(main.app).get("/api/players/free_agents", params={"position": position}).status_code == 400
@@ -0,0 +1,117 @@
+import httpx
+import pytest
+import http_client
+
+URL = "https://example.test/api"
+
+@pytest.fixture
+def transport(monkeypatch):
+    """Serves the queued (status or exception) responses in order and counts calls"""
+    queue, calls = [], []
+
+    def handler(request):
+        calls.append(request)
+        item = queue.pop(0)
+        if isinstance(item, Exception):
+            raise item
+        return httpx.Response(item, content=b"ok", request=request)
+
+    monkeypatch.setattr(http_client, "_client", httpx.Client(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(http_client, "_hosts", {})
+    monkeypatch.setattr(http_client.time, "sleep", lambda s: None)
+    monkeypatch.setattr(http_client, "MAX_RETRIES", 2)
+    monkeypatch.setattr(http_client, "BREAKER_THRESHOLD", 3)
+    return queue, calls
+
+def test_retries_5xx_then_succeeds(transport):
+    queue, calls = transport
+    queue += [503, 502, 200]
+    assert http_client.get(URL).status_code == 200
+    assert len(calls) == 3
+    state = http_client.stats()["example.test"]
+    assert state["retries"] == 2 and state["circuit"] == "closed"
+
+def test_gives_up_after_max_retries(transport):
+    queue, calls = transport
+    queue += [500, 500, 500, 200]
+    assert http_client.get(URL).status_code == 500
+    assert len(calls) == 3
+
+def test_transport_errors_are_raised_after_retries(transport):
+    queue, _ = transport
+    queue += [httpx.ConnectError("down")] * 3
+    with pytest.raises(httpx.ConnectError):
+        http_client.get(URL)
+
+def test_404_is_not_retried(transport):
+    queue, calls = transport
+    queue += [404]
+    assert http_client.get(URL).status_code == 404
+    assert len(calls) == 1
+
+def test_breaker_opens_then_lets_one_trial_through(transport, monkeypatch):
+    queue, calls = transport
+    queue += [500, 500, 500]
+    http_client.get(URL)
+    assert http_client.stats()["example.test"]["circuit"] == "open"
+    with pytest.raises(http_client.CircuitOpenError):
+        http_client.get(URL)
+    assert len(calls) == 3
+
+    # Cooldown over: the trial succeeds and closes the circuit
+    monkeypatch.setattr(http_client, "BREAKER_COOLDOWN", 0)
+    queue += [200]
+    assert http_client.get(URL).status_code == 200
+    assert http_client.stats()["example.test"]["circuit"] == "closed"
+
+def test_failed_trial_reopens(transport, monkeypatch):
+    queue, calls = transport
+    queue += [500, 500, 500]
+    http_client.get(URL)
+    monkeypatch.setattr(http_client, "BREAKER_COOLDOWN", 0)
+    queue += [500]
+    assert http_client.get(URL).status_code == 500
+    assert len(calls) == 4 # one trial, no retries once it reopened
+    assert http_client.stats()["example.test"]["circuit"] == "open"
+
+def test_record_and_replay_hooks(transport):
+    queue, _ = transport
+    queue += [200]
+    seen = {}
+    http_client.set_hooks(recorder=lambda key, status, body, error: seen.setdefault(key, (status, body, error)))
+    try:
+        http_client.get(URL, params={"b": 2, "a": 1}, headers={"x-fantasy-filter": "{}"})
+    finally:
+        http_client.set_hooks()
+    key = http_client.request_key(URL, {"a": 1, "b": 2}, {"x-fantasy-filter": "{}"})
+    assert seen == {key: (200, b"ok", None)}
+
+    http_client.set_hooks(replayer=seen.__getitem__)
+    try:
+        assert http_client.get(URL, params={"a": 1, "b": 2}, headers={"x-fantasy-filter": "{}"}).content == b"ok"
+    finally:
+        http_client.set_hooks()
+
+def test_failures_are_recorded_and_replayed(transport):
+    queue, _ = transport
+    queue += [404] + [httpx.ConnectTimeout("slow")] * 3
+    seen = {}
+    http_client.set_hooks(recorder=lambda key, status, body, error: seen.setdefault(key, (status, body, error)))
+    try:
+        http_client.get(URL, params={"page": 1})
+        with pytest.raises(httpx.ConnectTimeout):
+            http_client.get(URL, params={"page": 2})
+    finally:
+        http_client.set_hooks()
+    missing, down = (http_client.request_key(URL, {"page": page}) for page in (1, 2))
+    assert seen[missing] == (404, b"ok", None)
+    assert isinstance(seen[down][2], httpx.ConnectTimeout)
+
+    outcomes = {missing: (404, b"ok", None), down: (None, None, ("ConnectTimeout", "slow"))}
+    http_client.set_hooks(replayer=outcomes.__getitem__)
+    try:
+        assert http_client.get(URL, params={"page": 1}).status_code == 404
+        with pytest.raises(httpx.ConnectTimeout):
+            http_client.get(URL, params={"page": 2})
+    finally:
+        http_client.set_hooks()
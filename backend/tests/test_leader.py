@@ -0,0 +1,46 @@
+import threading
+import time
+import app_state
+import leader
+import models
+
+def test_file_lock_is_exclusive_and_released():
+    a, b = leader.ProcessLock("test-exclusive"), leader.ProcessLock("test-exclusive")
+    assert a.try_acquire()
+    assert a.alive()
+    assert not b.try_acquire()
+    a.release()
+    assert not a.held and not a.alive()
+    assert b.try_acquire()
+    b.release()
+
+def test_watch_steps_down_when_the_lock_is_lost_and_takes_over_again():
+    lock = leader.ProcessLock("test-watch")
+    assert lock.try_acquire()
+    lost, acquired = threading.Event(), threading.Event()
+    dropped = [True] # as if the Postgres connection behind it went away
+    real_alive = lock.alive
+    lock.alive = lambda: not dropped[0] and real_alive()
+
+    def on_lost():
+        dropped[0] = False
+        lost.set()
+
+    stop = leader.watch(lock, acquired.set, on_lost=on_lost, interval=0.01)
+    try:
+        assert lost.wait(2)
+        assert acquired.wait(2)
+        assert lock.held
+    finally:
+        stop.set()
+        time.sleep(0.05)
+        lock.release()
+
+def test_bump_generation_creates_then_increments(db):
+    assert app_state.get_generation(db, "x") == 0
+    app_state.bump_generation(db, "x")
+    app_state.bump_generation(db, "x")
+    app_state.bump_generation(db, "y")
+    assert app_state.get_generation(db, "x") == 2
+    assert app_state.get_generation(db, "y") == 1
+    assert db.query(models.CacheGeneration).count() == 2
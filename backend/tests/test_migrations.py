@@ -0,0 +1,71 @@
+import datetime
+import pytest
+from sqlalchemy import create_engine, inspect, text
+import migrations
+import models
+
+# The tables as the release before versioned migrations created them
+BASELINE = [
+    """CREATE TABLE league_teams (id INTEGER PRIMARY KEY, name VARCHAR, owner VARCHAR, rank INTEGER, wins INTEGER,
+       losses INTEGER, ties INTEGER, points FLOAT, goals FLOAT, assists FLOAT, ppp FLOAT, shp FLOAT, sog FLOAT,
+       hits FLOAT, blocks FLOAT, pim FLOAT)""",
+    """CREATE TABLE players (id INTEGER PRIMARY KEY, "fullName" VARCHAR, position VARCHAR, "proTeam" VARCHAR,
+       ownership FLOAT, avg_points FLOAT, total_points FLOAT, team_id INTEGER REFERENCES league_teams (id),
+       status VARCHAR, injury_detail VARCHAR, salary VARCHAR, salary_value FLOAT, contract_years VARCHAR,
+       goals FLOAT, assists FLOAT, ppp FLOAT, shp FLOAT, sog FLOAT, hits FLOAT, blocks FLOAT, plus_minus FLOAT,
+       last_updated DATETIME)""",
+    # No lineup_slot/salary columns yet: the baseline migration adds them
+    """CREATE TABLE player_snapshots (id INTEGER PRIMARY KEY, player_id INTEGER REFERENCES players (id),
+       date DATETIME, day VARCHAR, total_points FLOAT, goals FLOAT, assists FLOAT, ppp FLOAT, shp FLOAT,
+       sog FLOAT, hits FLOAT, blocks FLOAT, plus_minus FLOAT)""",
+]
+
+@pytest.fixture
+def baseline_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/baseline.db")
+    with engine.begin() as conn:
+        for ddl in BASELINE:
+            conn.execute(text(ddl))
+        conn.execute(text("""INSERT INTO players (id, "fullName", salary, salary_value, contract_years)
+                             VALUES (1, 'A', '$1,000,000', 1000000, '2')"""))
+        # Two syncs on the same day wrote two rows, as the baseline sync could
+        for snap_id, points in ((1, 5.0), (2, 6.0), (3, 7.0)):
+            day = "2025-11-01" if snap_id < 3 else "2025-11-02"
+            conn.execute(text("INSERT INTO player_snapshots (id, player_id, day, date, total_points) "
+                              "VALUES (:id, 1, :day, :date, :points)"),
+                         {"id": snap_id, "day": day, "date": datetime.datetime(2025, 11, 1), "points": points})
+    yield engine
+    engine.dispose()
+
+def test_baseline_database_with_duplicate_days_migrates_to_head(baseline_engine):
+    assert migrations.run_migrations(baseline_engine) == migrations.HEAD
+    with baseline_engine.connect() as conn:
+        assert migrations.current_version(conn) == migrations.HEAD
+        rows = conn.execute(text("SELECT id, day, total_points FROM player_snapshots ORDER BY id")).all()
+        # The newest row of the duplicated day is kept
+        assert [tuple(r) for r in rows] == [(2, "2025-11-01", 6.0), (3, "2025-11-02", 7.0)]
+        indexes = {i["name"]: i for i in inspect(conn).get_indexes("player_snapshots")}
+        assert indexes["ix_player_snapshots_player_day"]["unique"]
+        columns = {c["name"] for c in inspect(conn).get_columns("player_snapshots")}
+        assert {"lineup_slot", "salary", "stats"} <= columns
+        # Migration 5 backfilled the current salary as the first contract, from the oldest snapshot
+        contract = conn.execute(text("SELECT player_id, salary_value, effective_from FROM contracts")).one()
+        assert tuple(contract) == (1, 1000000, "2025-11-01")
+
+def test_migrating_again_is_a_no_op(baseline_engine):
+    migrations.run_migrations(baseline_engine)
+    with baseline_engine.connect() as conn:
+        applied = conn.execute(text("SELECT count(*) FROM schema_version")).scalar()
+    assert migrations.run_migrations(baseline_engine) == migrations.HEAD
+    with baseline_engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM schema_version")).scalar() == applied
+
+def test_fresh_database_migrates_to_the_model_schema(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/fresh.db")
+    try:
+        assert migrations.run_migrations(engine) == migrations.HEAD
+        with engine.connect() as conn:
+            tables = set(inspect(conn).get_table_names())
+            assert set(models.Base.metadata.tables) <= tables
+    finally:
+        engine.dispose()
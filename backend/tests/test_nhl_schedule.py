@@ -0,0 +1,53 @@
+import datetime
+import nhl_schedule
+
+UTC = datetime.timezone.utc
+NOW = datetime.datetime(2025, 11, 1, 20, 0, tzinfo=UTC)
+
+def game(start_offset_h, state="pre"):
+    start = NOW + datetime.timedelta(hours=start_offset_h)
+    return {"id": str(start_offset_h), "start": start, "end": start + nhl_schedule.GAME_WINDOW, "state": state}
+
+def plan(last_sync, games):
+    return nhl_schedule.next_sync_time(NOW, last_sync, games, live_interval=5, idle_interval=60, settle_delay=30)
+
+def minutes(m):
+    return datetime.timedelta(minutes=m)
+
+def test_live_game_syncs_every_live_interval():
+    assert plan(NOW - minutes(2), [game(-1, "in")]) == NOW + minutes(3)
+
+def test_live_game_overdue_syncs_now():
+    assert plan(NOW - minutes(20), [game(-1, "in")]) == NOW
+    assert plan(None, [game(-1, "in")]) == NOW
+
+def test_game_in_window_counts_as_live_without_state():
+    assert plan(NOW - minutes(1), [game(-1)]) == NOW + minutes(4)
+
+def test_settle_pass_after_last_game_ends():
+    # Ended 30 minutes ago (started 4h ago), settle delay 30 -> now; not yet synced after it
+    ended = game(-4, "post")
+    settle_at = ended["end"] + minutes(30)
+    assert plan(NOW - minutes(40), [ended]) == max(NOW, settle_at)
+
+def test_no_second_settle_pass():
+    ended = game(-6, "post")
+    last = NOW - minutes(10) # after the settle pass was due
+    assert last > ended["end"] + minutes(30)
+    assert plan(last, [ended]) == NOW + minutes(50)
+
+def test_idle_waits_for_puck_drop_when_sooner():
+    assert plan(NOW - minutes(10), [game(0.5)]) == NOW + minutes(30)
+
+def test_idle_interval_when_no_games():
+    assert plan(NOW - minutes(10), []) == NOW + minutes(50)
+    assert plan(NOW - minutes(90), []) == NOW
+
+def test_parse_games_accepts_espn_and_plain_lists():
+    espn = {"events": [{"id": "1", "date": "2025-11-01T23:00Z", "status": {"type": {"state": "pre"}}}]}
+    plain = [{"id": "1", "start": "2025-11-01T23:00:00+00:00"}, {"id": "2", "start": "not a date"}]
+    a = nhl_schedule._parse_games(espn)
+    b = nhl_schedule._parse_games(plain)
+    assert a[0]["start"] == b[0]["start"] == datetime.datetime(2025, 11, 1, 23, tzinfo=UTC)
+    assert a[0]["end"] - a[0]["start"] == nhl_schedule.GAME_WINDOW
+    assert len(b) == 1
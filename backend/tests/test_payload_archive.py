@@ -0,0 +1,73 @@
+import datetime
+import httpx
+import pytest
+import http_client
+import payload_archive
+import scrapers
+from fantasy_client import FantasyClient
+
+def test_blobs_are_deduplicated_and_round_trip(tmp_path):
+    archive = payload_archive.Archive(str(tmp_path))
+    a = archive.put(b"same body")
+    assert archive.put(b"same body") == a
+    assert archive.get(a) == b"same body"
+
+def test_manifests_filter_by_day(tmp_path):
+    archive = payload_archive.Archive(str(tmp_path))
+    for day in (1, 2, 3):
+        archive.write_manifest(datetime.datetime(2025, 11, day, 12), {"year": 2026}, {})
+    days = [m["recorded_at"][:10] for m in archive.manifests(since="2025-11-02")]
+    assert days == ["2025-11-02", "2025-11-03"]
+
+def test_replay_serves_recorded_bodies(tmp_path):
+    archive = payload_archive.Archive(str(tmp_path))
+    key = http_client.request_key("https://example.test/x", {"a": 1})
+    manifest = {"requests": {key: archive.put(b'{"ok": true}')}}
+    with payload_archive.replaying(archive, manifest):
+        assert http_client.get("https://example.test/x", params={"a": 1}).json() == {"ok": True}
+        with pytest.raises(payload_archive.MissingPayload):
+            http_client.get("https://example.test/x", params={"a": 2})
+
+def test_failed_calls_replay_the_way_they_failed(tmp_path):
+    archive = payload_archive.Archive(str(tmp_path))
+    rec = payload_archive.Recording(archive, {})
+    rec.record("ok", 200, b"{}")
+    rec.record("gone", 404, b"not found")
+    rec.record("down", None, None, http_client.CircuitOpenError("Circuit open for example.test"))
+    # 200s stay plain digests, as in manifests written before failures were recorded
+    assert isinstance(rec.requests["ok"], str)
+
+    def call(key):
+        return http_client.get("https://example.test/" + key)
+
+    manifest = {"requests": {http_client.request_key("https://example.test/" + k): v for k, v in rec.requests.items()}}
+    with payload_archive.replaying(archive, manifest):
+        assert call("ok").json() == {}
+        gone = call("gone")
+        assert gone.status_code == 404 and gone.text == "not found"
+        with pytest.raises(http_client.CircuitOpenError):
+            call("down")
+
+def test_a_sync_that_degraded_replays_degraded(tmp_path, monkeypatch):
+    # Live, CBS answered with an error and the sync carried on without injuries
+    monkeypatch.setattr(http_client, "_client", httpx.Client(transport=httpx.MockTransport(
+        lambda request: httpx.Response(503, content=b"", request=request))))
+    monkeypatch.setattr(http_client, "_hosts", {})
+    monkeypatch.setattr(http_client.time, "sleep", lambda s: None)
+    archive = payload_archive.Archive(str(tmp_path))
+    with payload_archive.recording({}, archive) as rec:
+        live = scrapers.fetch_cbs_injuries()
+    assert rec.requests
+    with payload_archive.replaying(archive, {"requests": rec.requests}):
+        assert scrapers.fetch_cbs_injuries() == live
+
+@pytest.mark.parametrize("fetch", [
+    lambda: FantasyClient(league_id=1, year=2026).fetch_scoring_settings(),
+    lambda: FantasyClient(league_id=1, year=2026).fetch_ownership(),
+    scrapers.fetch_cbs_injuries,
+])
+def test_sources_fail_loudly_on_missing_payloads(tmp_path, fetch):
+    # Live, these fall back to cached or empty data; a replay must not publish that
+    with payload_archive.replaying(payload_archive.Archive(str(tmp_path)), {"requests": {}}):
+        with pytest.raises(payload_archive.MissingPayload):
+            fetch()
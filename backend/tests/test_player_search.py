@@ -0,0 +1,67 @@
+import datetime
+import models
+import player_search
+
+T0 = datetime.datetime(2026, 10, 1, 12)
+
+def _player(pid, name, pro_team="EDM", position="C", team_id=None, points=0.0, updated=T0):
+    return models.Player(id=pid, fullName=name, proTeam=pro_team, position=position, team_id=team_id,
+                         total_points=points, last_updated=updated)
+
+def _index(db):
+    db.add_all([
+        _player(1, "Connor McDavid", team_id=1, points=120, updated=T0 - datetime.timedelta(minutes=3)),
+        _player(2, "Ryan McDonagh", "NSH", "D", points=30, updated=T0 - datetime.timedelta(minutes=2)),
+        _player(3, "Tim Stützle", "OTT", points=70, updated=T0 - datetime.timedelta(minutes=1)),
+        _player(4, "Connor Bedard", "CHI", team_id=2, points=90),
+    ])
+    db.commit()
+    index = player_search.PlayerIndex(check_interval=3600)
+    assert index.search("mc") is None # not built yet
+    assert index.refresh(db) == 4
+    return index
+
+def names(results):
+    return [r["fullName"] for r in results]
+
+def test_prefixes_are_anded_and_ranked_by_points(db):
+    index = _index(db)
+    assert names(index.search("mc")) == ["Connor McDavid", "Ryan McDonagh"]
+    assert names(index.search("connor mc")) == ["Connor McDavid"]
+    assert names(index.search("stutzle")) == ["Tim Stützle"] # accents folded
+    assert names(index.search("edm c")) == ["Connor McDavid"]
+    assert names(index.search("connor", free_agents=True)) == []
+    assert names(index.search("mc", positions=("D",))) == ["Ryan McDonagh"]
+
+def test_typos_fall_back_to_trigram_similarity(db):
+    index = _index(db)
+    assert names(index.search("conor mcdavid")) == ["Connor McDavid"]
+    assert index.search("zzzz") == []
+
+def test_refresh_only_reindexes_what_changed(db):
+    index = _index(db)
+    player = db.get(models.Player, 2)
+    player.fullName, player.last_updated = "Ryan McDonough", T0 + datetime.timedelta(hours=1)
+    db.commit()
+    # The changed player, plus Bedard who sits on the old watermark (rows written in the
+    # same instant as the newest one seen are read again rather than missed)
+    assert index.refresh(db) == 2
+    assert names(index.search("mcdonough")) == ["Ryan McDonough"]
+    assert names(index.search("mcdon")) == ["Ryan McDonough"]
+    assert "mcdonagh" not in [token for token, _, _ in index._tokens]
+    assert index.refresh(db) == 1 # only the newest row again
+
+def test_drops_are_picked_up_from_the_transaction_log(db):
+    index = _index(db)
+    # A drop clears team_id without moving last_updated
+    db.get(models.Player, 4).team_id = None
+    db.add(models.RosterTransaction(player_id=4, kind="drop", from_team_id=2, to_team_id=None,
+                                    created_at=T0 + datetime.timedelta(hours=2)))
+    db.commit()
+    index.refresh(db)
+    assert names(index.search("connor", free_agents=True)) == ["Connor Bedard"]
+
+def test_fallback_matches_in_order(db):
+    _index(db)
+    assert names(player_search.fallback(db, "connor mc")) == ["Connor McDavid"]
+    assert names(player_search.fallback(db, "con", free_agents=True)) == []
@@ -0,0 +1,58 @@
+import numpy as np
+import projections
+import stat_registry
+
+def _snapshots(*players):
+    """players: (player_id, [{key: season total, ...} per day]) -> load_snapshots() arrays"""
+    pid, totals = [], []
+    for player_id, days in players:
+        for day in days:
+            row = np.zeros(len(stat_registry.KEYS))
+            for key, value in day.items():
+                row[stat_registry.INDEX[key]] = value
+            pid.append(player_id)
+            totals.append(row)
+    return np.array(pid, dtype=np.int64), np.array(totals)
+
+def test_a_multi_day_delta_counts_every_game_in_it():
+    snapshots = _snapshots((7, [{"GP": 10, "G": 5}, {"GP": 11, "G": 6}, {"GP": 14, "G": 9, "A": 3}]))
+    owner, deltas, games = projections.game_log(snapshots, [7])
+    assert owner.tolist() == [0, 0]
+    assert games.tolist() == [1, 3]
+    # Split evenly over the three games, not one three-goal game
+    assert deltas[1, stat_registry.INDEX["G"]] == 1.0
+    assert deltas[1, stat_registry.INDEX["A"]] == 1.0
+
+def test_without_gp_any_movement_is_one_game():
+    snapshots = _snapshots((7, [{"SOG": 10}, {"SOG": 12}, {"SOG": 12, "+/-": 1}, {"SOG": 12, "+/-": 1}]))
+    owner, deltas, games = projections.game_log(snapshots, [7])
+    assert games.tolist() == [1] # +/- alone and no movement at all aren't games
+    assert deltas[0, stat_registry.INDEX["SOG"]] == 2
+
+def test_game_log_keeps_players_apart_and_drops_unknown_ones():
+    snapshots = _snapshots((1, [{"GP": 1, "G": 1}, {"GP": 2, "G": 2}]),
+                           (2, [{"GP": 5, "G": 9}, {"GP": 6, "G": 9}]),
+                           (3, [{"GP": 1}, {"GP": 2, "G": 1}]))
+    owner, deltas, games = projections.game_log(snapshots, [2, 1])
+    assert sorted(owner.tolist()) == [0, 1]
+    assert games.tolist() == [1, 1]
+
+def test_compute_counts_games_from_gp_and_rates_per_game():
+    # Same production, one player synced daily and one whose three games landed in one snapshot
+    daily = (1, [{"GP": 0, "G": 0}, {"GP": 1, "G": 1}, {"GP": 2, "G": 2}, {"GP": 3, "G": 3}])
+    lumped = (2, [{"GP": 0, "G": 0}, {"GP": 3, "G": 3}])
+    result = projections.compute(_snapshots(daily, lumped), [1, 2], ["C", "C"], {"G": 2}, remaining=10)
+    assert result["games"].tolist() == [3, 3]
+    assert np.allclose(result["goals"], [1.0, 1.0])
+    assert np.allclose(result["points_per_game"], [2.0, 2.0])
+    assert np.allclose(result["projected_points"], [20.0, 20.0])
+
+def test_compute_regresses_small_samples_toward_the_position():
+    veteran = (1, [{"GP": 0}, {"GP": 40, "G": 20}])
+    rookie = (2, [{"GP": 0}, {"GP": 1, "G": 2}])
+    result = projections.compute(_snapshots(veteran, rookie), [1, 2, 3], ["C", "C", "C"], {"G": 1}, remaining=1)
+    position_rate = 22 / 41
+    expected = (1 * 2 + projections.PRIOR_GAMES * position_rate) / (1 + projections.PRIOR_GAMES)
+    assert np.isclose(result["goals"][1], expected)
+    # No games at all: the position average
+    assert result["games"][2] == 0 and np.isclose(result["goals"][2], position_rate)
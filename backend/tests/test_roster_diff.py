@@ -0,0 +1,59 @@
+import datetime
+import models
+import roster_diff
+
+def test_diff_rosters_adds_drops_and_trades():
+    previous = {1: 10, 2: 10, 3: 20}
+    current = {1: 10, 2: 20, 4: 20}
+    changes = sorted(roster_diff.diff_rosters(previous, current))
+    assert changes == [(2, "trade", 10, 20), (3, "drop", 20, None), (4, "add", None, 20)]
+
+def test_diff_rosters_no_changes():
+    assert roster_diff.diff_rosters({1: 10}, {1: 10}) == []
+    assert roster_diff.diff_rosters({}, {}) == []
+
+def test_apply_drops_and_record(db):
+    db.add_all([models.Player(id=1, fullName="A", team_id=10), models.Player(id=2, fullName="B", team_id=20)])
+    db.commit()
+    changes = roster_diff.diff_rosters(roster_diff.load_owners(db), {2: 20})
+    assert roster_diff.apply_drops(db, changes) == [1]
+    when = datetime.datetime(2025, 11, 2, 12)
+    roster_diff.record_transactions(db, changes, when)
+    db.commit()
+    assert roster_diff.load_owners(db) == {2: 20}
+    tx = db.query(models.RosterTransaction).one()
+    assert (tx.player_id, tx.kind, tx.from_team_id, tx.to_team_id, tx.created_at) == (1, "drop", 10, None, when)
+
+def test_owners_on_undoes_later_transactions(db):
+    db.add_all([models.Player(id=1, fullName="A", team_id=20), models.Player(id=2, fullName="B", team_id=10),
+                models.Player(id=3, fullName="C")])
+    db.commit()
+    # Player 1 traded 10 -> 20 on Nov 3, player 3 dropped by 30 on Nov 2, player 2 added Nov 1
+    roster_diff.record_transactions(db, [(2, "add", None, 10)], datetime.datetime(2025, 11, 1, 9))
+    roster_diff.record_transactions(db, [(3, "drop", 30, None)], datetime.datetime(2025, 11, 2, 9))
+    roster_diff.record_transactions(db, [(1, "trade", 10, 20)], datetime.datetime(2025, 11, 3, 9))
+    db.commit()
+    assert roster_diff.owners_on(db, "2025-11-03") == {1: 20, 2: 10}
+    assert roster_diff.owners_on(db, "2025-11-02") == {1: 10, 2: 10}
+    assert roster_diff.owners_on(db, "2025-11-01") == {1: 10, 2: 10, 3: 30}
+    assert roster_diff.owners_on(db, "2025-10-31") == {1: 10, 3: 30}
+
+def test_transactions_endpoint_clamps_the_limit():
+    from fastapi.testclient import TestClient
+    import database
+    import main
+    database.Base.metadata.create_all(database.engine)
+    db = database.SessionLocal()
+    try:
+        db.query(models.RosterTransaction).delete()
+        db.add_all([models.RosterTransaction(player_id=pid, kind="add", to_team_id=1,
+                                             created_at=datetime.datetime(2025, 11, pid)) for pid in (1, 2, 3)])
+        db.commit()
+    finally:
+        db.close()
+    client = TestClient(main.app)
+    # SQLite reads a negative LIMIT as no limit at all
+    for limit in (0, -1):
+        rows = client.get(f"/api/transactions?limit={limit}").json()
+        assert [r["player_id"] for r in rows] == [3]
+    assert len(client.get("/api/transactions?limit=2").json()) == 2
@@ -0,0 +1,75 @@
+import datetime
+import pytest
+from apscheduler.schedulers.background import BackgroundScheduler
+import main
+
+UTC = datetime.timezone.utc
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    sched = BackgroundScheduler(timezone=UTC)
+    sched.start(paused=True)
+    monkeypatch.setattr(main, "scheduler", sched)
+    monkeypatch.setitem(main.LEAGUE_SETTINGS, "sync_mode", "adaptive")
+    monkeypatch.setitem(main.LEAGUE_SETTINGS, "idle_sync_interval", 60)
+    yield sched
+    sched.shutdown(wait=False)
+
+def test_adaptive_job_is_persistent_and_retimed(scheduler, monkeypatch):
+    first = datetime.datetime.now(UTC) + datetime.timedelta(minutes=10)
+    monkeypatch.setattr(main, "_adaptive_sync_time", lambda: first)
+    main.schedule_sync_job()
+    job = scheduler.get_job("sync_job")
+    assert job.name == main.ADAPTIVE_JOB_NAME
+    assert job.next_run_time == first
+    # An interval trigger always has a next fire time, so the scheduler never drops it
+    assert job.trigger.get_next_fire_time(first, first) is not None
+
+    second = first + datetime.timedelta(minutes=5)
+    monkeypatch.setattr(main, "_adaptive_sync_time", lambda: second)
+    main.schedule_sync_job()
+    assert scheduler.get_job("sync_job").next_run_time == second
+    assert len(scheduler.get_jobs()) == 1
+
+def test_not_before_holds_back_the_replan(scheduler, monkeypatch):
+    now = datetime.datetime.now(UTC)
+    monkeypatch.setattr(main, "_adaptive_sync_time", lambda: now)
+    main.schedule_sync_job(not_before=now + datetime.timedelta(minutes=1))
+    assert scheduler.get_job("sync_job").next_run_time == now + datetime.timedelta(minutes=1)
+
+def test_switching_from_fixed_replaces_the_job(scheduler, monkeypatch):
+    monkeypatch.setitem(main.LEAGUE_SETTINGS, "sync_mode", "fixed")
+    main.schedule_sync_job()
+    assert scheduler.get_job("sync_job").name != main.ADAPTIVE_JOB_NAME
+    run_at = datetime.datetime.now(UTC) + datetime.timedelta(minutes=3)
+    monkeypatch.setitem(main.LEAGUE_SETTINGS, "sync_mode", "adaptive")
+    monkeypatch.setattr(main, "_adaptive_sync_time", lambda: run_at)
+    main.schedule_sync_job()
+    job = scheduler.get_job("sync_job")
+    assert job.name == main.ADAPTIVE_JOB_NAME and job.next_run_time == run_at
+
+def test_no_schedule_falls_back_to_fixed(scheduler, monkeypatch):
+    monkeypatch.setattr(main, "_adaptive_sync_time", lambda: None)
+    main.schedule_sync_job()
+    assert scheduler.get_job("sync_job").name != main.ADAPTIVE_JOB_NAME
+
+def test_skipped_sync_still_replans(scheduler, monkeypatch):
+    monkeypatch.setattr(main.sync_lock, "try_acquire", lambda: False)
+    planned = datetime.datetime.now(UTC)
+    monkeypatch.setattr(main, "_adaptive_sync_time", lambda: planned)
+    main.sync_data()
+    job = scheduler.get_job("sync_job")
+    # Held back so the job doesn't keep bouncing off the other worker's lock
+    assert job.next_run_time >= planned + main.SKIPPED_SYNC_RETRY - datetime.timedelta(seconds=1)
+
+def test_failed_sync_still_replans(scheduler, monkeypatch):
+    planned = datetime.datetime.now(UTC) + datetime.timedelta(minutes=7)
+    monkeypatch.setattr(main, "_adaptive_sync_time", lambda: planned)
+    def boom():
+        raise RuntimeError("ESPN down")
+    monkeypatch.setattr(main, "_sync_data", boom)
+    monkeypatch.setattr(main.app_state, "start_sync_run", lambda db: 1)
+    with pytest.raises(RuntimeError):
+        main.sync_data()
+    assert scheduler.get_job("sync_job").next_run_time == planned
+    assert not main.sync_lock.held
@@ -0,0 +1,22 @@
+from typing import List
+import orjson
+import pydantic
+import pytest
+import schemas
+
+def test_render_drops_undeclared_fields_and_fills_defaults():
+    body = schemas.render(List[schemas.SalaryOut], [{"id": 1, "fullName": "A", "secret": "x"}])
+    row = orjson.loads(body)[0]
+    assert "secret" not in row
+    assert row["id"] == 1 and row["salary"] is None
+    assert set(row) == set(schemas.SalaryOut.model_fields)
+
+def test_render_rejects_wrong_types():
+    with pytest.raises(pydantic.ValidationError):
+        schemas.render(schemas.PlayerSearchOut, {"id": "not an id"})
+
+def test_render_nested_players():
+    team = {"id": 1, "name": "T", "players": [{"id": 5, "fullName": "P", "stats": b"\x00"}]}
+    out = orjson.loads(schemas.render(List[schemas.TeamOut], [team]))
+    assert out[0]["players"][0]["id"] == 5
+    assert "stats" not in out[0]["players"][0]
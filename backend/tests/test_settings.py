@@ -0,0 +1,53 @@
+import pytest
+import app_state
+
+@pytest.fixture
+def api(monkeypatch):
+    """The API on the shared test database, this worker holding settings loaded at startup"""
+    from fastapi.testclient import TestClient
+    import database
+    import main
+    import models
+    database.Base.metadata.create_all(database.engine)
+    db = database.SessionLocal()
+    try:
+        db.query(models.LeagueTeam).delete()
+        db.add(models.LeagueTeam(id=1, name="T"))
+        db.commit()
+    finally:
+        db.close()
+    main.refresh_settings()
+    monkeypatch.setitem(main.LEAGUE_SETTINGS, "salary_cap", 88.0)
+    yield main, TestClient(main.app)
+    main.roster_cache.invalidate()
+
+def other_worker_sets_cap(cap):
+    import database
+    db = database.SessionLocal()
+    try:
+        settings = app_state.load_settings(db)
+        settings["salary_cap"] = cap
+        app_state.save_settings(db, settings)
+        app_state.bump_generation(db, "settings")
+    finally:
+        db.close()
+
+def test_trades_use_a_cap_changed_by_another_worker(api, monkeypatch):
+    main, client = api
+    import trade_analysis
+    caps = []
+
+    def run(db, salary_cap=None, **kwargs):
+        caps.append(salary_cap)
+        return {"complete": True, "trades": []}
+
+    monkeypatch.setattr(trade_analysis, "run", run)
+    other_worker_sets_cap(95.5)
+    assert client.get("/api/analysis/trades?team_id=1").status_code == 200
+    assert caps == [95.5]
+
+def test_payroll_cap_space_uses_a_cap_changed_by_another_worker(api):
+    main, client = api
+    other_worker_sets_cap(80.0)
+    teams = client.get("/api/teams/payroll").json()
+    assert [(t["team_id"], t["cap_space"]) for t in teams] == [(1, 80_000_000)]
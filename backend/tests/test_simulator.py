@@ -0,0 +1,82 @@
+import concurrent.futures
+import datetime
+import multiprocessing
+import pytest
+import models
+import simulator
+import worker_pool
+
+NOW = datetime.datetime(2025, 12, 1, 12)
+SCORING = {"G": 1.0}
+
+def _player(db, player_id, team_id, lineup_slot, goals_per_game, games=8):
+    db.add(models.Player(id=player_id, fullName=f"P{player_id}", position="Center", team_id=team_id,
+                         lineup_slot=lineup_slot))
+    for day in range(games + 1):
+        date = NOW - datetime.timedelta(days=games + 1 - day)
+        # Alternating so every player has a spread to sample from
+        goals = sum(goals_per_game + (i % 2) for i in range(day))
+        db.add(models.PlayerSnapshot(player_id=player_id, day=date.strftime("%Y-%m-%d"), date=date, goals=goals))
+
+@pytest.fixture
+def league(db):
+    db.add_all([models.LeagueTeam(id=t, name=f"T{t}", points=100.0 * t) for t in (1, 2, 3)])
+    _player(db, 1, 1, "Center", 1)
+    _player(db, 2, 1, "Util", 0)
+    _player(db, 3, 2, "Forward", 1)
+    _player(db, 4, 3, "Center", 0)
+    db.commit()
+    return db
+
+def _comparable(result):
+    return {k: v for k, v in result.items() if k != "elapsed_s"}
+
+@pytest.mark.parametrize("workers", [2, 3])
+def test_same_seed_same_result_for_any_worker_count(league, monkeypatch, workers):
+    monkeypatch.setattr(simulator, "SHARD_SIZE", 500)
+    monkeypatch.setattr(worker_pool, "WORKERS", 1)
+    serial = simulator.run(league, SCORING, sims=1700, seed=7, now=NOW)
+    assert _comparable(simulator.run(league, SCORING, sims=1700, seed=8, now=NOW)) != _comparable(serial)
+
+    pool = concurrent.futures.ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+    monkeypatch.setattr(worker_pool, "WORKERS", workers)
+    monkeypatch.setattr(worker_pool, "executor", lambda: pool)
+    try:
+        parallel = simulator.run(league, SCORING, sims=1700, seed=7, now=NOW)
+    finally:
+        pool.shutdown()
+    assert _comparable(parallel) == _comparable(serial)
+
+def test_shards_cover_every_simulation_once(league, monkeypatch):
+    monkeypatch.setattr(simulator, "SHARD_SIZE", 400)
+    monkeypatch.setattr(worker_pool, "WORKERS", 1)
+    tasks = []
+    shard = simulator.simulate_shard
+
+    def recorded(task):
+        tasks.append(task)
+        return shard(task)
+
+    monkeypatch.setattr(simulator, "simulate_shard", recorded)
+    result = simulator.run(league, SCORING, sims=1000, seed=3, playoff_teams=2, now=NOW)
+    assert [t["sims"] for t in tasks] == [400, 400, 200]
+    assert len({tuple(t["seed"].spawn_key) for t in tasks}) == 3
+    # Each simulation puts exactly two teams in the playoffs and one in first
+    assert sum(t["playoff_odds"] for t in result["teams"]) == pytest.approx(2)
+    assert sum(t["first_place_odds"] for t in result["teams"]) == pytest.approx(1)
+    assert sum(t["mean_rank"] for t in result["teams"]) == pytest.approx(1 + 2 + 3)
+
+def test_only_starters_score(db):
+    db.add_all([models.LeagueTeam(id=t, name=f"T{t}", points=50.0) for t in (1, 2)])
+    _player(db, 1, 1, "Center", 1)
+    # Team 2's big scorers are on the bench and on IR, and one has no lineup slot at all
+    _player(db, 2, 2, "Bench", 5)
+    _player(db, 3, 2, "IR", 5)
+    _player(db, 4, 2, None, 5)
+    _player(db, 5, None, "Center", 5) # a free agent
+    db.commit()
+    result = simulator.run(db, SCORING, sims=200, seed=1, now=NOW)
+    assert result["starters"] == 1
+    teams = {t["team_id"]: t for t in result["teams"]}
+    assert teams[2]["week_points"] == 0 and teams[2]["projected_points"] == 50.0
+    assert teams[1]["week_points"] > 0 and teams[1]["projected_points"] > 50.0
@@ -0,0 +1,52 @@
+import datetime
+import models
+import staged_sync
+from benchmarks import synthetic
+
+def sync(db, client, now):
+    return staged_sync.run_sync(client, lambda: {}, db, now=now)
+
+def test_same_day_syncs_update_snapshots_in_place(db):
+    fx = synthetic.generate_league(teams=2, roster_size=4, free_agents=3, season_days=5)
+    client = synthetic.StubFantasyClient(fx)
+    now = datetime.datetime(2025, 11, 2, 18)
+    sync(db, client, now)
+    first = {s.player_id: s.id for s in db.query(models.PlayerSnapshot)}
+    client.advance()
+    sync(db, client, now + datetime.timedelta(minutes=5))
+    snaps = db.query(models.PlayerSnapshot).all()
+    assert len(snaps) == len(first) == 11
+    assert {s.player_id: s.id for s in snaps} == first
+    assert all(s.date == now + datetime.timedelta(minutes=5) for s in snaps)
+
+def test_next_day_adds_rows(db):
+    fx = synthetic.generate_league(teams=2, roster_size=4, free_agents=0, season_days=5)
+    client = synthetic.StubFantasyClient(fx)
+    now = datetime.datetime(2025, 11, 2, 18)
+    sync(db, client, now)
+    sync(db, client, now + datetime.timedelta(days=1))
+    assert db.query(models.PlayerSnapshot).count() == 16
+
+def test_drops_and_trades_are_published(db):
+    fx = synthetic.generate_league(teams=2, roster_size=3, free_agents=0, season_days=5)
+    client = synthetic.StubFantasyClient(fx)
+    now = datetime.datetime(2025, 11, 2, 18)
+    sync(db, client, now)
+    a, b = fx["teams"]
+    traded = a["roster"].pop()
+    b["roster"].append(traded)
+    dropped = b["roster"].pop(0)
+    sync(db, client, now + datetime.timedelta(minutes=5))
+    assert db.get(models.Player, traded["playerId"]).team_id == b["team_id"]
+    assert db.get(models.Player, dropped["playerId"]).team_id is None
+    kinds = {tx.player_id: tx.kind for tx in db.query(models.RosterTransaction)}
+    assert kinds == {traded["playerId"]: "trade", dropped["playerId"]: "drop"}
+
+def test_season_totals_use_the_league_season():
+    from types import SimpleNamespace
+    p = SimpleNamespace(stats={"Total 2026": {"total": {"G": 3}}, "Total 2027": {"total": {"G": 99}},
+                               "Last 7 2026": {"total": {"G": 1}}})
+    assert staged_sync.season_totals(p, 2026) == {"G": 3}
+    # Nothing for this season yet: no totals, not another season's
+    assert staged_sync.season_totals(SimpleNamespace(stats={"Total 2025": {"total": {"G": 40}}}), 2026) == {}
+    assert staged_sync.season_totals(SimpleNamespace(stats={}), 2026) == {}
@@ -0,0 +1,99 @@
+import datetime
+import math
+import struct
+import numpy as np
+import pytest
+import stat_registry
+
+def test_pack_unpack_round_trip():
+    blob = stat_registry.pack({"W": 12, "SV": 301.0, "PIM": None})
+    assert len(blob) == stat_registry.WIDTH
+    stats = stat_registry.unpack(blob)
+    assert set(stats) == set(stat_registry.EXTRA)
+    assert stats["W"] == 12 and stats["SV"] == 301 and stats["PIM"] == 0 # ESPN leaves out zeros
+
+def test_unpack_leaves_out_categories_the_vector_predates():
+    short = struct.pack("<3f", 10, 4, 1) # GP, W, L from an older registry
+    assert stat_registry.unpack(short) == {"GP": 10, "W": 4, "L": 1}
+    assert stat_registry.unpack(None) == {}
+    longer = stat_registry.pack({"GP": 3}) + struct.pack("<f", 99) # written by a newer registry
+    assert stat_registry.unpack(longer)["GP"] == 3
+
+def test_matrix_reads_missing_categories_as_nan():
+    hot = tuple(float(i) for i in range(len(stat_registry.HOT)))
+    rows = [
+        (7,) + hot + (stat_registry.pack({"GP": 5, "W": 2}),),
+        (8,) + hot[:-1] + (None, None), # +/- column empty, no vector
+        (9,) + hot + (struct.pack("<2f", 6, 3),), # short vector
+    ]
+    out = stat_registry.matrix(rows, skip=1)
+    assert out.shape == (3, len(stat_registry.KEYS))
+    gp, w, sv = (stat_registry.INDEX[k] for k in ("GP", "W", "SV"))
+    assert out[0, gp] == 5 and out[0, w] == 2 and out[0, sv] == 0
+    assert np.isnan(out[1, stat_registry.INDEX["+/-"]]) and np.isnan(out[1, len(stat_registry.HOT):]).all()
+    assert out[2, gp] == 6 and out[2, w] == 3 and np.isnan(out[2, sv])
+    assert (out[:, :len(stat_registry.HOT) - 1] == hot[:-1]).all()
+
+def test_matrix_fast_path_matches_row_by_row():
+    blobs = [stat_registry.pack({"GP": i, "SV": i * 20}) for i in range(5)]
+    rows = [(0.0,) * len(stat_registry.HOT) + (b,) for b in blobs]
+    out = stat_registry.matrix(rows)
+    for i, blob in enumerate(blobs):
+        assert list(out[i, len(stat_registry.HOT):]) == stat_registry._vector(blob)
+
+def test_a_vector_appearing_mid_history_is_not_a_game():
+    import projections
+    # Goalie history from before vectors: the first vector must not read as a whole season in a day
+    before = (0.0,) * len(stat_registry.HOT) + (None,)
+    after = (0.0,) * len(stat_registry.HOT) + (stat_registry.pack({"GP": 30, "W": 18, "SV": 800}),)
+    later = (0.0,) * len(stat_registry.HOT) + (stat_registry.pack({"GP": 31, "W": 19, "SV": 830}),)
+    snapshots = np.array([1, 1, 1], dtype=np.int64), stat_registry.matrix([before, after, later])
+    owner, deltas, games = projections.game_log(snapshots, [1])
+    assert games.tolist() == [1]
+    assert deltas[0, stat_registry.INDEX["SV"]] == 30
+
+    result = projections.compute(snapshots, [1], ["G"], {"W": 5}, remaining=1)
+    assert result["games"][0] == 1
+    assert math.isclose(result["points_per_game"][0], 5.0)
+
+    filled = projections.fill_unknown(np.array([0, 0]), np.array([[np.nan, 2.0], [4.0, 4.0]]), np.array([1.0, 1.0]), 1)
+    assert filled.tolist() == [[4.0, 2.0], [4.0, 4.0]]
+
+@pytest.fixture
+def history_client():
+    """The API on the shared test database, with one team and two days of snapshots"""
+    from fastapi.testclient import TestClient
+    import database
+    import main
+    import models
+    database.Base.metadata.create_all(database.engine)
+    db = database.SessionLocal()
+    try:
+        db.query(models.PlayerSnapshot).delete()
+        db.query(models.Player).delete()
+        db.query(models.LeagueTeam).delete()
+        db.add(models.LeagueTeam(id=1, name="T"))
+        db.add(models.Player(id=10, fullName="Goalie One", team_id=1))
+        db.add_all([
+            models.PlayerSnapshot(player_id=10, day="2026-10-01", date=datetime.datetime(2026, 10, 1), goals=0.0),
+            models.PlayerSnapshot(player_id=10, day="2026-10-02", date=datetime.datetime(2026, 10, 2), goals=1.0,
+                                  stats=stat_registry.pack({"W": 3})),
+        ])
+        db.commit()
+    finally:
+        db.close()
+    main.data_cache.invalidate()
+    yield TestClient(main.app)
+    main.data_cache.invalidate()
+
+def test_team_history_reads_registry_keys(history_client):
+    wins = history_client.get("/api/teams/1/players/history?stat=W")
+    assert wins.status_code == 200
+    assert wins.json() == [{"day": "2026-10-01", "Goalie One": None}, {"day": "2026-10-02", "Goalie One": 3.0}]
+    goals = history_client.get("/api/teams/1/players/history?stat=G").json()
+    assert [d["Goalie One"] for d in goals] == [0.0, 1.0]
+    assert history_client.get("/api/teams/1/players/history?stat=goals").json() == goals
+
+@pytest.mark.parametrize("stat", ["stats", "salary", "day", "nope"])
+def test_team_history_rejects_anything_else(history_client, stat):
+    assert history_client.get(f"/api/teams/1/players/history?stat={stat}").status_code == 400
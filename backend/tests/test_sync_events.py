@@ -0,0 +1,113 @@
+import asyncio
+from types import SimpleNamespace
+import sync_events
+
+def _fake_runs(monkeypatch, runs):
+    async def latest():
+        return max((r.id for r in runs), default=0)
+
+    async def after(run_id, limit):
+        return [r for r in runs if r.id > run_id][:limit]
+
+    monkeypatch.setattr(sync_events, "_latest_run_id", latest)
+    monkeypatch.setattr(sync_events, "_runs_after", after)
+
+def _run(runs, run_id):
+    runs.append(SimpleNamespace(id=run_id, summary=f'{{"run":{run_id}}}'))
+
+async def _next_sync(stream):
+    while True:
+        frame = await asyncio.wait_for(stream.__anext__(), 1)
+        if b"event: sync" in frame:
+            return frame
+
+def test_a_new_client_after_an_idle_spell_only_gets_new_syncs(monkeypatch):
+    runs = []
+    _fake_runs(monkeypatch, runs)
+    _run(runs, 1)
+
+    async def scenario():
+        broadcaster = sync_events.SyncBroadcaster(poll_interval=0.01)
+        first = broadcaster.stream()
+        await first.__anext__() # retry header, subscribed
+        _run(runs, 2)
+        assert b"id: 2\n" in await _next_sync(first)
+        await first.aclose()
+        while broadcaster._task is not None: # poller notices nobody is listening
+            await asyncio.sleep(0.01)
+
+        # Syncs nobody was connected for
+        _run(runs, 3)
+        _run(runs, 4)
+        second = broadcaster.stream()
+        await second.__anext__()
+        _run(runs, 5)
+        frame = await _next_sync(second)
+        await second.aclose()
+        return frame
+
+    assert b"id: 5\n" in asyncio.run(scenario())
+
+def test_last_event_id_catches_up_on_missed_syncs(monkeypatch):
+    runs = []
+    _fake_runs(monkeypatch, runs)
+    for run_id in (1, 2, 3):
+        _run(runs, run_id)
+
+    async def scenario():
+        broadcaster = sync_events.SyncBroadcaster(poll_interval=0.01)
+        stream = broadcaster.stream(last_event_id=1)
+        frames = [await _next_sync(stream), await _next_sync(stream)]
+        await stream.aclose()
+        return frames
+
+    frames = asyncio.run(scenario())
+    assert b"id: 2\n" in frames[0] and b"id: 3\n" in frames[1]
+
+def test_runs_are_held_back_until_every_cache_has_rechecked():
+    import datetime
+    import database
+    import models
+    database.Base.metadata.create_all(database.engine)
+    now = datetime.datetime.utcnow()
+    db = database.SessionLocal()
+    try:
+        db.query(models.SyncRun).delete()
+        db.add_all([
+            models.SyncRun(id=1, started_at=now, finished_at=now - 2 * sync_events.SETTLE, success=True, summary="{}"),
+            models.SyncRun(id=2, started_at=now, finished_at=now, success=True, summary="{}"),
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+    async def scenario():
+        try:
+            return [r.id for r in await sync_events._runs_after(0, 10)], await sync_events._latest_run_id()
+        finally:
+            await database.async_engine.dispose()
+
+    # Run 2 only just finished, a worker may still be serving the cache from before it
+    assert asyncio.run(scenario()) == ([1], 1)
+
+def test_sync_bumps_the_cache_generation_before_finishing_the_run(monkeypatch):
+    import app_state
+    import database
+    import main
+    database.Base.metadata.create_all(database.engine)
+    generations = []
+
+    def finish(db, run_id, error=None, summary=None):
+        generations.append(app_state.get_generation(db, "data"))
+        finish_sync_run(db, run_id, error, summary)
+
+    finish_sync_run = app_state.finish_sync_run
+    monkeypatch.setattr(main, "_sync_data", lambda: (None, {"moves": []}))
+    monkeypatch.setattr(app_state, "finish_sync_run", finish)
+    db = database.SessionLocal()
+    try:
+        before = app_state.get_generation(db, "data")
+    finally:
+        db.close()
+    main.sync_data()
+    assert generations == [before + 1]
@@ -0,0 +1,24 @@
+from benchmarks import synthetic
+
+def test_generate_league_is_deterministic():
+    a = synthetic.generate_league(teams=3, roster_size=4, free_agents=5, season_days=10, seed=1)
+    b = synthetic.generate_league(teams=3, roster_size=4, free_agents=5, season_days=10, seed=1)
+    assert a == b
+    assert len(a["teams"]) == 3 and all(len(t["roster"]) == 4 for t in a["teams"])
+    assert len(a["free_agents"]) == 5
+
+def test_every_player_has_ownership():
+    fx = synthetic.generate_league(teams=2, roster_size=3, free_agents=4, season_days=5)
+    everyone = [p for t in fx["teams"] for p in t["roster"]] + fx["free_agents"]
+    assert {str(p["playerId"]) for p in everyone} == set(fx["ownership"])
+
+def test_stub_client_advance_only_grows_totals():
+    fx = synthetic.generate_league(teams=2, roster_size=5, free_agents=5, season_days=5)
+    client = synthetic.StubFantasyClient(fx)
+    before = {p.playerId: dict(p.stats[synthetic.STATS_KEY]["total"]) for t in client.get_standings() for p in t.roster}
+    for _ in range(5):
+        client.advance()
+    for team in client.get_standings():
+        for p in team.roster:
+            after = p.stats[synthetic.STATS_KEY]["total"]
+            assert all(after.get(k, 0) >= v for k, v in before[p.playerId].items() if k != "+/-")
@@ -0,0 +1,122 @@
+import itertools
+import random
+import time
+import pytest
+import trade_analysis
+
+SLOTS = {"C": 1, "LW": 1, "D": 2, "G": 1, "UTIL": 1}
+POSITIONS = ("C", "LW", "D", "G")
+# As espn_api reports them: positions "Center", ..., lineup slots "Forward", "Util", ...
+ESPN_SLOTS = {"Center": 1, "Forward": 2, "Defense": 2, "Goalie": 1, "Util": 1}
+ESPN_POSITIONS = ("Center", "Left Wing", "Right Wing", "Defense", "Goalie")
+VOCABULARIES = [(SLOTS, POSITIONS), (ESPN_SLOTS, ESPN_POSITIONS)]
+
+def brute_lineup(players, slots):
+    """Best lineup by trying every player in every slot they can fill, or the bench"""
+    best = 0.0
+
+    def place(i, free, total):
+        nonlocal best
+        if i == len(players):
+            best = max(best, total)
+            return
+        position, points = players[i]
+        place(i + 1, free, total)
+        for slot, left in free.items():
+            if left > 0 and trade_analysis.canonical(position) in trade_analysis.SLOT_POSITIONS[slot]:
+                place(i + 1, {**free, slot: left - 1}, total + points)
+
+    place(0, {trade_analysis.canonical(slot): n for slot, n in slots.items()}, 0.0)
+    return best
+
+def roster(rng, first_id, size=6, positions=POSITIONS):
+    # Whole points so ties between players come up
+    return {first_id + i: (rng.choice(positions), float(rng.randint(0, 12)), 0.0) for i in range(size)}
+
+def value(team, slots=SLOTS):
+    return trade_analysis.lineup_value([(p[0], p[1]) for p in team.values()], slots)
+
+def brute_trades(roster_a, roster_b, min_gain, slots=SLOTS):
+    """Every 1-for-1 and 2-for-1 by full lineup evaluation, with search_pair's dominance rule"""
+    eps = trade_analysis.EPSILON
+    base_a, base_b = value(roster_a, slots), value(roster_b, slots)
+
+    def deltas(a_sends, b_sends):
+        after_a = {k: v for k, v in roster_a.items() if k not in a_sends} | {k: roster_b[k] for k in b_sends}
+        after_b = {k: v for k, v in roster_b.items() if k not in b_sends} | {k: roster_a[k] for k in a_sends}
+        return value(after_a, slots) - base_a, value(after_b, slots) - base_b
+
+    found = {}
+    for x in roster_a:
+        for y in roster_b:
+            d = deltas((x,), (y,))
+            if min(d) > min_gain + eps:
+                found[((x,), (y,))] = d
+    for x1, x2 in itertools.combinations(roster_a, 2):
+        for y in roster_b:
+            d = deltas((x1, x2), (y,))
+            halves = [deltas((x,), (y,)) for x in (x1, x2)]
+            if min(d) > min_gain + eps and not any(h[0] > d[0] - eps and h[1] > d[1] - eps for h in halves):
+                found[((x1, x2), (y,))] = d
+    for y1, y2 in itertools.combinations(roster_b, 2):
+        for x in roster_a:
+            d = deltas((x,), (y1, y2))
+            halves = [deltas((x,), (y,)) for y in (y1, y2)]
+            if min(d) > min_gain + eps and not any(h[1] > d[1] - eps and h[0] > d[0] - eps for h in halves):
+                found[((x,), (y1, y2))] = d
+    return found
+
+@pytest.mark.parametrize("slots,positions", VOCABULARIES)
+@pytest.mark.parametrize("seed", range(20))
+def test_team_values_match_lineup_value_and_brute_force(seed, slots, positions):
+    rng = random.Random(seed)
+    players = roster(rng, 1, size=8, positions=positions)
+    team = trade_analysis._Team(players, slots)
+    as_pairs = [(p[0], p[1]) for p in players.values()]
+    assert team.value == pytest.approx(brute_lineup(as_pairs, slots))
+    assert team.value == pytest.approx(value(players, slots))
+    for drop in itertools.combinations(players, 2):
+        rest = [(p[0], p[1]) for pid, p in players.items() if pid not in drop]
+        assert team.value_with(drop=drop) == pytest.approx(brute_lineup(rest, slots))
+    added = (positions[0], 7.0, 0.0)
+    assert team.value_with(drop=(1,), add=(added,)) == pytest.approx(
+        brute_lineup([(p[0], p[1]) for pid, p in players.items() if pid != 1] + [added[:2]], slots))
+
+def test_espn_names_fill_forward_and_util_slots():
+    slots = trade_analysis.lineup_slots({1: {"Forward": 6, "Defense": 4, "Goalie": 2, "Util": 1}})
+    players = [("Center", 300), ("Left Wing", 250), ("Right Wing", 200), ("Defense", 150), ("Goalie", 100)]
+    assert trade_analysis.lineup_value(players, slots) == 1000
+    # Goalies stay out of Util, the best leftover skater takes it
+    crowded = [("Goalie", 90), ("Goalie", 80), ("Goalie", 70), ("Defense", 10)] + [("Center", 5)] * 6
+    assert trade_analysis.lineup_value(crowded, {"Forward": 6, "Goalie": 2, "Util": 1}) == 90 + 80 + 30 + 10
+    # Hand-added players with abbreviations count the same
+    assert trade_analysis.lineup_value([("C", 300), ("G", 100)], {"Forward": 1, "Goalie": 1}) == 400
+    assert trade_analysis.lineup_value(players, trade_analysis.DEFAULT_SLOTS) == 1000
+
+@pytest.mark.parametrize("slots,positions", VOCABULARIES)
+@pytest.mark.parametrize("seed", range(30))
+@pytest.mark.parametrize("min_gain", [0.0, 2.0])
+def test_search_pair_bounds_drop_no_trade_the_brute_force_keeps(seed, min_gain, slots, positions):
+    rng = random.Random(seed)
+    roster_a, roster_b = roster(rng, 1, positions=positions), roster(rng, 101, positions=positions)
+    result = trade_analysis.search_pair({
+        "team_a": 1, "team_b": 2, "roster_a": roster_a, "roster_b": roster_b, "slots": slots,
+        "min_gain": min_gain, "two_for_one": True, "deadline": time.time() + 60,
+    })
+    assert result["complete"]
+    found = {(tuple(sorted(t["sends"])), tuple(sorted(t["receives"]))): (t["points_delta"], t["partner_points_delta"])
+             for t in result["trades"]}
+    expected = brute_trades(roster_a, roster_b, min_gain, slots)
+    assert set(found) == set(expected)
+    for key, (delta_a, delta_b) in expected.items():
+        assert found[key] == (round(delta_a, 1), round(delta_b, 1))
+
+def test_search_pair_stops_at_the_deadline():
+    rng = random.Random(1)
+    result = trade_analysis.search_pair({
+        "team_a": 1, "team_b": 2, "roster_a": roster(rng, 1, 12), "roster_b": roster(rng, 101, 12),
+        "slots": SLOTS, "min_gain": 0.0, "two_for_one": True, "deadline": time.time() - 1,
+    })
+    # It hands back what it has after the first evaluation instead of searching on
+    assert not result["complete"]
+    assert result["evaluated"] == 1
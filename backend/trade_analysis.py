@@ -0,0 +1,356 @@
+"""
+Trade search: 1-for-1 and 2-for-1 trades between every pair of rosters, kept when
+they improve both teams.
+
+A roster is worth the projected rest-of-season points of its best lineup. Slots and
+positions use ESPN's names (espn_api reports "Center", "Left Wing", "Defense", ...;
+abbreviations are read as the names they stand for). Each slot takes the positions in
+SLOT_POSITIONS, and those sets are nested (Center inside Forward inside Util), so
+filling the narrowest slots first, each with the best players left that fit, gives
+the best lineup: a player's own position's slots, then Forward, then Util. Goalies
+only ever fill Goalie slots. Slot counts come from the lineups the league actually
+sets. A trade's value to a team is its lineup value after the trade minus before, so
+a player only helps a team that would start them.
+
+Most candidates are thrown out before a lineup is evaluated, using bounds that hold
+for any trade where team A gives X and receives Y:
+
+    delta_A <= gain_A(Y)                 value only grows with players added
+    delta_A <= points(Y) - loss_A(X)     Y can add at most their own points
+
+where gain_A(Y) is the sum of precomputed single-player gains and loss_A(X) is what
+losing X costs A, computed once per player or pair. A 2-for-1 is also dropped
+when one of its 1-for-1 halves is at least as good for both teams.
+
+Each pair of teams is one task for worker_pool; tasks check the deadline so the
+search stops near its time budget with whatever it has found.
+"""
+import logging
+import time
+import worker_pool
+
+logger = logging.getLogger(__name__)
+
+# Abbreviations (players added by hand, older rows) for espn_api's position and slot names
+ALIASES = {"C": "Center", "LW": "Left Wing", "RW": "Right Wing", "F": "Forward", "D": "Defense", "G": "Goalie",
+           "UTIL": "Util", "BE": "Bench", "BN": "Bench"}
+FORWARDS = ("Center", "Left Wing", "Right Wing", "Forward") # "Forward": added by hand without a wing
+SKATERS = FORWARDS + ("Defense",)
+# Positions each lineup slot takes; any two are either nested or disjoint
+SLOT_POSITIONS = {
+    "Center": ("Center",), "Left Wing": ("Left Wing",), "Right Wing": ("Right Wing",),
+    "Defense": ("Defense",), "Goalie": ("Goalie",),
+    "Forward": FORWARDS,
+    "Util": SKATERS,
+}
+DEFAULT_SLOTS = {"Forward": 6, "Defense": 4, "Goalie": 2, "Util": 1}
+EPSILON = 1e-6 # lineup sums in a different order can differ by rounding; that's no gain
+
+def canonical(name):
+    return ALIASES.get(name, name)
+
+def _slot_plan(slots):
+    """
+    Splits slot counts into {position: slots only that position can fill} and the
+    shared slots as [(count, positions)], narrowest first.
+    """
+    own, shared = {}, {}
+    for slot, n in slots.items():
+        positions = SLOT_POSITIONS.get(canonical(slot))
+        if not positions or not n:
+            continue # Bench, IR, or a slot we don't know
+        if len(positions) == 1:
+            own[positions[0]] = own.get(positions[0], 0) + n
+        else:
+            shared[positions] = shared.get(positions, 0) + n
+    return own, sorted(((n, positions) for positions, n in shared.items()), key=lambda g: len(g[1]))
+
+def _fill_shared(shared, spares):
+    """Points of the shared slots. spares: {position: points left over, best first}."""
+    used = dict.fromkeys(spares, 0)
+    total = 0.0
+    for n, positions in shared:
+        # The best n that fit; each position's picks are the top of what it has left
+        best = sorted(((pts, p) for p in positions if p in spares for pts in spares[p][used[p]:]), reverse=True)[:n]
+        for pts, p in best:
+            total += pts
+            used[p] += 1
+    return total
+
+def lineup_value(players, slots):
+    """players: (position, points) pairs. Points of the best lineup that fits `slots`."""
+    own, shared = _slot_plan(slots)
+    by_position = {}
+    for position, points in players:
+        by_position.setdefault(canonical(position), []).append(points)
+    total = 0.0
+    spares = {}
+    for position, points in by_position.items():
+        points.sort(reverse=True)
+        n = own.get(position, 0)
+        total += sum(points[:n])
+        spares[position] = points[n:]
+    return total + _fill_shared(shared, spares)
+
+class _Team:
+    """
+    A roster with its lineup broken down by position, so a trade only re-sorts the
+    positions it touches. Gives the same values as lineup_value.
+    """
+    def __init__(self, roster, slots):
+        # roster: {player_id: (position, points, salary)}
+        self.roster = roster
+        self.own, self.shared = _slot_plan(slots)
+        # How many of a position's leftovers the shared slots could ever take
+        self.spare_room = {}
+        for n, positions in self.shared:
+            for position in positions:
+                self.spare_room[position] = self.spare_room.get(position, 0) + n
+        self.by_position = {}
+        for pid, (position, points, _) in roster.items():
+            self.by_position.setdefault(canonical(position), []).append((points, pid))
+        # Per position: points of its own slots' starters, and its best few left for the shared slots
+        self.starting = {}
+        self.spare = {}
+        for position, players in self.by_position.items():
+            players.sort(reverse=True)
+            self.starting[position], self.spare[position] = self._split(position, [pts for pts, _ in players])
+        self.starting_total = sum(self.starting.values())
+        self.value = self.starting_total + _fill_shared(self.shared, self.spare)
+        self.loss = {pid: self.value - self.value_with(drop=(pid,)) for pid in roster}
+
+    def _split(self, position, points):
+        n = self.own.get(position, 0)
+        return sum(points[:n]), points[n:n + self.spare_room.get(position, 0)]
+
+    def value_with(self, drop=(), add=()):
+        """Lineup value after dropping player ids `drop` and adding (position, points, ...) tuples `add`"""
+        touched = {canonical(self.roster[pid][0]) for pid in drop} | {canonical(p[0]) for p in add}
+        total = self.starting_total
+        spares = {position: spare for position, spare in self.spare.items() if position not in touched}
+        for position in touched:
+            points = [pts for pts, pid in self.by_position.get(position, ()) if pid not in drop]
+            points += [p[1] for p in add if canonical(p[0]) == position]
+            points.sort(reverse=True)
+            starting, spare = self._split(position, points)
+            total += starting - self.starting.get(position, 0.0)
+            spares[position] = spare
+        return total + _fill_shared(self.shared, spares)
+
+def search_pair(task):
+    """
+    All trades between two teams that improve both by more than task["min_gain"].
+    Returns {"trades": [...], "complete": bool, "evaluated": int}.
+    """
+    slots, deadline = task["slots"], task["deadline"]
+    min_gain = task["min_gain"] + EPSILON
+    a = _Team(task["roster_a"], slots)
+    b = _Team(task["roster_b"], slots)
+    trades = []
+    evaluated = 0
+    one_for_one = {}
+
+    def evaluate(give_team, get_team, give, get):
+        """delta for give_team and get_team when give_team sends `give` and receives `get`"""
+        nonlocal evaluated
+        evaluated += 1
+        give_players = [give_team.roster[pid] for pid in give]
+        get_players = [get_team.roster[pid] for pid in get]
+        return (give_team.value_with(drop=give, add=get_players) - give_team.value,
+                get_team.value_with(drop=get, add=give_players) - get_team.value)
+
+    def single(x, y):
+        # a sends x, b sends y; both orientations of a 2-for-1 look these up
+        if (x, y) not in one_for_one:
+            one_for_one[(x, y)] = evaluate(a, b, (x,), (y,))
+        return one_for_one[(x, y)]
+
+    def out_of_time():
+        # Cheap next to a lineup evaluation
+        return time.time() > deadline
+
+    # Single-player gains bound every trade, so players that help nobody drop out here
+    gain_a = {pid: a.value_with(add=(p,)) - a.value for pid, p in b.roster.items()}
+    gain_b = {pid: b.value_with(add=(p,)) - b.value for pid, p in a.roster.items()}
+    wanted_by_a = [pid for pid, g in gain_a.items() if g > min_gain]
+    wanted_by_b = [pid for pid, g in gain_b.items() if g > min_gain]
+
+    pair_loss = {}
+
+    def loss(team, give):
+        if len(give) == 1:
+            return team.loss[give[0]]
+        # Exact for the pairs that get this far, instead of the larger single loss
+        if give not in pair_loss:
+            pair_loss[give] = team.value - team.value_with(drop=give)
+        return pair_loss[give]
+
+    def bound(team, gains, give, get):
+        """Upper bound on `team`'s delta for sending `give` and receiving `get` (ids of the other roster)"""
+        other = b if team is a else a
+        points_in = sum(other.roster[pid][1] for pid in get)
+        return min(sum(gains[pid] for pid in get), points_in - loss(team, give))
+
+    # 1-for-1: a sends x, b sends y
+    for x in wanted_by_b:
+        for y in wanted_by_a:
+            if bound(a, gain_a, (x,), (y,)) <= min_gain or bound(b, gain_b, (y,), (x,)) <= min_gain:
+                continue
+            delta_a, delta_b = single(x, y)
+            if delta_a > min_gain and delta_b > min_gain:
+                trades.append(_trade(task["team_a"], task["team_b"], (x,), (y,), delta_a, delta_b, a, b))
+            if out_of_time():
+                return {"trades": trades, "complete": False, "evaluated": evaluated}
+
+    if not task["two_for_one"]:
+        return {"trades": trades, "complete": True, "evaluated": evaluated}
+
+    # 2-for-1 both ways. The side sending two needs at least one player the other side
+    # wants; the single player it gets back must be wanted.
+    for giver, receiver, gains_giver, gains_receiver, giver_ids, wanted in (
+            (a, b, gain_a, gain_b, list(a.roster), wanted_by_a),
+            (b, a, gain_b, gain_a, list(b.roster), wanted_by_b)):
+        for i, x1 in enumerate(giver_ids):
+            for x2 in giver_ids[i + 1:]:
+                if gains_receiver[x1] + gains_receiver[x2] <= min_gain:
+                    continue
+                for y in wanted:
+                    if bound(giver, gains_giver, (x1, x2), (y,)) <= min_gain \
+                            or bound(receiver, gains_receiver, (y,), (x1, x2)) <= min_gain:
+                        continue
+                    delta_giver, delta_receiver = evaluate(giver, receiver, (x1, x2), (y,))
+                    if out_of_time():
+                        return {"trades": trades, "complete": False, "evaluated": evaluated}
+                    if delta_giver <= min_gain or delta_receiver <= min_gain:
+                        continue
+                    # Dominated by sending only one of the two?
+                    halves = [single(x, y) if giver is a else tuple(reversed(single(y, x))) for x in (x1, x2)]
+                    if any(h[0] > delta_giver - EPSILON and h[1] > delta_receiver - EPSILON for h in halves):
+                        continue
+                    if giver is a:
+                        trades.append(_trade(task["team_a"], task["team_b"], (x1, x2), (y,), delta_giver, delta_receiver, a, b))
+                    else:
+                        trades.append(_trade(task["team_a"], task["team_b"], (y,), (x1, x2), delta_receiver, delta_giver, a, b))
+    return {"trades": trades, "complete": True, "evaluated": evaluated}
+
+def _trade(team_a, team_b, a_sends, b_sends, delta_a, delta_b, a, b):
+    salary_out = sum(a.roster[pid][2] for pid in a_sends)
+    salary_in = sum(b.roster[pid][2] for pid in b_sends)
+    return {"team_id": team_a, "partner_id": team_b, "sends": list(a_sends), "receives": list(b_sends),
+            "points_delta": round(delta_a, 1), "partner_points_delta": round(delta_b, 1),
+            # Salary change for each side in dollars, positive adds to payroll
+            "cap_delta": salary_in - salary_out, "partner_cap_delta": salary_out - salary_in}
+
+def lineup_slots(starters_by_team):
+    """Slot counts the league uses: the most of each slot any team has filled"""
+    slots = {}
+    for counts in starters_by_team.values():
+        for slot, n in counts.items():
+            slots[slot] = max(slots.get(slot, 0), n)
+    return slots or dict(DEFAULT_SLOTS)
+
+def _load(db):
+    from sqlalchemy import select
+    import models
+    from simulator import BENCH_SLOTS
+
+    conn = db.connection()
+    teams = {t.id: t for t in conn.execute(select(models.LeagueTeam.id, models.LeagueTeam.name))}
+    rows = conn.execute(
+        select(models.Player.id, models.Player.fullName, models.Player.position, models.Player.team_id,
+               models.Player.lineup_slot, models.Player.salary_value, models.PlayerProjection.projected_points)
+        .outerjoin(models.PlayerProjection, models.PlayerProjection.player_id == models.Player.id)
+        .where(models.Player.team_id.in_(list(teams)))
+    ).all()
+
+    rosters = {tid: {} for tid in teams}
+    starters = {tid: {} for tid in teams}
+    players = {}
+    for r in rows:
+        # An empty slot beats a negative projection, so nobody is worth less than nothing
+        rosters[r.team_id][r.id] = (r.position or "", max(r.projected_points or 0.0, 0.0), r.salary_value or 0.0)
+        players[r.id] = r
+        if r.lineup_slot and r.lineup_slot not in BENCH_SLOTS:
+            slot = canonical(r.lineup_slot)
+            starters[r.team_id][slot] = starters[r.team_id].get(slot, 0) + 1
+    return teams, rosters, players, lineup_slots(starters)
+
+def run(db, team_id=None, salary_cap=None, min_gain=0.0, two_for_one=True, enforce_cap=True, limit=50, budget=10.0):
+    """
+    Trades for `team_id` (or between all teams) that improve both sides, best first.
+    salary_cap is in millions like the league setting; enforce_cap drops trades that
+    take a team over it with a raise in payroll.
+    """
+    started = time.perf_counter()
+    deadline = time.time() + budget
+    teams, rosters, players, slots = _load(db)
+    if team_id is not None:
+        pairs = [(team_id, other) for other in teams if other != team_id]
+    else:
+        pairs = [(x, y) for i, x in enumerate(teams) for y in list(teams)[i + 1:]]
+    tasks = [{"team_a": x, "team_b": y, "roster_a": rosters[x], "roster_b": rosters[y], "slots": slots,
+              "min_gain": min_gain, "two_for_one": two_for_one, "deadline": deadline} for x, y in pairs]
+
+    results = []
+    complete = True
+    if worker_pool.WORKERS > 1 and len(tasks) > 1:
+        import concurrent.futures
+        futures = [worker_pool.executor().submit(search_pair, t) for t in tasks]
+        # A little grace for tasks to notice the deadline and hand back what they found
+        done, pending = concurrent.futures.wait(futures, timeout=max(deadline - time.time(), 0) + 1)
+        for f in pending:
+            f.cancel()
+        complete = not pending
+        results = [f.result() for f in done]
+    else:
+        for t in tasks:
+            if time.time() > deadline:
+                complete = False
+                break
+            results.append(search_pair(t))
+    complete = complete and all(r["complete"] for r in results)
+
+    cap = (salary_cap or 0) * 1_000_000
+    payroll = {tid: sum(p[2] for p in roster.values()) for tid, roster in rosters.items()}
+    trades = []
+    for trade in (t for r in results for t in r["trades"]):
+        after = payroll[trade["team_id"]] + trade["cap_delta"]
+        partner_after = payroll[trade["partner_id"]] + trade["partner_cap_delta"]
+        if enforce_cap and cap and ((after > cap and trade["cap_delta"] > 0)
+                                    or (partner_after > cap and trade["partner_cap_delta"] > 0)):
+            continue
+        trade["cap_space_after"] = round(cap - after, 2) if cap else None
+        trade["partner_cap_space_after"] = round(cap - partner_after, 2) if cap else None
+        trades.append(trade)
+    # Fairest first: the trade is only as likely as its smaller gain
+    trades.sort(key=lambda t: (-min(t["points_delta"], t["partner_points_delta"]),
+                               -(t["points_delta"] + t["partner_points_delta"])))
+    found = len(trades)
+    trades = trades[:limit]
+
+    def describe(pid):
+        p = players[pid]
+        return {"id": p.id, "fullName": p.fullName, "position": p.position,
+                "projected_points": p.projected_points, "salary_value": p.salary_value}
+
+    for trade in trades:
+        trade["team_name"] = teams[trade["team_id"]].name
+        trade["partner_name"] = teams[trade["partner_id"]].name
+        trade["sends"] = [describe(pid) for pid in trade["sends"]]
+        trade["receives"] = [describe(pid) for pid in trade["receives"]]
+
+    evaluated = sum(r["evaluated"] for r in results)
+    elapsed = time.perf_counter() - started
+    logger.info(f"Trade search over {len(results)}/{len(tasks)} team pairs: {evaluated} trades evaluated, "
+                f"{found} found in {elapsed:.2f}s{'' if complete else ' (time budget hit)'}")
+    return {
+        "team_id": team_id,
+        "complete": complete,
+        "team_pairs": len(tasks),
+        "team_pairs_searched": len(results),
+        "evaluated": evaluated,
+        "found": found,
+        "slots": slots,
+        "elapsed_s": round(elapsed, 3),
+        "trades": trades,
+    }
@@ -0,0 +1,22 @@
+"""
+Process pool shared by the CPU-heavy analysis endpoints (simulations, trade search).
+
+Tasks must be plain functions of picklable data: workers are spawned, not forked (the
+server process has threads), so they import only the modules the task needs.
+"""
+import concurrent.futures
+import multiprocessing
+import os
+import threading
+
+WORKERS = int(os.getenv("ANALYSIS_WORKERS", os.cpu_count() or 1))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def executor():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = concurrent.futures.ProcessPoolExecutor(max_workers=WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
@@ -147,9 +147,49 @@ function App() {
         return sortableItems;
     }, [freeAgents, sortConfig]);
 
+    // Applies the change summary pushed after a sync instead of reloading everything
+    const applySyncSummary = (summary) => {
+        // Roster moves change which list a player belongs to, reload in that case
+        if (summary.moves.length > 0) {
+            fetchData();
+            return;
+        }
+        if (summary.players.length === 0 && summary.teams.length === 0) return;
+
+        const playerChanges = new Map(summary.players.map(p => [p.id, p]));
+        const teamChanges = new Map(summary.teams.map(t => [t.id, t]));
+        const patchPlayer = (p) => playerChanges.has(p.id) ? { ...p, ...playerChanges.get(p.id) } : p;
+        const patchTeam = (t) => {
+            const { id, name, delta, ...fields } = teamChanges.get(t.id) || {};
+            return { ...t, ...fields, players: (t.players || []).map(patchPlayer) };
+        };
+
+        setTeams(prev => prev.map(patchTeam));
+        setFreeAgents(prev => prev.map(patchPlayer));
+        setSelectedTeam(prev => prev ? patchTeam(prev) : prev);
+        setSelectedPlayer(prev => prev ? patchPlayer(prev) : prev);
+
+        if (summary.teams.length > 0) {
+            setHistory(prev => {
+                const last = prev[prev.length - 1];
+                const row = { ...last, day: summary.day };
+                summary.teams.forEach(t => { row[t.name] = t.points; });
+                return last && last.day === summary.day ? [...prev.slice(0, -1), row] : [...prev, row];
+            });
+        }
+    };
+
     useEffect(() => {
         fetchData();
 
+        // Live updates: the backend pushes a change summary after every sync
+        const source = new EventSource('/api/events');
+        source.addEventListener('sync', (event) => applySyncSummary(JSON.parse(event.data)));
+        source.addEventListener('resync', () => fetchData());
+        return () => source.close();
+    }, []);
+
+    useEffect(() => {
         // Baseline state
         if (!window.history.state) {
             window.history.replaceState({ activeTab: 'dashboard', selectedTeamId: null, selectedPlayerId: null }, '');